@@ -0,0 +1,9 @@
+from django.urls import path
+from . import async_views
+
+app_name = 'accounts_async'
+
+urlpatterns = [
+    path('user-info/', async_views.user_info, name='user_info'),
+    path('providers/', async_views.provider_list, name='provider_list'),
+]
@@ -0,0 +1,40 @@
+"""
+Variantes assíncronas (ASGI) das views de leitura de accounts/views.py.
+As respostas são idênticas às das views síncronas; veja service_platform/async_api.py.
+"""
+from service_platform.async_api import api_view, generic_view, paginate, render
+from .models import ProviderProfile
+from .serializers import UserProfileSerializer, ProviderProfileSerializer
+from .views import ProviderListView, provider_profile_queryset
+
+
+@api_view()
+async def user_info(request):
+    """View assíncrona para obter informações do usuário logado"""
+    serializer = UserProfileSerializer(request.user)
+
+    response_data = {
+        'user': serializer.data
+    }
+
+    # Adicionar informações do perfil de prestador se aplicável
+    if request.user.user_type == 'provider':
+        try:
+            provider_profile = await provider_profile_queryset().aget(user=request.user)
+            provider_serializer = ProviderProfileSerializer(provider_profile)
+            response_data['provider_profile'] = provider_serializer.data
+        except ProviderProfile.DoesNotExist:
+            response_data['provider_profile'] = None
+
+    return render(request, response_data)
+
+
+@api_view(allow_anonymous=True, throttle_scope='public')
+async def provider_list(request):
+    """View assíncrona para listar prestadores de serviço disponíveis"""
+    view = generic_view(ProviderListView, request)
+    queryset = view.filter_queryset(view.get_queryset())
+    page = await paginate(request, queryset)
+
+    serializer = view.get_serializer(page.items, many=True)
+    return render(request, page.response_data(serializer.data))
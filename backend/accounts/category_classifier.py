@@ -0,0 +1,184 @@
+"""
+Classificador de categorias de serviço a partir de texto livre.
+
+As regras (categoria, peso e palavras-chave) ficam em uma tabela de dados,
+que pode ser substituída pela configuração SERVICE_CATEGORY_RULES (lista de
+regras ou caminho para um arquivo JSON no mesmo formato). Todas as palavras
+são compiladas em uma única expressão regular, aplicada sobre o texto sem
+acentos; cada ocorrência soma o peso da regra para a sua categoria.
+
+Palavras terminadas em '*' casam como prefixo (ex: 'eletric*' casa com
+'eletricista'); as demais precisam casar com a palavra ou expressão inteira.
+
+Os IDs das categorias ficam no cache com a tag 'category:*'
+(service_platform.caching): criar, renomear ou desativar uma categoria
+invalida o mapeamento em todos os processos (accounts.signals).
+"""
+import json
+import re
+import unicodedata
+from functools import lru_cache
+
+from django.conf import settings
+
+from service_platform.caching import cached
+
+# Categoria usada quando nenhuma regra casa com o texto
+FALLBACK_CATEGORY = 'Outros'
+
+# Os nomes das categorias seguem os cadastrados em populate_data.py
+DEFAULT_CATEGORY_RULES = [
+    {'category': 'Elétrica', 'weight': 3, 'keywords': [
+        'eletric*', 'instalacoes eletricas', 'electrician',
+    ]},
+    {'category': 'Elétrica', 'weight': 1, 'keywords': [
+        'tomada*', 'disjuntor*', 'fiacao', 'curto circuito', 'quadro de luz',
+    ]},
+    {'category': 'Encanamento', 'weight': 3, 'keywords': [
+        'encanad*', 'encanament*', 'hidraulic*', 'plumber', 'desentup*',
+    ]},
+    {'category': 'Encanamento', 'weight': 1, 'keywords': [
+        'vazamento*', 'torneira*', 'esgoto', 'cano', 'canos', 'caixa d agua',
+    ]},
+    {'category': 'Pintura', 'weight': 3, 'keywords': [
+        'pintur*', 'pintor*', 'painter',
+    ]},
+    {'category': 'Pintura', 'weight': 1, 'keywords': [
+        'textura', 'grafiato', 'massa corrida',
+    ]},
+    {'category': 'Climatização', 'weight': 3, 'keywords': [
+        'climatiza*', 'ar condicionado', 'hvac', 'refrigeracao',
+    ]},
+    {'category': 'Serviços Gerais', 'weight': 2, 'keywords': [
+        'reparos', 'marido de aluguel', 'handyman', 'faz tudo', 'manutencao predial',
+    ]},
+    {'category': 'Limpeza', 'weight': 3, 'keywords': [
+        'limpeza', 'faxin*', 'diarista*', 'higieniza*',
+    ]},
+    {'category': 'Jardinagem', 'weight': 3, 'keywords': [
+        'jardin*', 'jardim', 'paisagis*',
+    ]},
+    {'category': 'Jardinagem', 'weight': 1, 'keywords': [
+        'poda', 'grama', 'gramado',
+    ]},
+    {'category': 'Marcenaria', 'weight': 3, 'keywords': [
+        'marcen*', 'carpint*', 'moveis sob medida',
+    ]},
+    {'category': 'Delivery', 'weight': 3, 'keywords': [
+        'delivery', 'entrega*', 'motoboy', 'frete*',
+    ]},
+    {'category': 'Cuidador', 'weight': 3, 'keywords': [
+        'cuidador*', 'baba', 'babas', 'acompanhante de idoso*',
+    ]},
+    {'category': 'Pet Care', 'weight': 3, 'keywords': [
+        'pet', 'pets', 'pet shop', 'petshop', 'banho e tosa', 'adestra*', 'dog walker',
+    ]},
+    {'category': 'Tecnologia', 'weight': 3, 'keywords': [
+        'informatica', 'computador*', 'notebook*', 'suporte tecnico', 'assistencia tecnica',
+    ]},
+    {'category': 'Tecnologia', 'weight': 1, 'keywords': [
+        'celular*', 'wifi', 'wi fi', 'roteador*', 'impressora*',
+    ]},
+]
+
+
+def fold_text(text):
+    """Remove acentos, converte para minúsculas e normaliza a pontuação em espaços"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r'[\W_]+', ' ', text.lower()).strip()
+
+
+class CategoryClassifier:
+    """Classifica textos em categorias de serviço usando uma única regex compilada"""
+
+    def __init__(self, rules, fallback=FALLBACK_CATEGORY):
+        self.fallback = fallback
+        self.rules = []
+        self.categories = []
+
+        groups = []
+        for rule in rules:
+            category = rule['category']
+            if category not in self.categories:
+                self.categories.append(category)
+
+            patterns = []
+            # Expressões mais longas primeiro, para que prevaleçam sobre seus prefixos
+            for keyword in sorted(rule['keywords'], key=len, reverse=True):
+                prefix = keyword.endswith('*')
+                words = fold_text(keyword.rstrip('*')).split()
+                if not words:
+                    continue
+                pattern = r'\s+'.join(re.escape(word) for word in words)
+                if prefix:
+                    pattern += r'\w*'
+                patterns.append(pattern)
+
+            if patterns:
+                groups.append(f'(?P<r{len(self.rules)}>{"|".join(patterns)})')
+                self.rules.append((category, rule.get('weight', 1)))
+
+        self.pattern = re.compile(r'\b(?:' + '|'.join(groups) + r')\b') if groups else None
+
+    def scores(self, text):
+        """Retorna {categoria: pontuação} para as categorias encontradas no texto"""
+        scores = {}
+        if self.pattern is None:
+            return scores
+
+        for match in self.pattern.finditer(fold_text(text)):
+            category, weight = self.rules[int(match.lastgroup[1:])]
+            scores[category] = scores.get(category, 0) + weight
+
+        return scores
+
+    def classify(self, text):
+        """Retorna (categoria, pontuação); em caso de empate vale a ordem das regras"""
+        scores = self.scores(text)
+        if not scores:
+            return self.fallback, 0
+
+        category = max(scores, key=lambda name: (scores[name], -self.categories.index(name)))
+        return category, scores[category]
+
+    def category_id(self, text):
+        """Retorna o ID da ServiceCategory ativa correspondente ao texto, se existir"""
+        name, _ = self.classify(text)
+        return active_category_ids().get(name)
+
+
+@cached(tags=['category:*'])
+def active_category_ids():
+    """{nome: id} das categorias ativas"""
+    from .models import ServiceCategory
+
+    return dict(ServiceCategory.objects.filter(is_active=True).values_list('name', 'id'))
+
+
+def load_rules():
+    """Carrega as regras da configuração, ou a tabela padrão"""
+    rules = getattr(settings, 'SERVICE_CATEGORY_RULES', None)
+    if rules is None:
+        return DEFAULT_CATEGORY_RULES
+    if isinstance(rules, str):
+        with open(rules, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    return rules
+
+
+@lru_cache(maxsize=None)
+def get_classifier():
+    """Classificador compilado uma única vez por processo"""
+    return CategoryClassifier(load_rules())
+
+
+def classify_text(text):
+    """Atalho para classificar um texto livre com as regras configuradas"""
+    return get_classifier().classify(text)
+
+
+def suggest_category_id(service_request):
+    """Sugere a categoria de uma ServiceRequest a partir do título e da descrição"""
+    text = f'{service_request.title} {service_request.description}'
+    return get_classifier().category_id(text)
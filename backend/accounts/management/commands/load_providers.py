@@ -1,15 +1,79 @@
 import csv
-import pandas as pd
+import hashlib
+import queue
 import re
+import threading
+import unicodedata
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import django
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from accounts.category_classifier import get_classifier
 from accounts.models import ProviderProfile, ServiceCategory
+from service_platform.caching import invalidate
 from django.db import transaction
 import logging
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+# Sinaliza o fim do estágio de parsing na fila entre as threads
+_PIPELINE_DONE = object()
+
+# Nomes de colunas aceitos na planilha, mapeados para as chaves usadas no CSV
+EXCEL_COLUMN_ALIASES = {
+    'name': 'name',
+    'nome': 'name',
+    'prestador': 'name',
+    'address': 'address',
+    'endereco': 'address',
+    'phone_number': 'phone_number',
+    'phone': 'phone_number',
+    'telefone': 'phone_number',
+    'celular': 'phone_number',
+    'whatsapp': 'phone_number',
+    'website': 'website',
+    'site': 'website',
+    'reviews_average': 'reviews_average',
+    'rating': 'reviews_average',
+    'avaliacao': 'reviews_average',
+    'nota': 'reviews_average',
+    'reviews_count': 'reviews_count',
+    'avaliacoes': 'reviews_count',
+    'total_avaliacoes': 'reviews_count',
+}
+
+_worker_command = None
+
+
+def _parse_chunk(chunk):
+    """Processa um lote de linhas brutas dentro de um processo do pool"""
+    global _worker_command
+    if _worker_command is None:
+        _worker_command = Command()
+    return _worker_command.parse_rows(chunk)
+
+
+def _chunked(iterable, size):
+    """Agrupa um iterável em listas de até `size` elementos"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class _PipelineFailure:
+    """Exceção ocorrida no estágio de parsing, repassada para o escritor"""
+
+    def __init__(self, exc):
+        self.exc = exc
+
+
 class Command(BaseCommand):
     help = 'Carrega prestadores de serviço a partir de arquivos CSV e Excel'
     
@@ -31,6 +95,32 @@ class Command(BaseCommand):
             action='store_true',
             help='Executa sem salvar no banco de dados (apenas mostra o que seria feito)'
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Número de processos usados no parsing das linhas (1 = sem paralelismo)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Quantidade de linhas enviadas a cada processo por vez'
+        )
+        parser.add_argument(
+            '--queue-size',
+            type=int,
+            default=8,
+            help='Máximo de lotes já processados aguardando o escritor do banco'
+        )
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help=(
+                'Importação idempotente: grava cada lote com INSERT ... ON CONFLICT '
+                'usando o identificador externo do prestador'
+            )
+        )
     
     def handle(self, *args, **options):
         csv_file = options['csv_file']
@@ -40,56 +130,157 @@ class Command(BaseCommand):
         if dry_run:
             self.stdout.write(self.style.WARNING('Modo DRY RUN - Nenhum dado será salvo no banco'))
         
-        # Carregar dados do CSV
-        providers_data = []
-        
-        try:
-            self.stdout.write(f'Carregando dados do arquivo CSV: {csv_file}')
-            providers_data.extend(self.load_csv_data(csv_file))
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f'Erro ao carregar CSV: {str(e)}'))
+        # Leitura em streaming dos arquivos, parsing em lotes (opcionalmente em
+        # vários processos) e escrita no banco à medida que os lotes ficam prontos
+        batches = self.iter_parsed_batches(
+            self.iter_source_rows(csv_file, excel_file),
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            queue_size=options['queue_size']
+        )
         
-        try:
-            self.stdout.write(f'Carregando dados do arquivo Excel: {excel_file}')
-            providers_data.extend(self.load_excel_data(excel_file))
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f'Erro ao carregar Excel: {str(e)}'))
+        if dry_run:
+            providers_data = [provider for batch in batches for provider in batch]
+            total = len(providers_data)
+            if providers_data:
+                self.preview_providers(providers_data)
+        elif options['upsert']:
+            total = self.upsert_providers(batches)
+            # bulk_create não dispara os sinais que invalidam o cache (accounts.signals)
+            invalidate('provider:*', 'category:*')
+        else:
+            total = self.create_providers(provider for batch in batches for provider in batch)
         
-        if not providers_data:
+        if not total:
             self.stdout.write(self.style.ERROR('Nenhum dado foi carregado dos arquivos'))
             return
         
-        self.stdout.write(f'Total de prestadores encontrados: {len(providers_data)}')
+        self.stdout.write(f'Total de prestadores encontrados: {total}')
+    
+    def iter_source_rows(self, csv_file, excel_file):
+        """Gera as linhas brutas dos arquivos CSV e Excel, uma a uma"""
+        sources = (
+            ('CSV', csv_file, self.read_csv_rows),
+            ('Excel', excel_file, self.read_excel_rows),
+        )
+        for label, file_path, reader in sources:
+            try:
+                self.stdout.write(f'Carregando dados do arquivo {label}: {file_path}')
+                for row in reader(file_path):
+                    yield label, row
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'Erro ao carregar {label}: {str(e)}'))
+    
+    def iter_parsed_batches(self, raw_rows, workers=1, chunk_size=500, queue_size=8):
+        """
+        Converte as linhas brutas em lotes de prestadores.
+        
+        Com mais de um worker, o parsing (clean_phone, extract_city e
+        determine_category) roda em um pool de processos alimentado por uma
+        thread produtora, que entrega os lotes ao escritor por uma fila limitada.
+        """
+        chunks = _chunked(raw_rows, max(chunk_size, 1))
+        
+        if workers <= 1:
+            for chunk in chunks:
+                yield self.parse_rows(chunk)
+            return
         
-        # Processar e salvar dados
-        if not dry_run:
-            self.create_providers(providers_data)
-        else:
-            self.preview_providers(providers_data)
+        batches = queue.Queue(maxsize=max(queue_size, 1))
+        stop = threading.Event()
+        
+        def put(item):
+            # Não bloqueia para sempre caso o escritor tenha desistido
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+        
+        def produce():
+            try:
+                with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+                    pending = deque()
+                    for chunk in chunks:
+                        if stop.is_set():
+                            break
+                        pending.append(pool.submit(_parse_chunk, chunk))
+                        # Limita os lotes em processamento para não ler o arquivo inteiro
+                        if len(pending) >= workers * 2:
+                            put(pending.popleft().result())
+                    while pending and not stop.is_set():
+                        put(pending.popleft().result())
+                    for future in pending:
+                        future.cancel()
+            except BaseException as e:
+                put(_PipelineFailure(e))
+            finally:
+                put(_PIPELINE_DONE)
+        
+        producer = threading.Thread(target=produce, name='load-providers-parser', daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = batches.get()
+                if item is _PIPELINE_DONE:
+                    break
+                if isinstance(item, _PipelineFailure):
+                    raise item.exc
+                yield item
+        finally:
+            stop.set()
+            producer.join()
     
-    def load_csv_data(self, file_path):
-        """Carrega dados do arquivo CSV"""
+    def parse_rows(self, rows):
+        """Processa um lote de linhas brutas (origem, linha)"""
         providers = []
-        
-        with open(file_path, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
+        for source, row in rows:
+            if source == 'Excel':
+                provider_data = self.parse_excel_row(row)
+            else:
                 provider_data = self.parse_csv_row(row)
-                if provider_data:
-                    providers.append(provider_data)
-        
+            if provider_data:
+                providers.append(provider_data)
         return providers
     
+    def read_csv_rows(self, file_path):
+        """Lê o arquivo CSV linha a linha"""
+        with open(file_path, 'r', encoding='utf-8') as file:
+            yield from csv.DictReader(file)
+    
+    def read_excel_rows(self, file_path):
+        """Lê a planilha em modo streaming (read-only), sem carregá-la inteira na memória"""
+        import openpyxl
+        
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if not header:
+                return
+            columns = [self.normalize_column(value) for value in header]
+            for values in rows:
+                if not any(value not in (None, '') for value in values):
+                    continue
+                yield {
+                    column: self.cell_to_str(value)
+                    for column, value in zip(columns, values)
+                    if column
+                }
+        finally:
+            workbook.close()
+    
+    def load_csv_data(self, file_path):
+        """Carrega dados do arquivo CSV"""
+        return self.parse_rows(('CSV', row) for row in self.read_csv_rows(file_path))
+    
     def load_excel_data(self, file_path):
         """Carrega dados do arquivo Excel"""
         providers = []
         
         try:
-            df = pd.read_excel(file_path)
-            for _, row in df.iterrows():
-                provider_data = self.parse_excel_row(row)
-                if provider_data:
-                    providers.append(provider_data)
+            providers = self.parse_rows(('Excel', row) for row in self.read_excel_rows(file_path))
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'Erro ao ler Excel: {str(e)}'))
         
@@ -128,9 +319,34 @@ class Command(BaseCommand):
     
     def parse_excel_row(self, row):
         """Processa uma linha do Excel"""
-        # Como o Excel pode ter estrutura diferente, adaptamos conforme necessário
-        # Por enquanto, retornamos None pois o Excel parece estar corrompido
-        return None
+        # Converte os nomes de colunas da planilha para os usados no CSV
+        mapped = {}
+        for column, value in row.items():
+            key = EXCEL_COLUMN_ALIASES.get(column)
+            if key and key not in mapped:
+                mapped[key] = value
+        
+        provider_data = self.parse_csv_row(mapped)
+        if provider_data:
+            provider_data['source'] = 'Excel'
+        return provider_data
+    
+    def normalize_column(self, value):
+        """Normaliza o cabeçalho de uma coluna (sem acentos, minúsculo, com _)"""
+        if value is None:
+            return ''
+        column = unicodedata.normalize('NFKD', str(value))
+        column = ''.join(c for c in column if not unicodedata.combining(c))
+        return re.sub(r'\W+', '_', column.strip().lower()).strip('_')
+    
+    def cell_to_str(self, value):
+        """Converte o valor de uma célula para texto, como viria do CSV"""
+        if value is None:
+            return ''
+        # Telefones costumam ser lidos como números (ex: 47999998888.0)
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
     
     def clean_phone(self, phone):
         """Limpa e formata número de telefone"""
@@ -170,20 +386,8 @@ class Command(BaseCommand):
     
     def determine_category(self, name):
         """Determina a categoria baseada no nome do prestador"""
-        name_lower = name.lower()
-        
-        if any(word in name_lower for word in ['eletric', 'elétric', 'instalações elétricas']):
-            return 'Eletricista'
-        elif any(word in name_lower for word in ['encanador', 'hidráulica', 'plumber']):
-            return 'Encanador'
-        elif any(word in name_lower for word in ['pintura', 'pintor', 'painter']):
-            return 'Pintor'
-        elif any(word in name_lower for word in ['climatização', 'ar condicionado', 'hvac']):
-            return 'Técnico em Ar Condicionado'
-        elif any(word in name_lower for word in ['reparos', 'marido de aluguel', 'handyman']):
-            return 'Serviços Gerais'
-        else:
-            return 'Outros'
+        category, _ = get_classifier().classify(name)
+        return category
     
     def extract_city(self, address):
         """Extrai cidade do endereço"""
@@ -203,12 +407,14 @@ class Command(BaseCommand):
         return 'Blumenau'  # Default para a região
     
     def create_providers(self, providers_data):
-        """Cria os prestadores no banco de dados"""
+        """Cria os prestadores no banco de dados a partir de um iterável de linhas"""
         created_count = 0
         updated_count = 0
         error_count = 0
+        processed_count = 0
         
         for provider_data in providers_data:
+            processed_count += 1
             try:
                 with transaction.atomic():
                     # Criar ou buscar categoria
@@ -217,8 +423,14 @@ class Command(BaseCommand):
                         defaults={'description': f'Serviços de {provider_data["category"]}'}
                     )
                     
+                    # Prestador já importado (em qualquer modo): mesma chave externa
+                    external_id = self.external_id(provider_data)
+                    existing = ProviderProfile.objects.select_related('user').filter(
+                        external_id=external_id
+                    ).first()
+                    
                     # Gerar email único baseado no nome
-                    email = self.generate_email(provider_data['name'])
+                    email = existing.user.email if existing else self.generate_email(provider_data['name'])
                     
                     # Gerar username único baseado no email
                     username = email.split('@')[0]
@@ -258,9 +470,13 @@ class Command(BaseCommand):
                             'bio': f'Prestador de serviços de {provider_data["category"]} em {provider_data["city"]}',
                             'rating': provider_data['rating'],
                             'total_jobs': provider_data['reviews_count'],
+                            'external_id': external_id,
                             'is_available': True
                         }
                     )
+                    if not profile_created and provider_profile.external_id is None and existing is None:
+                        # Perfis importados antes da chave externa: o --upsert passa a reconhecê-los
+                        provider_profile.external_id = external_id
                     
                     # Adicionar categoria ao perfil
                     provider_profile.service_categories.add(category)
@@ -268,7 +484,11 @@ class Command(BaseCommand):
                     if not profile_created:
                         # Atualizar dados se perfil já existe
                         provider_profile.rating = max(provider_profile.rating, provider_data['rating'])
-                        provider_profile.total_jobs += provider_data['reviews_count']
+                        # O número de avaliações da fonte é um total, não um incremento
+                        provider_profile.total_jobs = max(
+                            provider_profile.total_jobs,
+                            provider_data['reviews_count']
+                        )
                         provider_profile.save()
                         updated_count += 1
                     else:
@@ -294,9 +514,203 @@ class Command(BaseCommand):
                 f'- Criados: {created_count}\n'
                 f'- Atualizados: {updated_count}\n'
                 f'- Erros: {error_count}\n'
-                f'- Total processados: {len(providers_data)}'
+                f'- Total processados: {processed_count}'
             )
         )
+        
+        return processed_count
+    
+    def upsert_providers(self, batches):
+        """
+        Grava os prestadores em modo idempotente, um lote por transação.
+        
+        Cada lote vira poucos comandos SQL (categorias, usuários, perfis e
+        vínculos com categorias) usando INSERT ... ON CONFLICT DO UPDATE, com
+        o identificador externo como chave. Reexecutar a importação com o
+        mesmo arquivo converge para o mesmo resultado.
+        """
+        processed_count = 0
+        error_count = 0
+        unusable_password = make_password(None)
+        
+        backfilled = self.backfill_external_ids()
+        if backfilled:
+            self.stdout.write(f'Identificador externo preenchido em {backfilled} perfis já importados')
+        
+        for batch in batches:
+            # Uma mesma chave não pode aparecer duas vezes no mesmo ON CONFLICT
+            providers = {}
+            for provider_data in batch:
+                providers[self.external_id(provider_data)] = provider_data
+            
+            if not providers:
+                continue
+            
+            try:
+                with transaction.atomic():
+                    self.upsert_batch(providers, unusable_password)
+                processed_count += len(providers)
+                self.stdout.write(self.style.SUCCESS(f'✓ Lote gravado: {len(providers)} prestadores'))
+            except Exception as e:
+                error_count += len(providers)
+                self.stdout.write(self.style.ERROR(f'✗ Erro ao gravar lote: {str(e)}'))
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\nResumo da importação (upsert):\n'
+                f'- Gravados: {processed_count}\n'
+                f'- Erros: {error_count}'
+            )
+        )
+        
+        return processed_count + error_count
+    
+    def backfill_external_ids(self):
+        """
+        Preenche o identificador externo dos perfis importados pelo modo padrão
+        antes da existência do campo, recalculando a chave a partir dos dados
+        gravados no usuário. Sem isso o primeiro --upsert não os reconhece e
+        cria um segundo usuário e perfil para o mesmo prestador.
+        """
+        legacy = ProviderProfile.objects.select_related('user').filter(
+            external_id__isnull=True,
+            user__user_type='provider',
+            # Apenas contas geradas pela importação (generate_email)
+            user__email__endswith='@servicoemcasa.com'
+        ).order_by('id')
+        
+        claimed = {}
+        for profile in legacy:
+            user = profile.user
+            external_id = self.external_id({
+                'name': f'{user.first_name} {user.last_name}',
+                'address': user.address,
+                'phone': user.phone_number,
+            })
+            # Em caso de empate, o perfil mais antigo fica com a chave
+            claimed.setdefault(external_id, profile)
+        
+        if not claimed:
+            return 0
+        
+        taken = set(
+            ProviderProfile.objects.filter(external_id__in=claimed.keys()).values_list('external_id', flat=True)
+        )
+        profiles = []
+        for external_id, profile in claimed.items():
+            if external_id not in taken:
+                profile.external_id = external_id
+                profiles.append(profile)
+        
+        ProviderProfile.objects.bulk_update(profiles, ['external_id'])
+        return len(profiles)
+    
+    def upsert_batch(self, providers, password):
+        """Grava um lote de prestadores indexado pelo identificador externo"""
+        category_ids = self.resolve_categories(
+            {provider_data['category'] for provider_data in providers.values()}
+        )
+        
+        # Prestadores já importados (também pelo modo padrão) mantêm o usuário atual
+        existing_usernames = dict(
+            ProviderProfile.objects.filter(external_id__in=providers.keys()).values_list('external_id', 'user__username')
+        )
+        
+        usernames = {}
+        users = []
+        for external_id, provider_data in providers.items():
+            digest = hashlib.sha1(external_id.encode('utf-8')).hexdigest()
+            username = existing_usernames.get(external_id) or f'prestador_{digest[:16]}'
+            usernames[external_id] = username
+            name_parts = provider_data['name'].split()
+            users.append(User(
+                username=username,
+                email=f'{self.email_local_part(provider_data["name"])}.{digest[:8]}@servicoemcasa.com',
+                password=password,
+                first_name=name_parts[0] if name_parts else '',
+                last_name=' '.join(name_parts[1:]),
+                user_type='provider',
+                phone_number=provider_data['phone'],
+                address=provider_data['address'],
+                city=provider_data['city'],
+                state='SC',  # Assumindo Santa Catarina
+                is_active=True
+            ))
+        
+        User.objects.bulk_create(
+            users,
+            update_conflicts=True,
+            unique_fields=['username'],
+            update_fields=['first_name', 'last_name', 'phone_number', 'address', 'city', 'updated_at']
+        )
+        user_ids = dict(
+            User.objects.filter(username__in=usernames.values()).values_list('username', 'id')
+        )
+        
+        profiles = [
+            ProviderProfile(
+                user_id=user_ids[usernames[external_id]],
+                external_id=external_id,
+                bio=f'Prestador de serviços de {provider_data["category"]} em {provider_data["city"]}',
+                rating=provider_data['rating'],
+                total_jobs=provider_data['reviews_count'],
+                is_available=True
+            )
+            for external_id, provider_data in providers.items()
+        ]
+        ProviderProfile.objects.bulk_create(
+            profiles,
+            update_conflicts=True,
+            unique_fields=['external_id'],
+            update_fields=['bio', 'rating', 'total_jobs', 'updated_at']
+        )
+        profile_ids = dict(
+            ProviderProfile.objects.filter(external_id__in=providers.keys()).values_list('external_id', 'id')
+        )
+        
+        ProfileCategory = ProviderProfile.service_categories.through
+        ProfileCategory.objects.bulk_create(
+            [
+                ProfileCategory(
+                    providerprofile_id=profile_ids[external_id],
+                    servicecategory_id=category_ids[provider_data['category']]
+                )
+                for external_id, provider_data in providers.items()
+            ],
+            ignore_conflicts=True
+        )
+    
+    def resolve_categories(self, names):
+        """Retorna {nome: id} das categorias, criando as que não existem"""
+        cache = getattr(self, '_category_ids', None)
+        if cache is None:
+            cache = self._category_ids = {}
+        
+        missing = names - cache.keys()
+        if missing:
+            ServiceCategory.objects.bulk_create(
+                [ServiceCategory(name=name, description=f'Serviços de {name}') for name in missing],
+                ignore_conflicts=True
+            )
+            cache.update(ServiceCategory.objects.filter(name__in=missing).values_list('name', 'id'))
+        
+        return {name: cache[name] for name in names}
+    
+    def external_id(self, provider_data):
+        """
+        Chave estável do prestador: o telefone normalizado quando existir,
+        senão um hash do nome e endereço normalizados
+        """
+        digits = re.sub(r'\D', '', provider_data['phone'] or '')
+        if len(digits) in (10, 11):
+            digits = '55' + digits
+        if len(digits) >= 12:
+            return f'phone:{digits}'
+        
+        source = '|'.join(
+            self.email_local_part(provider_data[field]) for field in ('name', 'address')
+        )
+        return f'row:{hashlib.sha1(source.encode("utf-8")).hexdigest()}'
     
     def preview_providers(self, providers_data):
         """Mostra preview dos dados que seriam criados"""
@@ -331,12 +745,7 @@ class Command(BaseCommand):
         if not name:
             return f'provider_{User.objects.count() + 1}@servicoemcasa.com'
         
-        # Remove acentos e caracteres especiais
-        import unicodedata
-        name_clean = unicodedata.normalize('NFKD', name)
-        name_clean = ''.join([c for c in name_clean if not unicodedata.combining(c)])
-        name_clean = re.sub(r'[^a-zA-Z0-9\s]', '', name_clean)
-        name_clean = re.sub(r'\s+', '.', name_clean.strip().lower())
+        name_clean = self.email_local_part(name)
         
         base_email = f'{name_clean}@servicoemcasa.com'
         
@@ -347,4 +756,11 @@ class Command(BaseCommand):
             email = f'{name_clean}.{counter}@servicoemcasa.com'
             counter += 1
         
-        return email
\ No newline at end of file
+        return email
+    
+    def email_local_part(self, text):
+        """Remove acentos e caracteres especiais, unindo as palavras com pontos"""
+        text_clean = unicodedata.normalize('NFKD', text or '')
+        text_clean = ''.join([c for c in text_clean if not unicodedata.combining(c)])
+        text_clean = re.sub(r'[^a-zA-Z0-9\s]', '', text_clean)
+        return re.sub(r'\s+', '.', text_clean.strip().lower())
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_alter_user_phone_number'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='providerprofile',
+            name='external_id',
+            field=models.CharField(blank=True, help_text='Chave estável do prestador na fonte de importação (telefone normalizado ou hash da linha)', max_length=64, null=True, unique=True, verbose_name='Identificador Externo'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0001_initial'),
+        ('accounts', '0003_providerprofile_external_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_picture_asset',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='profile_users', to='uploads.imageasset', verbose_name='Imagem da Foto de Perfil'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='profile_picture_variants',
+            field=models.JSONField(blank=True, default=dict, help_text='Payload da imagem enviada (variantes e BlurHash)', verbose_name='Variantes da Foto de Perfil'),
+        ),
+    ]
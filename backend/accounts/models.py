@@ -35,6 +35,22 @@ class User(AbstractUser):
         verbose_name='Foto de Perfil'
     )
     
+    profile_picture_asset = models.ForeignKey(
+        'uploads.ImageAsset',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='profile_users',
+        verbose_name='Imagem da Foto de Perfil'
+    )
+    
+    profile_picture_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Variantes da Foto de Perfil',
+        help_text='Payload da imagem enviada (variantes e BlurHash)'
+    )
+    
     city = models.CharField(
         max_length=100,
         verbose_name='Cidade'
@@ -151,6 +167,15 @@ class ProviderProfile(models.Model):
         verbose_name='Total de Trabalhos Realizados'
     )
     
+    external_id = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        verbose_name='Identificador Externo',
+        help_text='Chave estável do prestador na fonte de importação (telefone normalizado ou hash da linha)'
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
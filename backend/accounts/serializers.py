@@ -2,7 +2,11 @@ from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from django.db import transaction
+from service_platform.serializers import DynamicFieldsMixin
 from .models import User, ServiceCategory, ProviderProfile
+from uploads import images
+from uploads.models import ImageAsset
 import logging
 
 logger = logging.getLogger(__name__)
@@ -105,20 +109,38 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Erro ao criar usuário: {str(e)}")
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer para perfil do usuário"""
+    # Id (SHA-256) de uma imagem enviada em /api/uploads/images/
+    profile_picture_asset = serializers.SlugRelatedField(
+        slug_field='sha256',
+        queryset=ImageAsset.objects.all(),
+        required=False,
+        allow_null=True,
+        write_only=True
+    )
     
     class Meta:
         model = User
         fields = (
             'id', 'username', 'email', 'first_name', 'last_name',
-            'user_type', 'phone_number', 'profile_picture',
-            'city', 'state', 'address', 'date_joined', 'is_active'
+            'user_type', 'phone_number', 'profile_picture', 'profile_picture_asset',
+            'profile_picture_variants', 'city', 'state', 'address', 'date_joined', 'is_active'
         )
-        read_only_fields = ('id', 'username', 'date_joined', 'user_type')
+        read_only_fields = ('id', 'username', 'date_joined', 'user_type', 'profile_picture_variants')
+    
+    def update(self, instance, validated_data):
+        if 'profile_picture_asset' in validated_data:
+            asset = validated_data['profile_picture_asset']
+            # A foto de perfil aponta para o original; as variantes ficam no JSON
+            validated_data['profile_picture'] = asset.original.name if asset else None
+            validated_data['profile_picture_variants'] = images.asset_payload(asset) if asset else {}
+            if asset is not None and asset.status != 'ready':
+                transaction.on_commit(lambda: images.propagate_ready([asset.pk]))
+        return super().update(instance, validated_data)
 
 
-class ServiceCategorySerializer(serializers.ModelSerializer):
+class ServiceCategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer para categorias de serviço"""
     
     class Meta:
@@ -126,11 +148,11 @@ class ServiceCategorySerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'description', 'icon', 'is_active')
 
 
-class ProviderProfileSerializer(serializers.ModelSerializer):
+class ProviderProfileSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer para perfil de prestador de serviço"""
     
     user = UserProfileSerializer(read_only=True)
-    categories = ServiceCategorySerializer(many=True, read_only=True)
+    categories = ServiceCategorySerializer(source='service_categories', many=True, read_only=True)
     category_ids = serializers.ListField(
         child=serializers.IntegerField(),
         write_only=True,
@@ -160,7 +182,7 @@ class ProviderProfileSerializer(serializers.ModelSerializer):
                 id__in=category_ids,
                 is_active=True
             )
-            instance.categories.set(categories)
+            instance.service_categories.set(categories)
         
         instance.save()
         return instance
@@ -0,0 +1,66 @@
+"""
+Invalidação do cache (service_platform.caching) quando usuários, perfis de
+prestador e categorias mudam.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from service_platform.caching import instance_tags, invalidate_on_commit
+
+from .models import ProviderProfile, ServiceCategory, User
+
+
+def provider_tags(profile_id, user_id):
+    # user_info_view inclui o perfil de prestador do usuário
+    return [*instance_tags('provider', profile_id), f'user:{user_id}']
+
+
+@receiver(post_save, sender=User, dispatch_uid='accounts.cache.user_saved')
+@receiver(post_delete, sender=User, dispatch_uid='accounts.cache.user_deleted')
+def invalidate_user(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    # Só a tag do próprio usuário: não há listagens de usuários em cache
+    tags = [f'user:{instance.pk}']
+    if instance.user_type == 'provider':
+        # Listagens de prestadores incluem os dados do usuário
+        profile_id = ProviderProfile.objects.filter(user_id=instance.pk).values_list('pk', flat=True).first()
+        if profile_id is not None:
+            tags += instance_tags('provider', profile_id)
+    invalidate_on_commit(*tags)
+
+
+@receiver(post_save, sender=ProviderProfile, dispatch_uid='accounts.cache.provider_saved')
+@receiver(post_delete, sender=ProviderProfile, dispatch_uid='accounts.cache.provider_deleted')
+def invalidate_provider(sender, instance, **kwargs):
+    invalidate_on_commit(*provider_tags(instance.pk, instance.user_id))
+
+
+@receiver(m2m_changed, sender=ProviderProfile.service_categories.through, dispatch_uid='accounts.cache.provider_categories')
+def invalidate_provider_categories(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_on_commit(*provider_tags(instance.pk, instance.user_id))
+        return
+
+    # Alterado pelo lado da categoria: pk_set são perfis
+    if action == 'pre_clear':
+        # Em post_clear os perfis afetados não são mais informados
+        instance._cleared_profiles = list(instance.providerprofile_set.values_list('pk', 'user_id'))
+        return
+    if action == 'post_clear':
+        profiles = instance.__dict__.pop('_cleared_profiles', [])
+    elif action in ('post_add', 'post_remove'):
+        profiles = ProviderProfile.objects.filter(pk__in=pk_set).values_list('pk', 'user_id')
+    else:
+        return
+    tags = ['provider:*']
+    for profile_id, user_id in profiles:
+        tags += provider_tags(profile_id, user_id)
+    invalidate_on_commit(*tags)
+
+
+@receiver(post_save, sender=ServiceCategory, dispatch_uid='accounts.cache.category_saved')
+@receiver(post_delete, sender=ServiceCategory, dispatch_uid='accounts.cache.category_deleted')
+def invalidate_category(sender, instance, **kwargs):
+    invalidate_on_commit(*instance_tags('category', instance.pk))
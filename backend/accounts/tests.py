@@ -1,3 +1,407 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import AsyncClient, Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from service_platform import caching, throttling
+from service_platform.db_routers import reads_from_replica
+
+from .category_classifier import DEFAULT_CATEGORY_RULES, CategoryClassifier, fold_text, get_classifier
+from .models import ProviderProfile, ServiceCategory, User
+
+REPLICA = 'replica'
+
+
+def create_provider(username, bio=''):
+    user = User.objects.create_user(username=username, password='123456', user_type='provider')
+    return ProviderProfile.objects.create(user=user, bio=bio)
+
+
+@override_settings(REPLICA_DATABASES=[REPLICA], REPLICA_PIN_SECONDS=60)
+class ReplicaRoutingTest(TransactionTestCase):
+    """
+    Primário e réplica em dois arquivos SQLite: a réplica é uma cópia do
+    primário feita no setUp, então o que for gravado depois só existe no
+    primário (como uma réplica atrasada).
+    """
+
+    def setUp(self):
+        if connection.vendor != 'sqlite' or connection.is_in_memory_db():
+            self.skipTest('Requer o banco de teste SQLite em arquivo')
+        cache.clear()
+        self.provider = create_provider('prestador', bio='Bio antiga')
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        self.replica_dir = tempfile.mkdtemp()
+        replica_name = os.path.join(self.replica_dir, 'replica.sqlite3')
+        shutil.copyfile(connection.settings_dict['NAME'], replica_name)
+        connections.settings[REPLICA] = {**connection.settings_dict, 'NAME': replica_name}
+
+    def tearDown(self):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        shutil.rmtree(self.replica_dir)
+
+    def provider_list(self, client):
+        response = client.get('/api/accounts/providers/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_list_reads_from_replica(self):
+        create_provider('novo_prestador')
+
+        data = self.provider_list(Client(HTTP_HOST='localhost'))
+
+        self.assertEqual(data['count'], 1)
+        # Fora das views marcadas as leituras vão ao primário
+        self.assertEqual(ProviderProfile.objects.count(), 2)
+
+    def test_writes_go_to_primary(self):
+        token = reads_from_replica.set(True)
+        try:
+            profile = ProviderProfile.objects.get(pk=self.provider.pk)
+        finally:
+            reads_from_replica.reset(token)
+        self.assertEqual(profile._state.db, REPLICA)
+
+        profile.bio = 'Bio nova'
+        profile.save()
+
+        self.assertEqual(ProviderProfile.objects.using('default').get(pk=profile.pk).bio, 'Bio nova')
+        self.assertEqual(ProviderProfile.objects.using(REPLICA).get(pk=profile.pk).bio, 'Bio antiga')
+
+    def test_reads_after_own_write_stick_to_primary(self):
+        token = RefreshToken.for_user(self.provider.user).access_token
+        client = Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        response = client.patch(
+            '/api/accounts/provider/profile/', {'bio': 'Bio nova'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.provider_list(client)['results'][0]['bio'], 'Bio nova')
+        # Outros usuários continuam lendo da réplica
+        self.assertEqual(self.provider_list(Client(HTTP_HOST='localhost'))['results'][0]['bio'], 'Bio antiga')
+
+
+@override_settings(CACHE_TAGS_ENABLED=True, CACHE_TAGS_STALE_TTL=60, CACHE_TAGS_EARLY_REFRESH_BETA=0)
+class TaggedCacheTest(TestCase):
+    """service_platform.caching: tags, stale-while-revalidate, leases e XFetch"""
+
+    def setUp(self):
+        cache.clear()
+        caching.local_cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def get(self, ttl=300, tags=('provider:1', 'provider:*')):
+        return caching.get_or_set('teste', ('chave',), tags, self.compute, ttl)
+
+    def test_hit_until_a_tag_is_invalidated(self):
+        self.assertEqual(self.get(), 1)
+        self.assertEqual(self.get(), 1)
+
+        caching.invalidate('provider:*')
+
+        self.assertEqual(self.get(), 2)
+        self.assertEqual(self.get(tags=('provider:1', 'provider:*', 'category:*')), 3)
+
+    def test_invalidation_during_compute_discards_result(self):
+        def compute():
+            # Dados lidos antes da invalidação não podem ser servidos depois dela
+            caching.invalidate('provider:1')
+            return self.compute()
+
+        caching.get_or_set('teste', ('chave',), ['provider:1'], compute)
+
+        self.assertEqual(caching.get_or_set('teste', ('chave',), ['provider:1'], self.compute), 2)
+
+    def test_expired_entry_is_recomputed_by_one_caller(self):
+        self.assertEqual(self.get(ttl=0), 1)
+
+        # Expirada, mas dentro de CACHE_TAGS_STALE_TTL: quem recalcula recebe o valor novo
+        self.assertEqual(self.get(ttl=0), 2)
+        self.assertEqual(self.calls, 2)
+
+    def test_refresh_is_left_to_the_lease_owner(self):
+        self.get(ttl=0)
+        token = caching.acquire_lease(caching.make_key('teste', ('chave',)))
+        self.assertIsNotNone(token)
+
+        # Outro processo recalcula: o valor antigo é servido sem esperar
+        self.assertEqual(self.get(ttl=0), 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_miss_waits_for_the_lease_owner(self):
+        key = caching.make_key('teste', ('chave',))
+        tags = sorted(['provider:1', 'provider:*'])
+        versions = caching.tag_versions(tags)
+        token = caching.acquire_lease(key)
+
+        def owner():
+            caching.store('teste', key, versions, lambda: 'do dono do lease', 300)
+            caching.release_lease(key, token)
+
+        timer = threading.Timer(0.2, owner)
+        timer.start()
+        try:
+            self.assertEqual(self.get(tags=tags), 'do dono do lease')
+        finally:
+            timer.join()
+        self.assertEqual(self.calls, 0)
+
+    def test_early_refresh_probability(self):
+        now = 1000.0
+        entry = (('v',), 'valor', now + 1, 10.0)
+        with mock.patch('service_platform.caching.random.random', return_value=0.5):
+            # beta=0: só depois de expirar
+            self.assertFalse(caching.should_refresh(entry, now))
+            self.assertTrue(caching.should_refresh(entry, now + 1))
+            # O cálculo leva 10 s: com beta=1 o recálculo começa antes da expiração
+            with override_settings(CACHE_TAGS_EARLY_REFRESH_BETA=1.0):
+                self.assertTrue(caching.should_refresh(entry, now))
+                self.assertFalse(caching.should_refresh((('v',), 'valor', now + 60, 10.0), now))
+
+    def test_provider_list_invalidated_on_save(self):
+        provider = create_provider('prestador', bio='Bio antiga')
+        client = Client(HTTP_HOST='localhost')
+        self.assertEqual(client.get('/api/accounts/providers/').json()['results'][0]['bio'], 'Bio antiga')
+
+        provider.bio = 'Bio nova'
+        provider.save()
+
+        self.assertEqual(client.get('/api/accounts/providers/').json()['results'][0]['bio'], 'Bio nova')
+
+
+def throttle_rates(**rates):
+    """REST_FRAMEWORK com as taxas informadas (o DRF recarrega api_settings no override_settings)"""
+    return {
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], **rates},
+    }
+
+
+@override_settings(THROTTLE_ENABLED=True, THROTTLE_STORE='service_platform.throttling.LocalBucketStore')
+class TokenBucketThrottleTest(TestCase):
+    """service_platform.throttling: token bucket e o limite 'auth' do login"""
+
+    def setUp(self):
+        throttling.get_store.cache_clear()
+        self.store = throttling.get_store()
+
+    def tearDown(self):
+        throttling.get_store.cache_clear()
+
+    def test_parse_rate(self):
+        self.assertEqual(throttling.parse_rate('120/min'), (120, 2.0))
+        self.assertEqual(throttling.parse_rate('10/s'), (10, 10.0))
+        with self.assertRaises(ImproperlyConfigured):
+            throttling.parse_rate('10 por minuto')
+
+    def test_bucket_allows_burst_then_refills(self):
+        with mock.patch('service_platform.throttling.time.monotonic', return_value=100.0) as monotonic:
+            for _ in range(3):
+                self.assertEqual(self.store.consume('teste', 3, 0.5), (True, 0.0))
+            self.assertEqual(self.store.consume('teste', 3, 0.5), (False, 2.0))
+
+            # 0,5 token/s: depois de 2 s há um token de novo, e nunca mais que a capacidade
+            monotonic.return_value = 102.0
+            self.assertEqual(self.store.consume('teste', 3, 0.5), (True, 0.0))
+            monotonic.return_value = 1000.0
+            allowed = [self.store.consume('teste', 3, 0.5)[0] for _ in range(4)]
+        self.assertEqual(allowed, [True, True, True, False])
+
+    def login(self, **headers):
+        return Client(HTTP_HOST='localhost', **headers).post(
+            '/api/auth/login/', {'username': 'x', 'password': 'y'}, content_type='application/json'
+        )
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(auth='2/min'))
+    def test_login_is_throttled(self):
+        with self.assertLogs('django.request', 'WARNING'):
+            statuses = [self.login().status_code for _ in range(3)]
+            response = self.login()
+
+        self.assertEqual(statuses, [401, 401, 429])
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+    @override_settings(REST_FRAMEWORK={**throttle_rates(auth='2/min'), 'NUM_PROXIES': 0})
+    def test_forwarded_for_does_not_reset_the_bucket(self):
+        with self.assertLogs('django.request', 'WARNING'):
+            statuses = [
+                self.login(HTTP_X_FORWARDED_FOR=f'10.0.0.{index}').status_code for index in range(3)
+            ]
+
+        self.assertEqual(statuses, [401, 401, 429])
+
+    @override_settings(REST_FRAMEWORK={**throttle_rates(auth='2/min'), 'NUM_PROXIES': 1})
+    def test_client_address_behind_one_proxy(self):
+        with self.assertLogs('django.request', 'WARNING'):
+            # O endereço acrescentado pelo proxy (último) identifica o cliente, não o que ele enviou
+            spoofed = [
+                self.login(HTTP_X_FORWARDED_FOR=f'10.0.0.{index}, 192.0.2.1').status_code for index in range(3)
+            ]
+            other_client = self.login(HTTP_X_FORWARDED_FOR='192.0.2.2').status_code
+
+        self.assertEqual(spoofed, [401, 401, 429])
+        self.assertEqual(other_client, 401)
+
+
+class LoadProvidersTest(TestCase):
+    """load_providers: modos padrão e --upsert sobre o mesmo arquivo"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.csv_file = os.path.join(self.directory, 'prestadores.csv')
+        with open(self.csv_file, 'w', encoding='utf-8') as file:
+            file.write('name,address,phone_number,website,reviews_average,reviews_count\n')
+            file.write('João Eletricista,"Rua A, 1 - Blumenau",(47) 99999-0001,,4.5,10\n')
+            file.write('Maria Pinturas,"Rua B, 2 - Gaspar",(47) 99999-0002,,4.8,25\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def load(self, *args):
+        output = StringIO()
+        call_command(
+            'load_providers', '--csv-file', self.csv_file,
+            '--excel-file', os.path.join(self.directory, 'inexistente.xlsx'), *args, stdout=output
+        )
+        return output.getvalue()
+
+    def test_reports_created_providers(self):
+        output = self.load()
+
+        self.assertIn('Total de prestadores encontrados: 2', output)
+        self.assertEqual(ProviderProfile.objects.count(), 2)
+
+    def test_modes_can_be_mixed(self):
+        for args in ((), ('--upsert',), (), ('--upsert',)):
+            self.load(*args)
+
+        self.assertEqual(ProviderProfile.objects.count(), 2)
+        self.assertEqual(User.objects.filter(user_type='provider').count(), 2)
+        self.assertFalse(ProviderProfile.objects.filter(external_id__isnull=True).exists())
+
+    def test_upsert_recognizes_profiles_imported_before_external_id(self):
+        self.load()
+        # Perfis gravados antes da existência do campo
+        ProviderProfile.objects.update(external_id=None)
+        legacy_users = set(User.objects.filter(user_type='provider').values_list('id', flat=True))
+
+        output = self.load('--upsert')
+
+        self.assertIn('Identificador externo preenchido em 2 perfis', output)
+        self.assertEqual(ProviderProfile.objects.count(), 2)
+        self.assertEqual(set(User.objects.filter(user_type='provider').values_list('id', flat=True)), legacy_users)
+        self.assertFalse(ProviderProfile.objects.filter(external_id__isnull=True).exists())
+
+
+class AsyncViewsTest(TestCase):
+    """accounts/async_views.py: mesmas respostas das views síncronas"""
+
+    def setUp(self):
+        cache.clear()
+        self.provider = create_provider('prestador', bio='Eletricista')
+        create_provider('pintor', bio='Pintor')
+        ProviderProfile.objects.filter(pk=self.provider.pk).update(rating=4.5)
+
+    async def get_both(self, path, user=None):
+        headers = {}
+        if user is not None:
+            headers['Authorization'] = f'Bearer {RefreshToken.for_user(user).access_token}'
+        sync_response = await sync_to_async(Client(HTTP_HOST='localhost', headers=headers).get)(
+            f'/api/accounts/{path}'
+        )
+        async_response = await AsyncClient(headers={'Host': 'localhost'}).get(
+            f'/api/async/auth/{path}', headers=headers
+        )
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response.json(), sync_response.json())
+        return async_response
+
+    async def test_user_info(self):
+        data = (await self.get_both('user-info/', user=self.provider.user)).json()
+
+        self.assertEqual(data['user']['username'], 'prestador')
+        self.assertEqual(data['provider_profile']['bio'], 'Eletricista')
+
+    async def test_provider_list(self):
+        data = (await self.get_both('providers/')).json()
+
+        self.assertEqual(data['count'], 2)
+        # Ordenados pela avaliação
+        self.assertEqual([provider['bio'] for provider in data['results']], ['Eletricista', 'Pintor'])
+
+    async def test_user_info_requires_authentication(self):
+        with self.assertLogs('django.request', 'WARNING'):
+            self.assertEqual((await self.get_both('user-info/')).status_code, 401)
+
+
+class CategoryClassifierTest(SimpleTestCase):
+    """accounts.category_classifier: pontuação sobre o texto sem acentos"""
+
+    def setUp(self):
+        self.classifier = CategoryClassifier(DEFAULT_CATEGORY_RULES)
+
+    def test_fold_text(self):
+        self.assertEqual(fold_text('  INSTALAÇÕES Elétricas/Reparos_já! '), 'instalacoes eletricas reparos ja')
+        self.assertEqual(fold_text(None), '')
+
+    def test_accents_and_case_are_folded(self):
+        # A expressão inteira vale uma ocorrência (peso 3), mais 'tomadas' (peso 1)
+        self.assertEqual(self.classifier.scores('INSTALAÇÕES ELÉTRICAS e troca de tomadas'), {'Elétrica': 4})
+        self.assertEqual(self.classifier.classify('Hidráulica: vazamento na torneira'), ('Encanamento', 5))
+        self.assertEqual(self.classifier.classify('Climatização e refrigeração'), ('Climatização', 6))
+
+    def test_prefix_and_whole_word_keywords(self):
+        self.assertEqual(self.classifier.scores('eletricistas'), {'Elétrica': 3})
+        # 'cano' só casa com a palavra inteira
+        self.assertEqual(self.classifier.scores('passeio de canoa'), {})
+        self.assertEqual(self.classifier.scores('cano furado'), {'Encanamento': 1})
+
+    def test_highest_score_wins_and_ties_follow_rule_order(self):
+        self.assertEqual(self.classifier.classify('Pintor, pintura e eletricista'), ('Pintura', 6))
+        self.assertEqual(self.classifier.classify('Pintor e eletricista'), ('Elétrica', 3))
+
+    def test_fallback(self):
+        self.assertEqual(self.classifier.classify('Aulas de violão'), ('Outros', 0))
+        self.assertEqual(CategoryClassifier([]).classify('eletricista'), ('Outros', 0))
+
+    @override_settings(SERVICE_CATEGORY_RULES=[{'category': 'Mudanças', 'keywords': ['mudanca*', 'carreto']}])
+    def test_rules_from_settings(self):
+        get_classifier.cache_clear()
+        self.addCleanup(get_classifier.cache_clear)
+
+        self.assertEqual(get_classifier().classify('Carreto e MUDANÇAS'), ('Mudanças', 2))
+        self.assertEqual(get_classifier().classify('eletricista'), ('Outros', 0))
+
+
+class CategoryIdTest(TestCase):
+    """CategoryClassifier.category_id: apenas categorias ativas"""
+
+    def test_category_id(self):
+        cache.clear()
+        classifier = CategoryClassifier(DEFAULT_CATEGORY_RULES)
+        category = ServiceCategory.objects.create(name='Elétrica')
+        ServiceCategory.objects.create(name='Pintura', is_active=False)
+
+        self.assertEqual(classifier.category_id('Eletricista 24h'), category.id)
+        self.assertIsNone(classifier.category_id('Pintor'))
@@ -5,6 +5,11 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import logout
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from service_platform.caching import cache_response
+from service_platform.db_routers import read_from_replica
+from service_platform.idempotency import idempotent
+from service_platform.serializers import SparseFieldsQuerysetMixin, optimize_queryset
 from .models import User, ServiceCategory, ProviderProfile
 from .serializers import (
     CustomTokenObtainPairSerializer,
@@ -19,6 +24,7 @@ from .serializers import (
 class CustomTokenObtainPairView(TokenObtainPairView):
     """View customizada para login com JWT"""
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_scope = 'auth'
 
 
 class UserRegistrationView(generics.CreateAPIView):
@@ -26,6 +32,7 @@ class UserRegistrationView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserRegistrationSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'auth'
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -52,11 +59,14 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         return self.request.user
 
 
+@method_decorator(cache_response(tags=['category:*'], name='ServiceCategoryListView'), name='get')
+@method_decorator(read_from_replica, name='get')
 class ServiceCategoryListView(generics.ListAPIView):
     """View para listar categorias de serviço ativas"""
     queryset = ServiceCategory.objects.filter(is_active=True)
     serializer_class = ServiceCategorySerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'public'
 
 
 class ProviderProfileView(generics.RetrieveUpdateAPIView):
@@ -79,6 +89,7 @@ class ProviderProfileView(generics.RetrieveUpdateAPIView):
         return provider_profile
 
 
+@method_decorator(idempotent, name='post')
 class ProviderProfileCreateView(generics.CreateAPIView):
     """View para criar perfil de prestador de serviço"""
     serializer_class = ProviderProfileSerializer
@@ -102,16 +113,25 @@ class ProviderProfileCreateView(generics.CreateAPIView):
         serializer.save(user=self.request.user)
 
 
-class ProviderListView(generics.ListAPIView):
+def provider_profile_queryset(serializer=None):
+    """Perfis de prestador com os relacionamentos usados pelo serializer (por padrão, o completo)"""
+    return optimize_queryset(ProviderProfile.objects.all(), serializer or ProviderProfileSerializer())
+
+
+@method_decorator(cache_response(tags=['provider:*', 'category:*'], name='ProviderListView'), name='get')
+@method_decorator(read_from_replica, name='get')
+class ProviderListView(SparseFieldsQuerysetMixin, generics.ListAPIView):
     """View para listar prestadores de serviço disponíveis"""
     serializer_class = ProviderProfileSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'public'
     
     def get_queryset(self):
+        # Os joins seguem os campos pedidos (SparseFieldsQuerysetMixin)
         queryset = ProviderProfile.objects.filter(
             user__is_active=True,
             is_available=True
-        ).select_related('user').prefetch_related('service_categories')
+        )
         
         # Filtrar por categoria se fornecida
         category_id = self.request.query_params.get('category')
@@ -123,9 +143,11 @@ class ProviderListView(generics.ListAPIView):
         if city:
             queryset = queryset.filter(user__city__icontains=city)
         
-        return queryset.distinct()
+        # Ordem estável para a paginação
+        return queryset.distinct().order_by('-rating', 'id')
 
 
+@method_decorator(idempotent, name='post')
 class PasswordChangeView(generics.GenericAPIView):
     """View para mudança de senha"""
     serializer_class = PasswordChangeSerializer
@@ -162,8 +184,17 @@ def logout_view(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
+def user_info_tags(request):
+    tags = [f'user:{request.user.pk}']
+    if request.user.user_type == 'provider':
+        # O perfil de prestador inclui as categorias atendidas
+        tags.append('category:*')
+    return tags
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@cache_response(tags=user_info_tags, per_user=True)
 def user_info_view(request):
     """View para obter informações do usuário logado"""
     serializer = UserProfileSerializer(request.user)
@@ -175,7 +206,7 @@ def user_info_view(request):
     # Adicionar informações do perfil de prestador se aplicável
     if request.user.user_type == 'provider':
         try:
-            provider_profile = ProviderProfile.objects.get(user=request.user)
+            provider_profile = provider_profile_queryset().get(user=request.user)
             provider_serializer = ProviderProfileSerializer(provider_profile)
             response_data['provider_profile'] = provider_serializer.data
         except ProviderProfile.DoesNotExist:
@@ -184,8 +215,11 @@ def user_info_view(request):
     return Response(response_data, status=status.HTTP_200_OK)
 
 
+@method_decorator(cache_response(tags=['category:*'], name='ServiceCategoryListView'), name='get')
+@method_decorator(read_from_replica, name='get')
 class ServiceCategoryListView(generics.ListAPIView):
     """View para listar categorias de serviço"""
     queryset = ServiceCategory.objects.filter(is_active=True)
     serializer_class = ServiceCategorySerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'public'
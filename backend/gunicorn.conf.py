@@ -0,0 +1,26 @@
+"""
+Configuração do gunicorn.
+
+SERVER_MODE=wsgi (padrão) usa workers síncronos com a aplicação WSGI;
+SERVER_MODE=asgi usa workers do uvicorn com a aplicação ASGI, necessária
+para as views assíncronas (/api/async/...) não bloquearem o worker e para o
+stream de notificações (/api/notifications/stream/, 501 sob WSGI).
+"""
+import multiprocessing
+import os
+
+server_mode = os.environ.get('SERVER_MODE', 'wsgi').lower()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+accesslog = os.environ.get('GUNICORN_ACCESSLOG') or None
+
+if server_mode == 'asgi':
+    wsgi_app = 'service_platform.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'service_platform.wsgi:application'
+    worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+    threads = int(os.environ.get('GUNICORN_THREADS', 1))
@@ -0,0 +1 @@
+"""Harness de carga assíncrono para as jornadas da API (python -m loadtest)"""
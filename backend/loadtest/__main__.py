@@ -0,0 +1,122 @@
+"""
+Gerador de carga para a API.
+
+Exemplo (com o servidor rodando localmente via gunicorn ou ASGI):
+
+    python -m loadtest --base-url http://127.0.0.1:8000 \\
+        --scenario client_journey:3 --scenario marketplace:1 \\
+        --users 50 --duration 60 --json resultado.json
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+from .client import RequestFailed
+from .scenarios import SCENARIOS, VirtualUser
+from .stats import Stats
+
+
+class Runner:
+    """Executa os usuários virtuais em paralelo até o fim da duração ou das iterações"""
+
+    def __init__(self, options):
+        self.base_url = options.base_url
+        self.users = options.users
+        self.duration = options.duration
+        self.iterations = options.iterations
+        self.ramp_up = options.ramp_up
+        self.think_time = options.think_time
+        self.polls = options.polls
+        self.write_ratio = options.write_ratio
+        self.timeout = options.timeout
+        self.seed = options.seed
+        self.run_id = options.run_id or f'{int(time.time()) % 1000000}'
+        self.stats = Stats()
+        self.shared = {}
+
+        self.scenarios = []
+        self.weights = []
+        for spec in options.scenario or ['client_journey']:
+            name, _, weight = spec.partition(':')
+            if name not in SCENARIOS:
+                raise SystemExit(f'Cenário desconhecido: {name} (disponíveis: {", ".join(SCENARIOS)})')
+            self.scenarios.append(name)
+            self.weights.append(float(weight or 1))
+
+    def rng_for(self, number):
+        return random.Random(f'{self.seed}-{number}')
+
+    async def run_user(self, number, deadline):
+        vu = VirtualUser(self, number)
+        if self.ramp_up:
+            await asyncio.sleep(self.ramp_up * number / self.users)
+        try:
+            while time.perf_counter() < deadline:
+                if self.iterations and vu.iteration >= self.iterations:
+                    break
+                name = vu.rng.choices(self.scenarios, weights=self.weights)[0]
+                try:
+                    await SCENARIOS[name](vu)
+                    self.stats.record_scenario(name, ok=True)
+                except RequestFailed:
+                    self.stats.record_scenario(name, ok=False)
+                finally:
+                    await vu.close()
+                vu.iteration += 1
+        finally:
+            await vu.close()
+
+    async def run(self):
+        deadline = time.perf_counter() + (self.duration if self.duration else float('inf'))
+        await asyncio.gather(*(self.run_user(number, deadline) for number in range(self.users)))
+        self.stats.finish()
+        return self.stats
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m loadtest', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='URL base do servidor')
+    parser.add_argument(
+        '--scenario',
+        action='append',
+        help=f'Cenário e peso opcional (nome[:peso]), pode repetir. Disponíveis: {", ".join(SCENARIOS)}'
+    )
+    parser.add_argument('--users', type=int, default=10, help='Usuários virtuais simultâneos')
+    parser.add_argument('--duration', type=float, default=30, help='Duração em segundos (0 = sem limite)')
+    parser.add_argument('--iterations', type=int, default=0, help='Iterações por usuário (0 = sem limite)')
+    parser.add_argument('--ramp-up', type=float, default=0, help='Segundos para iniciar todos os usuários')
+    parser.add_argument('--think-time', type=float, default=0, help='Pausa média entre passos (segundos)')
+    parser.add_argument('--polls', type=int, default=3, help='Consultas de notificações por jornada')
+    parser.add_argument(
+        '--write-ratio',
+        type=float,
+        default=0.2,
+        help='Fração de escritas no cenário request_mix (0 a 1)'
+    )
+    parser.add_argument('--timeout', type=float, default=30, help='Timeout por requisição (segundos)')
+    parser.add_argument('--seed', type=int, default=1, help='Semente para tornar as jornadas reproduzíveis')
+    parser.add_argument('--run-id', default=None, help='Identificador usado nos usernames gerados')
+    parser.add_argument('--json', default=None, help='Arquivo para salvar o resumo em JSON')
+    options = parser.parse_args(argv)
+    if not options.duration and not options.iterations:
+        parser.error('Informe --duration ou --iterations.')
+    return options
+
+
+def main(argv=None):
+    options = parse_args(argv if argv is not None else sys.argv[1:])
+    runner = Runner(options)
+    print(
+        f'Executando {", ".join(runner.scenarios)} com {runner.users} usuários contra {runner.base_url}...'
+    )
+    stats = asyncio.run(runner.run())
+    print(stats.report())
+    if options.json:
+        stats.dump(options.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""
+Cliente HTTP/1.1 assíncrono mínimo (asyncio puro, com keep-alive), usado
+pelos cenários de carga. Cada usuário virtual mantém a sua própria conexão.
+"""
+import asyncio
+import json
+import ssl
+import time
+from urllib.parse import urlencode, urlsplit
+
+
+class RequestFailed(Exception):
+    """Resposta inesperada ou erro de rede durante um passo do cenário"""
+
+    def __init__(self, label, status=None, reason=''):
+        self.label = label
+        self.status = status
+        super().__init__(f'{label}: {status or reason}')
+
+
+class Response:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body.decode('utf-8')) if self.body else None
+
+
+class HttpClient:
+    """Conexão persistente com o servidor, registrando cada requisição nas estatísticas"""
+
+    def __init__(self, base_url, stats, timeout=30.0):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.prefix = parts.path.rstrip('/')
+        self.host_header = parts.netloc
+        self.stats = stats
+        self.timeout = timeout
+        self.token = None
+        self.headers = {}
+        self.reader = None
+        self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self.reader = self.writer = None
+
+    async def get(self, path, **kwargs):
+        return await self.request('GET', path, **kwargs)
+
+    async def post(self, path, **kwargs):
+        return await self.request('POST', path, **kwargs)
+
+    async def patch(self, path, **kwargs):
+        return await self.request('PATCH', path, **kwargs)
+
+    async def request(self, method, path, name=None, json_body=None, params=None,
+                      expected=(200, 201, 204)):
+        """
+        Executa uma requisição e registra a latência sob o rótulo
+        "MÉTODO rota" (a rota pode ser o modelo, ex: /api/requests/{id}/).
+        """
+        label = f'{method} {name or path}'
+        target = self.prefix + path
+        if params:
+            target += '?' + urlencode(params)
+        body = json.dumps(json_body).encode('utf-8') if json_body is not None else b''
+
+        start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(self._send(method, target, body), self.timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as exc:
+            await self.close()
+            self.stats.record(label, time.perf_counter() - start, error=type(exc).__name__)
+            raise RequestFailed(label, reason=type(exc).__name__) from exc
+
+        elapsed = time.perf_counter() - start
+        if response.status not in expected:
+            self.stats.record(label, elapsed, status=response.status, error=f'HTTP {response.status}')
+            raise RequestFailed(label, status=response.status)
+
+        self.stats.record(label, elapsed, status=response.status)
+        return response
+
+    async def _send(self, method, target, body):
+        # Uma conexão keep-alive pode ter sido fechada pelo servidor; tenta de novo uma vez
+        reused = self.writer is not None
+        try:
+            return await self._exchange(method, target, body)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            await self.close()
+            if not reused:
+                raise
+            return await self._exchange(method, target, body)
+
+    async def _exchange(self, method, target, body):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port, ssl=self.ssl
+            )
+
+        headers = {
+            'Host': self.host_header,
+            'Accept': 'application/json',
+            'Connection': 'keep-alive',
+            'Content-Length': str(len(body)),
+            **self.headers,
+        }
+        if body:
+            headers['Content-Type'] = 'application/json'
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+
+        head = f'{method} {target} HTTP/1.1\r\n' + ''.join(
+            f'{key}: {value}\r\n' for key, value in headers.items()
+        ) + '\r\n'
+        self.writer.write(head.encode('latin-1') + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readuntil(b'\r\n')
+        if not status_line.strip():
+            raise ConnectionResetError('Conexão encerrada pelo servidor')
+        status = int(status_line.split()[1])
+
+        response_headers = {}
+        while True:
+            line = await self.reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            response_headers[key.strip().lower()] = value.strip()
+
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                if size == 0:
+                    await self.reader.readuntil(b'\r\n')
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readexactly(2)
+            data = b''.join(chunks)
+        elif 'content-length' in response_headers:
+            data = await self.reader.readexactly(int(response_headers['content-length']))
+        elif method == 'HEAD' or status in (204, 304):
+            data = b''
+        else:
+            data = await self.reader.read()
+            await self.close()
+
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+
+        return Response(status, response_headers, data)
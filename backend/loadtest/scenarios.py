@@ -0,0 +1,255 @@
+"""
+Cenários com as jornadas reais da API (rotas de accounts/urls.py e
+services/urls.py). Cada cenário recebe um VirtualUser e executa uma
+iteração completa da jornada.
+"""
+import asyncio
+
+from .client import HttpClient, RequestFailed
+
+PASSWORD = 'Carga#Teste2024'
+
+SCENARIOS = {}
+
+
+def scenario(func):
+    SCENARIOS[func.__name__] = func
+    return func
+
+
+def items(payload):
+    """Extrai a lista de itens das respostas paginadas (inclusive as aninhadas)"""
+    while isinstance(payload, dict):
+        for key in ('results', 'notifications'):
+            if key in payload:
+                payload = payload[key]
+                break
+        else:
+            return []
+    return payload or []
+
+
+class VirtualUser:
+    """Estado de um usuário virtual: conexão própria, gerador aleatório e contexto do run"""
+
+    def __init__(self, runner, number):
+        self.runner = runner
+        self.number = number
+        self.rng = runner.rng_for(number)
+        self.iteration = 0
+        self.clients = []
+
+    def new_client(self):
+        client = HttpClient(self.runner.base_url, self.runner.stats, timeout=self.runner.timeout)
+        self.clients.append(client)
+        return client
+
+    async def close(self):
+        for client in self.clients:
+            await client.close()
+        self.clients = []
+
+    async def think(self):
+        if self.runner.think_time:
+            await asyncio.sleep(self.rng.uniform(0.5, 1.5) * self.runner.think_time)
+
+    def username(self, kind):
+        return f'lt{self.runner.run_id}_{kind}{self.number}_{self.iteration}'
+
+    async def categories(self, client):
+        if self.runner.shared.get('categories') is None:
+            response = await client.get('/api/categories/')
+            self.runner.shared['categories'] = [item['id'] for item in items(response.json())]
+        if not self.runner.shared['categories']:
+            raise RequestFailed('GET /api/categories/', reason='nenhuma categoria cadastrada')
+        return self.runner.shared['categories']
+
+    async def register_and_login(self, client, user_type, categories=None):
+        username = self.username(user_type[0])
+        payload = {
+            'username': username,
+            'email': f'{username}@loadtest.local',
+            'password': PASSWORD,
+            'password_confirm': PASSWORD,
+            'first_name': 'Carga',
+            'last_name': f'VU{self.number}',
+            'user_type': user_type,
+            'phone_number': f'(47) 9{self.rng.randint(1000, 9999)}-{self.rng.randint(1000, 9999)}',
+            'city': 'Blumenau',
+            'state': 'SC',
+        }
+        if categories:
+            payload['service_categories'] = categories
+        await client.post('/api/auth/register/', json_body=payload)
+
+        response = await client.post(
+            '/api/auth/login/',
+            json_body={'username': username, 'password': PASSWORD}
+        )
+        client.token = response.json()['access']
+
+    async def create_request(self, client, category_id):
+        response = await client.post('/api/requests/', json_body={
+            'category': category_id,
+            'title': f'Teste de carga {self.number}-{self.iteration}',
+            'description': 'Solicitação criada pelo harness de carga.',
+            'address': 'Rua XV de Novembro, 100',
+            'city': 'Blumenau',
+            'state': 'SC',
+            'budget_min': '100.00',
+            'budget_max': '300.00',
+            'priority': self.rng.choice(['low', 'medium', 'high']),
+        })
+        return response.json()['id']
+
+    async def poll_notifications(self, client, times):
+        for _ in range(times):
+            await client.get('/api/notifications/')
+            await self.think()
+
+
+@scenario
+async def client_journey(vu):
+    """Cliente: registro → login → cria solicitação → acompanha notificações"""
+    client = vu.new_client()
+    categories = await vu.categories(client)
+    await vu.register_and_login(client, 'client')
+    await vu.think()
+    await vu.create_request(client, vu.rng.choice(categories))
+    await vu.think()
+    await vu.poll_notifications(client, vu.runner.polls)
+
+
+@scenario
+async def provider_journey(vu):
+    """
+    Prestador: registro → login → navega nas solicitações → envia proposta →
+    acompanha as propostas e conclui as que os clientes já aceitaram
+    """
+    client = vu.new_client()
+    categories = await vu.categories(client)
+    await vu.register_and_login(client, 'provider', categories=[vu.rng.choice(categories)])
+    await vu.think()
+
+    response = await client.get('/api/requests/', params={'status': 'pending'})
+    open_requests = items(response.json())
+    if not open_requests:
+        return
+    service_request = vu.rng.choice(open_requests)
+    await vu.think()
+
+    # Cada solicitação recebe uma única proposta: outro usuário virtual pode ter chegado antes (400)
+    await client.post('/api/assignments/', json_body={
+        'service_request': service_request['id'],
+        'proposed_price': '200.00',
+        'estimated_duration': '02:00:00',
+        'notes': 'Proposta enviada pelo harness de carga.',
+    }, expected=(201, 400))
+    await vu.think()
+
+    # A conclusão exige a proposta aceita pelo cliente (cenário marketplace)
+    response = await client.get('/api/assignments/', params={'status': 'assigned'})
+    for assignment in items(response.json()):
+        if assignment['service_request']['status'] == 'accepted':
+            await client.post(
+                f'/api/assignments/{assignment["id"]}/complete/',
+                name='/api/assignments/{id}/complete/'
+            )
+            break
+
+
+@scenario
+async def marketplace(vu):
+    """Ciclo completo: cliente cria, prestador propõe, cliente aceita, prestador conclui"""
+    client = vu.new_client()
+    provider = vu.new_client()
+    categories = await vu.categories(client)
+    category_id = vu.rng.choice(categories)
+
+    await vu.register_and_login(client, 'client')
+    await vu.register_and_login(provider, 'provider', categories=[category_id])
+    request_id = await vu.create_request(client, category_id)
+    await vu.think()
+
+    await provider.get('/api/requests/', params={'status': 'pending', 'category': category_id})
+    await provider.post('/api/assignments/', json_body={
+        'service_request': request_id,
+        'proposed_price': '250.00',
+        'estimated_duration': '03:00:00',
+    })
+    await vu.think()
+
+    response = await client.get('/api/assignments/', params={'service_request': request_id})
+    assignments = items(response.json())
+    if not assignments:
+        raise RequestFailed('GET /api/assignments/', reason='proposta não encontrada')
+    assignment_id = assignments[0]['id']
+    await client.post(
+        f'/api/assignments/{assignment_id}/accept/',
+        name='/api/assignments/{id}/accept/'
+    )
+    await vu.poll_notifications(provider, 1)
+
+    await provider.post(
+        f'/api/assignments/{assignment_id}/complete/',
+        name='/api/assignments/{id}/complete/'
+    )
+    await vu.poll_notifications(client, vu.runner.polls)
+
+
+@scenario
+async def request_mix(vu):
+    """
+    Leituras e escritas concorrentes em /api/requests/ (ServiceRequestListCreateView),
+    na proporção de --write-ratio. Cada usuário virtual registra um cliente na primeira
+    iteração e reaproveita o token.
+    """
+    client = vu.new_client()
+    if getattr(vu, 'mix_token', None) is None:
+        await vu.categories(client)
+        await vu.register_and_login(client, 'client')
+        vu.mix_token = client.token
+    client.token = vu.mix_token
+
+    if vu.rng.random() < vu.runner.write_ratio:
+        await vu.create_request(client, vu.rng.choice(vu.runner.shared['categories']))
+    else:
+        await client.get('/api/requests/')
+
+
+async def read_path(vu, prefix):
+    """
+    Endpoints de leitura das variantes síncrona (/api) e assíncrona (/api/async).
+    Cada usuário virtual registra um prestador na primeira iteração e reaproveita o token.
+    """
+    client = vu.new_client()
+    if getattr(vu, 'read_token', None) is None:
+        categories = await vu.categories(client)
+        await vu.register_and_login(client, 'provider', categories=[vu.rng.choice(categories)])
+        vu.read_token = client.token
+    client.token = vu.read_token
+
+    await client.get(f'{prefix}/notifications/')
+    await vu.think()
+    await client.get(f'{prefix}/auth/user-info/')
+    await vu.think()
+    response = await client.get(f'{prefix}/auth/providers/')
+    providers = items(response.json())
+    if providers:
+        await vu.think()
+        await client.get(
+            f'{prefix}/reviews/provider/{vu.rng.choice(providers)["id"]}/',
+            name=f'{prefix}/reviews/provider/{{id}}/'
+        )
+
+
+@scenario
+async def sync_reads(vu):
+    """Leituras pelas views síncronas do DRF"""
+    await read_path(vu, '/api')
+
+
+@scenario
+async def async_reads(vu):
+    """Leituras pelas views assíncronas (ASGI), para comparar com sync_reads"""
+    await read_path(vu, '/api/async')
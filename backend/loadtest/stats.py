@@ -0,0 +1,102 @@
+"""Agregação das medições por endpoint e geração do relatório"""
+import json
+import math
+import time
+from collections import Counter, defaultdict
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(sorted_values, percent):
+    """Percentil pelo método nearest-rank sobre uma lista ordenada"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(percent / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+class Stats:
+    """Latências, status e erros por rótulo de endpoint"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(Counter)
+        self.statuses = defaultdict(Counter)
+        self.scenarios = Counter()
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+
+    def record(self, label, elapsed, status=None, error=None):
+        self.latencies[label].append(elapsed)
+        if status is not None:
+            self.statuses[label][status] += 1
+        if error is not None:
+            self.errors[label][error] += 1
+
+    def record_scenario(self, name, ok):
+        self.scenarios[(name, 'ok' if ok else 'failed')] += 1
+
+    def finish(self):
+        self.finished_at = time.perf_counter()
+
+    @property
+    def duration(self):
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    def summary(self):
+        """Resumo por endpoint: vazão, taxa de erro e percentis de latência (ms)"""
+        duration = max(self.duration, 1e-9)
+        endpoints = {}
+        for label in sorted(self.latencies):
+            values = sorted(self.latencies[label])
+            errors = sum(self.errors[label].values())
+            endpoints[label] = {
+                'requests': len(values),
+                'errors': errors,
+                'error_rate': errors / len(values),
+                'throughput': len(values) / duration,
+                'mean_ms': sum(values) / len(values) * 1000,
+                **{f'p{p}_ms': percentile(values, p) * 1000 for p in PERCENTILES},
+                'max_ms': values[-1] * 1000,
+                'statuses': {str(status): count for status, count in self.statuses[label].items()},
+                'error_kinds': dict(self.errors[label]),
+            }
+
+        total = sum(item['requests'] for item in endpoints.values())
+        total_errors = sum(item['errors'] for item in endpoints.values())
+        return {
+            'duration_s': duration,
+            'requests': total,
+            'errors': total_errors,
+            'error_rate': total_errors / total if total else 0.0,
+            'throughput': total / duration,
+            'scenarios': {f'{name}:{result}': count for (name, result), count in self.scenarios.items()},
+            'endpoints': endpoints,
+        }
+
+    def report(self):
+        """Tabela em texto com o resumo da execução"""
+        summary = self.summary()
+        header = f'{"endpoint":<48} {"reqs":>7} {"err%":>6} {"req/s":>8} ' + ' '.join(
+            f'{f"p{p}":>8}' for p in PERCENTILES
+        ) + f' {"max":>8}'
+        lines = [header, '-' * len(header)]
+        for label, item in summary['endpoints'].items():
+            lines.append(
+                f'{label[:48]:<48} {item["requests"]:>7} {item["error_rate"] * 100:>5.1f}% '
+                f'{item["throughput"]:>8.1f} '
+                + ' '.join(f'{item[f"p{p}_ms"]:>8.1f}' for p in PERCENTILES)
+                + f' {item["max_ms"]:>8.1f}'
+            )
+        lines.append('-' * len(header))
+        lines.append(
+            f'Total: {summary["requests"]} requisições em {summary["duration_s"]:.1f}s '
+            f'({summary["throughput"]:.1f} req/s), erros: {summary["error_rate"] * 100:.2f}%'
+        )
+        for key, count in sorted(summary['scenarios'].items()):
+            lines.append(f'Cenário {key}: {count}')
+        return '\n'.join(lines)
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.summary(), file, indent=2, ensure_ascii=False)
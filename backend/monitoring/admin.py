@@ -0,0 +1,15 @@
+from django.contrib import admin
+from .models import SlowQuery
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    """Admin para queries lentas"""
+
+    list_display = ('fingerprint', 'view_name', 'count', 'total_time', 'max_time', 'last_seen')
+    list_filter = ('database', 'view_name')
+    search_fields = ('normalized_sql', 'view_name')
+    readonly_fields = (
+        'fingerprint', 'normalized_sql', 'example_sql', 'example_params', 'database', 'view_name',
+        'stack', 'explain', 'count', 'total_time', 'max_time', 'first_seen', 'last_seen'
+    )
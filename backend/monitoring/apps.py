@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import middleware, slow_queries
+        from . import signals  # noqa: F401
+
+        connection_created.connect(middleware.install, dispatch_uid='monitoring.middleware')
+        connection_created.connect(slow_queries.install, dispatch_uid='monitoring.slow_queries')
@@ -0,0 +1,95 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.utils import load_backend
+
+from loadtest.stats import PERCENTILES, percentile
+from service_platform.database import POOL_ENGINE
+
+MODES = ('connect', 'persistent', 'pool')
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede o custo de conexão por requisição: conexão nova a cada requisição (CONN_MAX_AGE=0), '
+        'conexão persistente com health check e pool de conexões (apenas PostgreSQL)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Alias do banco medido')
+        parser.add_argument('--iterations', type=int, default=500, help='Requisições simuladas por modo')
+        parser.add_argument('--warmup', type=int, default=20, help='Requisições descartadas antes da medição')
+        parser.add_argument(
+            '--query',
+            default='SELECT 1',
+            help='Query executada em cada requisição (ex: a de user-info)'
+        )
+        parser.add_argument(
+            '--mode',
+            action='append',
+            choices=MODES,
+            help='Modo medido (pode repetir); padrão: todos os disponíveis'
+        )
+
+    def handle(self, *args, **options):
+        if options['database'] not in connections:
+            raise CommandError(f'Banco desconhecido: {options["database"]}')
+        base_settings = connections[options['database']].settings_dict
+        vendor = connections[options['database']].vendor
+        modes = options['mode'] or [
+            mode for mode in MODES if mode != 'pool' or vendor == 'postgresql'
+        ]
+        if 'pool' in modes and vendor != 'postgresql':
+            raise CommandError('O modo pool exige PostgreSQL')
+
+        self.stdout.write(
+            f'{vendor} · {base_settings.get("HOST") or base_settings["NAME"]} · '
+            f'{options["iterations"]} requisições por modo · {options["query"]}'
+        )
+        results = {}
+        for mode in modes:
+            wrapper = self.wrapper(mode, base_settings, options['database'])
+            try:
+                for _ in range(options['warmup']):
+                    self.request(wrapper, options['query'])
+                results[mode] = sorted(
+                    self.request(wrapper, options['query']) for _ in range(options['iterations'])
+                )
+            finally:
+                wrapper.close()
+                if mode == 'pool':
+                    from service_platform.db_backends.postgresql_pool.base import close_pools
+                    close_pools(wrapper.alias)
+
+        baseline = results.get('connect')
+        header = f'{"modo":<12}{"média":>10}' + ''.join(f'{f"p{p}":>10}' for p in PERCENTILES)
+        self.stdout.write(self.style.MIGRATE_HEADING(header + ('  economia' if baseline else '')))
+        for mode, latencies in results.items():
+            mean = sum(latencies) / len(latencies)
+            line = f'{mode:<12}{mean:>8.2f}ms' + ''.join(
+                f'{percentile(latencies, p):>8.2f}ms' for p in PERCENTILES
+            )
+            if baseline and mode != 'connect':
+                line += f'  {mean - sum(baseline) / len(baseline):+.2f}ms/req'
+            self.stdout.write(line)
+
+    def wrapper(self, mode, base_settings, alias):
+        """Conexão própria do benchmark, com a configuração do modo"""
+        settings_dict = {**base_settings, 'CONN_MAX_AGE': 0}
+        if mode == 'persistent':
+            settings_dict.update(CONN_MAX_AGE=600, CONN_HEALTH_CHECKS=True)
+        elif mode == 'pool':
+            settings_dict.update(ENGINE=POOL_ENGINE, POOL=base_settings.get('POOL', {}))
+        backend = load_backend(settings_dict['ENGINE'])
+        return backend.DatabaseWrapper(settings_dict, f'benchmark_{mode}')
+
+    def request(self, wrapper, query):
+        """Ciclo de conexão de uma requisição, como nos sinais request_started/finished"""
+        started = time.perf_counter()
+        wrapper.close_if_unusable_or_obsolete()
+        with wrapper.cursor() as cursor:
+            cursor.execute(query)
+            cursor.fetchall()
+        wrapper.close_if_unusable_or_obsolete()
+        return (time.perf_counter() - started) * 1000
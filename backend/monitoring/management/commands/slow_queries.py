@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand
+from django.db.models import ExpressionWrapper, F, FloatField
+
+from monitoring.models import SlowQuery
+
+ORDERINGS = {
+    'total': '-total_time',
+    'max': '-max_time',
+    'count': '-count',
+    'mean': '-mean',
+}
+
+
+class Command(BaseCommand):
+    help = 'Lista as queries lentas registradas (maiores ofensores primeiro)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=10,
+            help='Quantidade de queries exibidas'
+        )
+        parser.add_argument(
+            '--order',
+            choices=sorted(ORDERINGS),
+            default='total',
+            help='Ordenação: tempo total, máximo, médio ou número de ocorrências'
+        )
+        parser.add_argument(
+            '--view',
+            help='Filtra pela view de origem (ex: services:service_request_list)'
+        )
+        parser.add_argument(
+            '--explain',
+            action='store_true',
+            help='Exibe o plano de execução e a origem de cada query'
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Apaga os registros (após exibi-los)'
+        )
+
+    def handle(self, *args, **options):
+        queryset = SlowQuery.objects.annotate(
+            mean=ExpressionWrapper(F('total_time') / F('count'), output_field=FloatField())
+        )
+        if options['view']:
+            queryset = queryset.filter(view_name=options['view'])
+        slow_queries = list(queryset.order_by(ORDERINGS[options['order']])[:options['limit']])
+
+        if not slow_queries:
+            self.stdout.write('Nenhuma query lenta registrada.')
+        for position, slow_query in enumerate(slow_queries, 1):
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'#{position} {slow_query.fingerprint[:12]} · {slow_query.count}x · '
+                f'total {slow_query.total_time:.0f}ms · média {slow_query.mean_time:.0f}ms · '
+                f'máx {slow_query.max_time:.0f}ms · {slow_query.view_name or "-"}'
+            ))
+            self.stdout.write(f'  {slow_query.normalized_sql}')
+            if options['explain']:
+                if slow_query.stack:
+                    self.stdout.write('  Origem:')
+                    self.stdout.write(slow_query.stack.rstrip())
+                if slow_query.explain:
+                    self.stdout.write('  EXPLAIN:')
+                    for line in slow_query.explain.splitlines():
+                        self.stdout.write(f'    {line}')
+            self.stdout.write('')
+
+        if options['reset']:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f'{deleted} registros apagados.'))
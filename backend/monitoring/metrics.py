@@ -0,0 +1,369 @@
+"""
+Métricas da aplicação em formato Prometheus.
+
+Cada processo (workers do gunicorn, celery) acumula contadores e histogramas
+em memória e os grava periodicamente em um arquivo JSON próprio em
+METRICS_DIR. O endpoint /internal/metrics soma os arquivos de todos os
+processos, de modo que o resultado independe do worker que atende a coleta.
+
+Os arquivos levam o host, o pid e o instante de início do processo, então
+um pid reaproveitado (worker reiniciado pelo gunicorn) não sobrescreve os
+valores do anterior. Os arquivos de processos encerrados são somados em
+metrics_dead.json e removidos (na coleta e quando um processo grava pela
+primeira vez): os contadores nunca diminuem e o diretório não cresce. Só
+os pids do próprio host podem ser verificados, então cada host compacta
+apenas os seus arquivos; assim METRICS_DIR pode ser um volume compartilhado
+entre containers (web e celery), e a coleta no web inclui as métricas do
+celery. Apague-o no deploy para zerar os valores.
+"""
+import atexit
+import bisect
+import fcntl
+import glob
+import json
+import logging
+import os
+import re
+import socket
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Valores somados dos processos encerrados
+DEAD_FILE = 'metrics_dead.json'
+PROCESS_FILE_RE = re.compile(
+    r'^metrics_(?:(?P<host>[A-Za-z0-9.-]+)_)?(?P<pid>\d+)(?:-(?P<started>\d+))?\.json$'
+)
+
+# Limites (segundos) dos buckets de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+METRICS = {
+    'http_requests_total': (
+        'counter', 'Requisições HTTP por view, método e status', ('view', 'method', 'status'), None
+    ),
+    'http_request_duration_seconds': (
+        'histogram', 'Latência das requisições HTTP', ('view', 'method'), LATENCY_BUCKETS
+    ),
+    'http_request_db_duration_seconds': (
+        'histogram', 'Tempo gasto no banco de dados por requisição', ('view',), LATENCY_BUCKETS
+    ),
+    'http_request_db_queries': (
+        'histogram', 'Queries executadas por requisição', ('view',), QUERY_COUNT_BUCKETS
+    ),
+    'http_response_size_bytes_total': (
+        'counter', 'Bytes enviados nas respostas', ('view',), None
+    ),
+    'cache_requests_total': (
+        'counter', 'Consultas ao cache por resultado (hit/miss)', ('cache', 'result'), None
+    ),
+    'notifications_created_total': (
+        'counter', 'Notificações internas criadas por tipo', ('type',), None
+    ),
+    'notifications_sent_total': (
+        'counter', 'Notificações enviadas por canal e resultado', ('channel', 'result'), None
+    ),
+    'throttled_requests_total': (
+        'counter', 'Requisições recusadas pelo throttling por escopo', ('scope',), None
+    ),
+}
+
+
+class Registry:
+    """Valores das métricas do processo atual"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        # Container: o hostname é o id do container
+        self.host = re.sub(r'[^A-Za-z0-9.-]', '-', socket.gethostname()) or 'local'
+        self.pid = os.getpid()
+        self.started = time.time_ns()
+        self.counters = {}
+        self.histograms = {}
+        # A primeira medição é gravada imediatamente, para o processo já aparecer na coleta
+        self.last_flush = float('-inf')
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][3]
+        key = (name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            # Contagem por bucket não acumulada; o acúmulo é feito na exportação
+            histogram[0][bisect.bisect_left(buckets, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [
+                    [name, list(labels), list(counts), total, count]
+                    for (name, labels), (counts, total, count) in self.histograms.items()
+                ],
+            }
+
+
+registry = Registry()
+
+
+def metrics_dir():
+    return getattr(settings, 'METRICS_DIR', None)
+
+
+def is_enabled():
+    return getattr(settings, 'METRICS_ENABLED', True)
+
+
+def process_path(directory):
+    return os.path.join(directory, f'metrics_{registry.host}_{registry.pid}-{registry.started}.json')
+
+
+def write_snapshot(path, snapshot):
+    """Grava o arquivo com substituição atômica"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(snapshot, file)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def flush(force=False):
+    """Grava os valores do processo no seu arquivo (substituição atômica)"""
+    directory = metrics_dir()
+    if not directory or not (registry.counters or registry.histograms):
+        return
+    now = time.monotonic()
+    if not force and now - registry.last_flush < getattr(settings, 'METRICS_FLUSH_INTERVAL', 5):
+        return
+    first_flush = registry.last_flush == float('-inf')
+    registry.last_flush = now
+
+    path = process_path(directory)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        write_snapshot(path, registry.snapshot())
+    except OSError as e:
+        logger.error(f'Erro ao gravar métricas em {path}: {str(e)}')
+    if first_flush:
+        # Processos que nunca coletam (celery) também compactam os arquivos do seu host
+        try:
+            compact_dead_files(directory)
+        except OSError as e:
+            logger.warning(f'Erro ao compactar as métricas de processos encerrados: {str(e)}')
+
+
+def _after_fork():
+    # O processo filho (worker) começa do zero e grava no seu próprio arquivo
+    registry.lock = threading.Lock()
+    registry.reset()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+atexit.register(lambda: flush(force=True))
+
+
+def inc(name, labels=(), amount=1):
+    if is_enabled():
+        registry.inc(name, tuple(labels), amount)
+        flush()
+
+
+def observe(name, labels, value):
+    if is_enabled():
+        registry.observe(name, tuple(labels), value)
+        flush()
+
+
+def record_request(timings):
+    """Registra as medições de uma requisição (monitoring.middleware.RequestTimings)"""
+    if not is_enabled():
+        return
+    view = timings.view_name or '<unresolved>'
+    registry.inc('http_requests_total', (view, timings.method, str(timings.status)))
+    registry.observe('http_request_duration_seconds', (view, timings.method), timings.total)
+    registry.observe('http_request_db_duration_seconds', (view,), timings.db_time)
+    registry.observe('http_request_db_queries', (view,), timings.db_queries)
+    if timings.response_bytes:
+        registry.inc('http_response_size_bytes_total', (view,), timings.response_bytes)
+    flush()
+
+
+def observe_cache(cache_name, hit):
+    """Registra uma consulta ao cache (hit ou miss)"""
+    inc('cache_requests_total', (cache_name, 'hit' if hit else 'miss'))
+
+
+def observe_notification_sent(channel, success):
+    """Registra o envio de uma notificação externa (ex: WhatsApp)"""
+    inc('notifications_sent_total', (channel, 'success' if success else 'failure'))
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def dead_process_files(directory):
+    """
+    Arquivos de processos encerrados deste host (para um mesmo pid, só o mais
+    recente pode estar vivo); os de outros hosts ficam para eles
+    """
+    latest = {}
+    files = []
+    for path in glob.glob(os.path.join(directory, 'metrics_*.json')):
+        match = PROCESS_FILE_RE.match(os.path.basename(path))
+        # Sem host: arquivo gravado antes de os nomes levarem o host, tratado como local
+        if match is None or match['host'] not in (None, registry.host):
+            continue
+        pid, started = int(match['pid']), int(match['started'] or 0)
+        files.append((path, pid, started))
+        latest[pid] = max(latest.get(pid, -1), started)
+
+    own_path = process_path(directory)
+    return [
+        path for path, pid, started in files
+        if path != own_path and (started < latest[pid] or not pid_alive(pid))
+    ]
+
+
+def compact_dead_files(directory):
+    """Soma os arquivos de processos encerrados em DEAD_FILE e os remove"""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, 'metrics.lock'), 'w') as lock:
+        # Duas coletas simultâneas não podem somar o mesmo arquivo duas vezes
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        paths = dead_process_files(directory)
+        if not paths:
+            return
+        dead_path = os.path.join(directory, DEAD_FILE)
+        snapshots = [read_snapshot(dead_path)] if os.path.exists(dead_path) else []
+        for path in paths:
+            try:
+                snapshots.append(read_snapshot(path))
+            except (OSError, ValueError) as e:
+                logger.warning(f'Arquivo de métricas ignorado ({path}): {str(e)}')
+        write_snapshot(dead_path, to_snapshot(*merge_snapshots(snapshots)))
+        for path in paths:
+            os.remove(path)
+
+
+def merge_snapshots(snapshots):
+    counters = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot.get('counters', []):
+            if name not in METRICS:
+                continue
+            key = (name, tuple(labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, counts, total, count in snapshot.get('histograms', []):
+            if name not in METRICS or len(counts) != len(METRICS[name][3]) + 1:
+                continue
+            key = (name, tuple(labels))
+            merged = histograms.setdefault(key, [[0] * len(counts), 0.0, 0])
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+            merged[2] += count
+    return counters, histograms
+
+
+def to_snapshot(counters, histograms):
+    return {
+        'counters': [[name, list(labels), value] for (name, labels), value in counters.items()],
+        'histograms': [
+            [name, list(labels), counts, total, count]
+            for (name, labels), (counts, total, count) in histograms.items()
+        ],
+    }
+
+
+def collect():
+    """Soma os valores gravados por todos os processos (mais o estado atual deste)"""
+    snapshots = []
+
+    directory = metrics_dir()
+    if directory:
+        try:
+            compact_dead_files(directory)
+        except OSError as e:
+            logger.warning(f'Erro ao compactar as métricas de processos encerrados: {str(e)}')
+
+        own_path = process_path(directory)
+        for path in sorted(glob.glob(os.path.join(directory, 'metrics_*.json'))):
+            if path == own_path:
+                continue
+            try:
+                snapshots.append(read_snapshot(path))
+            except (OSError, ValueError) as e:
+                logger.warning(f'Arquivo de métricas ignorado ({path}): {str(e)}')
+    snapshots.append(registry.snapshot())
+    return merge_snapshots(snapshots)
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names, values, extra=None):
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def format_number(value):
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render_prometheus():
+    """Exposição no formato texto do Prometheus (versão 0.0.4)"""
+    counters, histograms = collect()
+    lines = []
+    for name, (kind, help_text, label_names, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{format_labels(label_names, labels)} {format_number(value)}')
+            continue
+
+        for (metric, labels), (counts, total, count) in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                le = format_labels(label_names, labels, f'le="{format_number(float(bound))}"')
+                lines.append(f'{name}_bucket{le} {cumulative}')
+            inf = format_labels(label_names, labels, 'le="+Inf"')
+            lines.append(f'{name}_bucket{inf} {count}')
+            lines.append(f'{name}_sum{format_labels(label_names, labels)} {format_number(total)}')
+            lines.append(f'{name}_count{format_labels(label_names, labels)} {count}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,197 @@
+import cProfile
+import logging
+import os
+import random
+import re
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import metrics, slow_queries
+
+logger = logging.getLogger(__name__)
+
+# Medições da requisição em andamento; o contexto é copiado para as threads
+# do sync_to_async, então as queries do ORM assíncrono também são contadas
+current_timings = ContextVar('current_timings', default=None)
+
+
+class RequestTimings:
+    """Medições de uma requisição: view, tempo total, banco de dados e serialização"""
+
+    def __init__(self):
+        self.view_name = ''
+        self.method = ''
+        self.status = 0
+        self.total = 0.0
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.response_bytes = 0
+        self.started = None
+        self._render_started = None
+
+    def start_render(self, response):
+        self._render_started = time.perf_counter()
+        response.add_post_render_callback(self.finish_render)
+
+    def finish_render(self, response):
+        if self._render_started is not None:
+            self.render_time += time.perf_counter() - self._render_started
+            self._render_started = None
+
+    @property
+    def app_time(self):
+        return max(self.total - self.db_time - self.render_time, 0.0)
+
+    def server_timing(self):
+        """Valor do cabeçalho Server-Timing (durações em milissegundos)"""
+        return ', '.join([
+            f'app;dur={self.app_time * 1000:.2f};desc="{self.view_name or "-"}"',
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.db_queries} queries"',
+            f'render;dur={self.render_time * 1000:.2f};desc="serialização"',
+            f'total;dur={self.total * 1000:.2f}',
+        ])
+
+
+def db_timing_wrapper(execute, sql, params, many, context):
+    """Execute wrapper que cronometra as queries da requisição em andamento"""
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_time += time.perf_counter() - start
+        timings.db_queries += 1
+
+
+def install(sender, connection, **kwargs):
+    """Receiver do connection_created: instala o wrapper na nova conexão"""
+    if db_timing_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, db_timing_wrapper)
+
+
+class PerformanceMiddleware:
+    """
+    Registra, para cada requisição, a view, o tempo total, o número e o tempo
+    das queries, o tempo de serialização da resposta e o tamanho em bytes.
+
+    As medições são expostas no cabeçalho Server-Timing (PERFORMANCE_SERVER_TIMING)
+    e registradas em log. Uma amostra das requisições (PERFORMANCE_PROFILE_SAMPLE_RATE),
+    ou as que enviarem o cabeçalho X-Profile com o PERFORMANCE_PROFILE_TOKEN,
+    são perfiladas com cProfile e salvas em PERFORMANCE_PROFILE_DIR.
+
+    Funciona em WSGI e em ASGI; no modo assíncrono o perfil cobre apenas a
+    thread do event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.server_timing = getattr(settings, 'PERFORMANCE_SERVER_TIMING', False)
+        self.sample_rate = getattr(settings, 'PERFORMANCE_PROFILE_SAMPLE_RATE', 0.0)
+        self.profile_token = getattr(settings, 'PERFORMANCE_PROFILE_TOKEN', '')
+        self.profile_dir = getattr(settings, 'PERFORMANCE_PROFILE_DIR', None)
+        self.slow_request_ms = getattr(settings, 'PERFORMANCE_SLOW_REQUEST_MS', 500)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        timings, profiler, tokens = self.begin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.end(timings, profiler, tokens)
+        slow_queries.flush_pending()
+        return self.complete(request, response, timings, profiler)
+
+    async def __acall__(self, request):
+        timings, profiler, tokens = self.begin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.end(timings, profiler, tokens)
+        # As queries do ORM assíncrono rodam em outra thread, fora de transações,
+        # e as queries lentas são gravadas lá mesmo (slow_queries.flush_pending)
+        return self.complete(request, response, timings, profiler)
+
+    def begin(self, request):
+        timings = RequestTimings()
+        request.performance = timings
+        profiler = cProfile.Profile() if self.should_profile(request) else None
+        tokens = (current_timings.set(timings), slow_queries.current_request.set(request))
+        if profiler is not None:
+            profiler.enable()
+        timings.started = time.perf_counter()
+        return timings, profiler, tokens
+
+    def end(self, timings, profiler, tokens):
+        timings.total = time.perf_counter() - timings.started
+        if profiler is not None:
+            profiler.disable()
+        current_timings.reset(tokens[0])
+        slow_queries.current_request.reset(tokens[1])
+
+    def complete(self, request, response, timings, profiler):
+        self.finalize(request, response, timings)
+        metrics.record_request(timings)
+        if profiler is not None:
+            profile_name = self.save_profile(profiler, timings)
+            if profile_name:
+                response['X-Profile-Id'] = profile_name
+        return response
+
+    def process_template_response(self, request, response):
+        # Respostas do DRF são renderizadas (serializadas) depois da view
+        timings = getattr(request, 'performance', None)
+        if timings is not None:
+            timings.start_render(response)
+        return response
+
+    def should_profile(self, request):
+        if self.profile_token and request.headers.get('X-Profile') == self.profile_token:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def finalize(self, request, response, timings):
+        match = getattr(request, 'resolver_match', None)
+        timings.view_name = match.view_name if match else ''
+        timings.method = request.method
+        timings.status = response.status_code
+        if not response.streaming:
+            timings.response_bytes = len(response.content)
+
+        if self.server_timing:
+            response['Server-Timing'] = timings.server_timing()
+
+        level = logging.INFO if timings.total * 1000 >= self.slow_request_ms else logging.DEBUG
+        logger.log(
+            level,
+            '%s %s view=%s status=%s total=%.1fms db=%.1fms queries=%d render=%.1fms bytes=%d',
+            request.method, request.path, timings.view_name or '-', timings.status,
+            timings.total * 1000, timings.db_time * 1000, timings.db_queries,
+            timings.render_time * 1000, timings.response_bytes
+        )
+
+    def save_profile(self, profiler, timings):
+        """Salva o perfil em disco para análise offline (ex: snakeviz, pstats)"""
+        if not self.profile_dir:
+            return None
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            view = re.sub(r'[^\w.-]+', '_', timings.view_name or 'unresolved')
+            name = f'{time.strftime("%Y%m%d-%H%M%S")}_{view}_{os.getpid()}_{random.randrange(16 ** 6):06x}.prof'
+            profiler.dump_stats(os.path.join(self.profile_dir, name))
+            return name
+        except OSError as e:
+            logger.error(f'Erro ao salvar perfil da requisição: {str(e)}')
+            return None
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(help_text='SHA-1 do SQL normalizado', max_length=40, unique=True, verbose_name='Impressão Digital')),
+                ('normalized_sql', models.TextField(verbose_name='SQL Normalizado')),
+                ('example_sql', models.TextField(verbose_name='SQL de Exemplo')),
+                ('example_params', models.TextField(blank=True, verbose_name='Parâmetros de Exemplo')),
+                ('database', models.CharField(default='default', max_length=100, verbose_name='Banco de Dados')),
+                ('view_name', models.CharField(blank=True, max_length=200, verbose_name='View de Origem')),
+                ('stack', models.TextField(blank=True, verbose_name='Pilha de Chamadas')),
+                ('explain', models.TextField(blank=True, verbose_name='Plano de Execução (EXPLAIN)')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Ocorrências')),
+                ('total_time', models.FloatField(default=0, verbose_name='Tempo Total (ms)')),
+                ('max_time', models.FloatField(default=0, verbose_name='Tempo Máximo (ms)')),
+                ('first_seen', models.DateTimeField(auto_now_add=True, verbose_name='Primeira Ocorrência')),
+                ('last_seen', models.DateTimeField(auto_now=True, verbose_name='Última Ocorrência')),
+            ],
+            options={
+                'verbose_name': 'Query Lenta',
+                'verbose_name_plural': 'Queries Lentas',
+                'ordering': ['-total_time'],
+            },
+        ),
+    ]
@@ -0,0 +1,84 @@
+from django.db import models
+
+
+class SlowQuery(models.Model):
+    """Formato (SQL normalizado) de query lenta, com estatísticas e plano de execução"""
+
+    fingerprint = models.CharField(
+        max_length=40,
+        unique=True,
+        verbose_name='Impressão Digital',
+        help_text='SHA-1 do SQL normalizado'
+    )
+
+    normalized_sql = models.TextField(
+        verbose_name='SQL Normalizado'
+    )
+
+    example_sql = models.TextField(
+        verbose_name='SQL de Exemplo'
+    )
+
+    example_params = models.TextField(
+        blank=True,
+        verbose_name='Parâmetros de Exemplo'
+    )
+
+    database = models.CharField(
+        max_length=100,
+        default='default',
+        verbose_name='Banco de Dados'
+    )
+
+    view_name = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name='View de Origem'
+    )
+
+    stack = models.TextField(
+        blank=True,
+        verbose_name='Pilha de Chamadas'
+    )
+
+    explain = models.TextField(
+        blank=True,
+        verbose_name='Plano de Execução (EXPLAIN)'
+    )
+
+    count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Ocorrências'
+    )
+
+    total_time = models.FloatField(
+        default=0,
+        verbose_name='Tempo Total (ms)'
+    )
+
+    max_time = models.FloatField(
+        default=0,
+        verbose_name='Tempo Máximo (ms)'
+    )
+
+    first_seen = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Primeira Ocorrência'
+    )
+
+    last_seen = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Última Ocorrência'
+    )
+
+    class Meta:
+        verbose_name = 'Query Lenta'
+        verbose_name_plural = 'Queries Lentas'
+        ordering = ['-total_time']
+
+    def __str__(self):
+        return f"{self.fingerprint[:10]} ({self.count}x, {self.max_time:.0f}ms)"
+
+    @property
+    def mean_time(self):
+        return self.total_time / self.count if self.count else 0.0
@@ -0,0 +1,208 @@
+"""
+Registro de queries lentas.
+
+Um execute wrapper instalado em toda conexão (signal connection_created)
+mede cada query; as que passam de SLOW_QUERY_THRESHOLD_MS são registradas
+em log com SQL, parâmetros, view de origem e pilha de chamadas, e agregadas
+no modelo SlowQuery pelo formato normalizado da query. Na primeira
+ocorrência de cada formato o EXPLAIN é executado e guardado.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Requisição em andamento, definida pelo PerformanceMiddleware
+current_request = ContextVar('current_request', default=None)
+
+# Evita medir (e registrar) as queries do próprio registro
+_state = threading.local()
+
+# Ocorrências em transações abertas aguardam o fim da requisição para serem gravadas
+MAX_PENDING = 100
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN\s*\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)', re.IGNORECASE)
+_VALUES_RE = re.compile(r'\bVALUES\s*(\((?:[^()]|\([^()]*\))*\))(?:\s*,\s*\((?:[^()]|\([^()]*\))*\))+', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+
+_PROJECT_DIR = str(settings.BASE_DIR)
+_SKIP_DIRS = ('site-packages', 'dist-packages', os.sep + 'monitoring' + os.sep, 'manage.py')
+
+
+def threshold_ms():
+    return getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 200)
+
+
+def normalize_sql(sql):
+    """Formato da query: literais, números e listas IN/VALUES substituídos"""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    sql = _VALUES_RE.sub(r'VALUES \1, ...', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode('utf-8')).hexdigest()
+
+
+def capture_stack(limit=6):
+    """Últimos frames do código do projeto que originaram a query"""
+    frames = [
+        frame for frame in traceback.extract_stack()[:-3]
+        if frame.filename.startswith(_PROJECT_DIR)
+        and not any(part in frame.filename for part in _SKIP_DIRS)
+    ]
+    return ''.join(traceback.format_list(frames[-limit:]))
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    """Execute wrapper que detecta queries acima do limite"""
+    if getattr(_state, 'active', False):
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms >= threshold_ms():
+            connection = context['connection']
+            handle_slow_query(connection, sql, params, many, elapsed_ms)
+
+
+def current_view_name():
+    match = getattr(current_request.get(), 'resolver_match', None)
+    return match.view_name if match else ''
+
+
+def handle_slow_query(connection, sql, params, many, elapsed_ms):
+    view_name = current_view_name()
+    stack = capture_stack()
+    logger.warning(
+        'Query lenta (%.1fms) view=%s db=%s\nSQL: %s\nParâmetros: %r\nOrigem:\n%s',
+        elapsed_ms, view_name or '-', connection.alias, sql,
+        params if not many else '<executemany>', stack or '  (fora do código do projeto)'
+    )
+
+    occurrence = {
+        'alias': connection.alias,
+        'sql': sql,
+        'params': None if many else params,
+        'elapsed_ms': elapsed_ms,
+        'view_name': view_name,
+        'stack': stack,
+    }
+    pending = _pending()
+    if len(pending) < MAX_PENDING:
+        pending.append(occurrence)
+    # Gravar dentro de uma transação do chamador poderia desfazê-la em caso de erro
+    if not connection.in_atomic_block:
+        flush_pending()
+
+
+def _pending():
+    if not hasattr(_state, 'pending'):
+        _state.pending = []
+    return _state.pending
+
+
+def flush_pending():
+    """Grava as ocorrências acumuladas nesta thread (fora de transações)"""
+    pending = _pending()
+    if not pending or getattr(_state, 'active', False):
+        return
+    remaining = []
+    _state.active = True
+    try:
+        for occurrence in pending:
+            connection = connections[occurrence['alias']]
+            if connection.in_atomic_block:
+                remaining.append(occurrence)
+                continue
+            try:
+                record(occurrence)
+            except DatabaseError as e:
+                logger.error(f'Erro ao registrar query lenta: {str(e)}')
+    finally:
+        _state.active = False
+        _state.pending = remaining
+
+
+def record(occurrence):
+    from .models import SlowQuery
+
+    normalized = normalize_sql(occurrence['sql'])
+    key = fingerprint(normalized)
+    elapsed_ms = occurrence['elapsed_ms']
+
+    slow_query, created = SlowQuery.objects.get_or_create(
+        fingerprint=key,
+        defaults={
+            'normalized_sql': normalized,
+            'example_sql': occurrence['sql'],
+            'example_params': repr(occurrence['params'])[:2000] if occurrence['params'] is not None else '',
+            'database': occurrence['alias'],
+            'view_name': occurrence['view_name'],
+            'stack': occurrence['stack'],
+            'count': 1,
+            'total_time': elapsed_ms,
+            'max_time': elapsed_ms,
+        }
+    )
+    if created:
+        plan = explain(occurrence)
+        if plan:
+            SlowQuery.objects.filter(pk=slow_query.pk).update(explain=plan)
+        return
+
+    SlowQuery.objects.filter(pk=slow_query.pk).update(
+        count=F('count') + 1,
+        total_time=F('total_time') + elapsed_ms,
+        max_time=Greatest('max_time', elapsed_ms),
+        last_seen=timezone.now(),
+    )
+
+
+def explain(occurrence):
+    """Executa o EXPLAIN (ANALYZE opcional, apenas em SELECTs) da query original"""
+    sql = occurrence['sql']
+    if occurrence['params'] is None or not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return ''
+
+    connection = connections[occurrence['alias']]
+    options = {}
+    if getattr(settings, 'SLOW_QUERY_EXPLAIN_ANALYZE', False) and connection.vendor == 'postgresql':
+        options = {'analyze': True, 'buffers': True}
+    try:
+        prefix = connection.ops.explain_query_prefix(**options)
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', occurrence['params'])
+            rows = cursor.fetchall()
+    except (DatabaseError, ValueError) as e:
+        logger.warning(f'Não foi possível executar EXPLAIN: {str(e)}')
+        return ''
+    return '\n'.join(' | '.join(str(column) for column in row) for row in rows)
+
+
+def install(sender, connection, **kwargs):
+    """Receiver do connection_created: instala o wrapper na nova conexão"""
+    if getattr(settings, 'SLOW_QUERY_ENABLED', True) and slow_query_wrapper not in connection.execute_wrappers:
+        # No início da lista: connection.execute_wrapper() remove o último item ao sair,
+        # e a conexão pode ser aberta dentro de um desses blocos (PerformanceMiddleware)
+        connection.execute_wrappers.insert(0, slow_query_wrapper)
@@ -0,0 +1,104 @@
+import bisect
+import os
+import shutil
+import subprocess
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from . import metrics
+
+REQUESTS = ('http_requests_total', ('lista', 'GET', '200'))
+
+
+def snapshot(requests, latencies=()):
+    counts = [0] * (len(metrics.LATENCY_BUCKETS) + 1)
+    for latency in latencies:
+        counts[bisect.bisect_left(metrics.LATENCY_BUCKETS, latency)] += 1
+    return {
+        'counters': [[REQUESTS[0], list(REQUESTS[1]), requests]],
+        'histograms': [
+            ['http_request_duration_seconds', ['lista', 'GET'], counts, sum(latencies), len(latencies)]
+        ] if latencies else [],
+    }
+
+
+def finished_pid():
+    process = subprocess.Popen(['true'])
+    process.wait()
+    return process.pid
+
+
+class MetricsMergeTest(SimpleTestCase):
+    """monitoring.metrics: soma dos arquivos por processo, entre processos e hosts"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings_override = override_settings(METRICS_DIR=self.directory, METRICS_ENABLED=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # Registro novo: sem os valores medidos pelos outros testes neste processo
+        registry_patch = mock.patch.object(metrics, 'registry', metrics.Registry())
+        self.registry = registry_patch.start()
+        self.addCleanup(registry_patch.stop)
+
+    def write(self, name, data):
+        metrics.write_snapshot(os.path.join(self.directory, name), data)
+
+    def files(self):
+        return sorted(os.listdir(self.directory))
+
+    def test_merge_snapshots(self):
+        counters, histograms = metrics.merge_snapshots([
+            snapshot(2, latencies=[0.003, 0.2]),
+            snapshot(3, latencies=[0.2]),
+            # Métrica desconhecida e histograma com outros buckets são ignorados
+            {'counters': [['removida_total', [], 5]],
+             'histograms': [['http_request_duration_seconds', ['lista', 'GET'], [1, 2], 0.1, 3]]},
+        ])
+
+        self.assertEqual(counters, {REQUESTS: 5})
+        counts, total, count = histograms[('http_request_duration_seconds', ('lista', 'GET'))]
+        self.assertEqual(count, 3)
+        self.assertAlmostEqual(total, 0.403)
+        self.assertEqual(counts[0], 1)
+        self.assertEqual(counts[metrics.LATENCY_BUCKETS.index(0.25)], 2)
+
+    def test_collect_sums_processes_and_folds_dead_local_files(self):
+        host = self.registry.host
+        dead_pid = finished_pid()
+        self.write(f'metrics_{host}_{dead_pid}-1.json', snapshot(2))
+        # Mesmo pid deste processo, mas de um processo anterior (pid reaproveitado)
+        self.write(f'metrics_{host}_{os.getpid()}-1.json', snapshot(3))
+        # Outro container no volume compartilhado: os pids dele não são verificados aqui
+        self.write(f'metrics_celery-worker_{dead_pid}-1.json', snapshot(4))
+        self.registry.inc(*REQUESTS, 1)
+        metrics.write_snapshot(metrics.process_path(self.directory), self.registry.snapshot())
+
+        counters, _ = metrics.collect()
+
+        self.assertEqual(counters[REQUESTS], 10)
+        self.assertEqual(
+            self.files(),
+            sorted([
+                metrics.DEAD_FILE, 'metrics.lock', f'metrics_celery-worker_{dead_pid}-1.json',
+                os.path.basename(metrics.process_path(self.directory)),
+            ])
+        )
+        # Os arquivos compactados não são somados duas vezes
+        self.assertEqual(metrics.collect()[0][REQUESTS], 10)
+        self.assertIn(
+            'http_requests_total{view="lista",method="GET",status="200"} 10', metrics.render_prometheus()
+        )
+
+    def test_first_flush_folds_dead_files(self):
+        dead_path = f'metrics_{self.registry.host}_{finished_pid()}-1.json'
+        self.write(dead_path, snapshot(2))
+
+        metrics.inc(*REQUESTS)
+
+        self.assertNotIn(dead_path, self.files())
+        self.assertIn(metrics.DEAD_FILE, self.files())
+        self.assertEqual(metrics.collect()[0][REQUESTS], 3)
@@ -0,0 +1,39 @@
+import hmac
+import logging
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def client_ip(request):
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    if forwarded and getattr(settings, 'METRICS_TRUST_X_FORWARDED_FOR', False):
+        return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def is_authorized(request):
+    """Acesso por token (Authorization: Bearer) ou por IP permitido"""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        scheme, _, value = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() == 'bearer' and hmac.compare_digest(value.strip(), token):
+            return True
+    return client_ip(request) in getattr(settings, 'METRICS_ALLOWED_IPS', [])
+
+
+@require_GET
+def prometheus_metrics(request):
+    """View para exportar as métricas no formato do Prometheus"""
+    if not is_authorized(request):
+        logger.warning(f'Acesso negado às métricas para {client_ip(request)}')
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics.render_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -24,6 +24,9 @@ def create_service_categories():
         {'name': 'Cuidador', 'description': 'Cuidados com idosos e crianças'},
         {'name': 'Pet Care', 'description': 'Cuidados com animais de estimação'},
         {'name': 'Tecnologia', 'description': 'Suporte técnico e reparos em equipamentos'},
+        {'name': 'Climatização', 'description': 'Instalação e manutenção de ar condicionado'},
+        {'name': 'Serviços Gerais', 'description': 'Pequenos reparos e manutenção em geral'},
+        {'name': 'Outros', 'description': 'Serviços que não se encaixam nas demais categorias'},
     ]
     
     for cat_data in categories:
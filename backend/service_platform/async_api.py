@@ -0,0 +1,209 @@
+"""
+Base para as views assíncronas (ASGI) de leitura.
+
+O DRF 3.14 não executa views assíncronas, então as variantes em
+accounts/async_views.py e services/async_views.py usam este módulo para
+reproduzir o comportamento do DRF (autenticação JWT, permissões, paginação,
+tratamento de erros e renderização JSON) acessando o banco apenas pela
+interface assíncrona do ORM. Filtros e serializers são os mesmos das views
+síncronas, de modo que as respostas são idênticas.
+"""
+import functools
+import math
+import time
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework.views import exception_handler
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .authentication import StreamToken
+
+jwt_authentication = JWTAuthentication()
+renderer = JSONRenderer()
+
+
+def is_asgi(request):
+    """Se a requisição chegou pela aplicação ASGI (aceita também o Request do DRF)"""
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+async def authenticate(request, token_param=None):
+    """
+    Equivalente assíncrono de JWTAuthentication.authenticate (None sem credenciais).
+    Com token_param, aceita também na query string um StreamToken (ex: EventSource,
+    que não envia cabeçalhos); o JWT de acesso só no cabeçalho.
+    """
+    header = jwt_authentication.get_header(request)
+    if header is not None:
+        raw_token = jwt_authentication.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = jwt_authentication.get_validated_token(raw_token)
+    elif token_param and request.GET.get(token_param):
+        try:
+            validated_token = StreamToken(request.GET[token_param])
+        except TokenError as e:
+            raise InvalidToken(str(e))
+    else:
+        return None
+
+    try:
+        user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken(_('Token contained no recognizable user identification'))
+
+    user_model = jwt_authentication.user_model
+    try:
+        user = await user_model.objects.aget(**{jwt_settings.USER_ID_FIELD: user_id})
+    except user_model.DoesNotExist:
+        raise AuthenticationFailed(_('User not found'), code='user_not_found')
+    if not user.is_active:
+        raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+    return user
+
+
+def render(request, data, status=200, headers=None):
+    """Renderiza a resposta em JSON, como o JSONRenderer do DRF"""
+    start = time.perf_counter()
+    content = renderer.render(data)
+    timings = getattr(request, 'performance', None)
+    if timings is not None:
+        timings.render_time += time.perf_counter() - start
+
+    response = HttpResponse(content, status=status, content_type='application/json')
+    response['Vary'] = 'Accept'
+    for key, value in (headers or {}).items():
+        response[key] = value
+    return response
+
+
+def handle_exception(request, exc):
+    """Mesma resposta de APIView.handle_exception para as exceções do DRF"""
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        exc.auth_header = jwt_authentication.authenticate_header(request)
+    response = exception_handler(exc, {'request': request, 'view': None})
+    if response is None:
+        raise exc
+    headers = {key: response[key] for key in ('WWW-Authenticate', 'Retry-After') if response.has_header(key)}
+    return render(request, response.data, status=response.status_code, headers=headers)
+
+
+def check_throttles(request, throttle_scope=None):
+    """Aplica as DEFAULT_THROTTLE_CLASSES como APIView.check_throttles"""
+    view = SimpleNamespace(throttle_scope=throttle_scope)
+    waits = []
+    for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+        throttle = throttle_class()
+        if not throttle.allow_request(request, view):
+            waits.append(throttle.wait())
+    if waits:
+        raise exceptions.Throttled(max((wait for wait in waits if wait is not None), default=None))
+
+
+def api_view(allow_anonymous=False, token_param=None, throttle_scope=None):
+    """
+    Decorator das views assíncronas: aceita apenas GET, autentica pelo JWT e
+    exige usuário autenticado (exceto com allow_anonymous, como o AllowAny).
+    Aplica o mesmo throttling das views síncronas (throttle_scope opcional).
+    A view recebe um rest_framework.request.Request com o usuário definido.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                if request.method not in ('GET', 'HEAD'):
+                    raise exceptions.MethodNotAllowed(request.method)
+                # Com token inválido o DRF responde 401 mesmo em views AllowAny
+                user = await authenticate(request, token_param)
+                if user is None and not allow_anonymous:
+                    raise exceptions.NotAuthenticated()
+
+                drf_request = Request(request, authenticators=())
+                drf_request.user = user or AnonymousUser()
+                # O store de throttling pode ser remoto (Redis): fora do event loop
+                await sync_to_async(check_throttles, thread_sensitive=False)(drf_request, throttle_scope)
+                return await view(drf_request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return handle_exception(request, exc)
+        return wrapper
+    return decorator
+
+
+def generic_view(view_class, request, **kwargs):
+    """Instância de uma view genérica do DRF para reaproveitar queryset, filtros e serializer"""
+    return view_class(request=request, args=(), kwargs=kwargs, format_kwarg=None)
+
+
+class Page:
+    """Resultado de paginate(): itens da página e os dados de navegação"""
+
+    def __init__(self, items, count, number, num_pages, request, page_query_param):
+        self.items = items
+        self.count = count
+        self.number = number
+        self.num_pages = num_pages
+        self.request = request
+        self.page_query_param = page_query_param
+
+    def get_next_link(self):
+        if self.number >= self.num_pages:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.number + 1)
+
+    def get_previous_link(self):
+        if self.number <= 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.number - 1)
+
+    def response_data(self, results):
+        """Mesmo formato de PageNumberPagination.get_paginated_response"""
+        return {
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': results,
+        }
+
+
+async def paginate(request, queryset):
+    """
+    Paginação equivalente à PageNumberPagination (PAGE_SIZE), com a contagem
+    e a busca da página feitas pelo ORM assíncrono.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_query_param = PageNumberPagination.page_query_param
+    count = await queryset.acount()
+    num_pages = max(math.ceil(count / page_size), 1)
+
+    page_number = request.query_params.get(page_query_param) or 1
+    if page_number in PageNumberPagination.last_page_strings:
+        page_number = num_pages
+    try:
+        number = int(page_number)
+    except (TypeError, ValueError):
+        number = 0
+    if number < 1 or number > num_pages:
+        raise exceptions.NotFound(
+            PageNumberPagination.invalid_page_message.format(page_number=page_number, message='')
+        )
+
+    bottom = (number - 1) * page_size
+    items = [item async for item in queryset[bottom:bottom + page_size]]
+    return Page(items, count, number, num_pages, request, page_query_param)
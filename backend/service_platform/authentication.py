@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.tokens import Token
+
+
+class StreamToken(Token):
+    """
+    Token de curta duração aceito apenas no ?token= do stream de notificações
+    (EventSource não envia cabeçalhos): a URL aparece em logs de proxies, então
+    o JWT de acesso não vai nela. Não é aceito como Bearer nas demais views.
+    """
+
+    token_type = 'stream'
+    lifetime = timedelta(seconds=settings.NOTIFICATION_STREAM_TOKEN_LIFETIME)
+
+
+class MediaToken(Token):
+    """
+    Token de curta duração aceito apenas no ?token= das mídias protegidas
+    (<img> não envia cabeçalhos). Como o StreamToken, mantém o JWT de acesso
+    fora das URLs e não é aceito como Bearer nas demais views.
+    """
+
+    token_type = 'media'
+    lifetime = timedelta(seconds=settings.MEDIA_TOKEN_LIFETIME)
+
+
+class MediaTokenAuthentication(JWTAuthentication):
+    """
+    JWT de acesso no cabeçalho Authorization ou MediaToken em ?token= (para
+    recursos carregados pelo navegador sem cabeçalhos, como <img>).
+    """
+
+    query_param = 'token'
+
+    def authenticate(self, request):
+        if self.get_header(request) is not None:
+            return super().authenticate(request)
+        raw_token = request.query_params.get(self.query_param)
+        if not raw_token:
+            return None
+        try:
+            validated_token = MediaToken(raw_token)
+        except TokenError as e:
+            raise InvalidToken(str(e))
+        return self.get_user(validated_token), validated_token
@@ -0,0 +1,404 @@
+"""
+Cache de resultados com invalidação por tags.
+
+Cada resultado é guardado com as tags das quais depende (ex:
+'provider:42', 'category:*'). Cada tag tem uma versão no cache
+compartilhado (alias CACHE_TAGS_ALIAS de CACHES: Redis em produção, memória
+local em desenvolvimento); a entrada guarda as versões vigentes quando foi
+calculada e só é usada se elas não mudaram. invalidate() troca a versão das
+tags, o que invalida de uma vez todas as entradas que dependem delas, em
+todos os workers, sem precisar conhecer as chaves.
+
+Convenção das tags: '<modelo>:<pk>' para um registro e '<modelo>:*' para
+qualquer registro do modelo (listagens); a alteração de um registro
+invalida as duas (instance_tags()). Os sinais de accounts.signals e services.signals chamam as
+invalidações quando os modelos são salvos ou removidos; alterações em massa
+(update(), bulk_create()) não disparam sinais e devem chamar invalidate().
+
+Além do cache compartilhado, cada processo mantém as entradas mais usadas em
+um LRU em memória (CACHE_TAGS_LOCAL_MAX_ENTRIES), que evita a leitura e a
+desserialização do valor; as versões das tags continuam sendo conferidas no
+cache compartilhado a cada leitura.
+
+Proteção contra stampede: quando uma entrada falta, uma única thread por
+processo (lock por chave) e um único processo (lease no cache compartilhado)
+calculam o valor, e os demais esperam por ele. Entradas perto de expirar são
+recalculadas antes por um único chamador, sorteado com probabilidade
+crescente (XFetch, CACHE_TAGS_EARLY_REFRESH_BETA); expiradas há menos de
+CACHE_TAGS_STALE_TTL continuam sendo servidas enquanto isso
+(stale-while-revalidate).
+
+Uso:
+    @cached(tags=lambda category_id: [f'category:{category_id}'])
+    def category_summary(category_id): ...
+
+    @api_view(['GET'])
+    @cache_response(tags=lambda request, provider_id: [f'provider:{provider_id}'])
+    def view(request, provider_id): ...
+
+    @method_decorator(cache_response(tags=['provider:*']), name='get')
+    class View(generics.ListAPIView): ...
+"""
+import functools
+import hashlib
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from monitoring import metrics
+
+from .db_routers import is_pinned, replica_aliases
+
+logger = logging.getLogger(__name__)
+
+TAG_PREFIX = 'cache-tag:'
+KEY_PREFIX = 'cached:'
+LEASE_PREFIX = 'cached-lease:'
+# Intervalo entre as consultas de quem espera o dono do lease
+WAIT_INTERVAL = 0.05
+
+
+class LRUCache:
+    """Cache em memória do processo, limitado a max_entries (descarta o usado há mais tempo)"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class KeyLocks:
+    """Um lock por chave, removido quando ninguém mais o usa"""
+
+    def __init__(self):
+        self.locks = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def hold(self, key, blocking=True, timeout=-1):
+        """Entra com o lock da chave; retorna se ele foi obtido (timeout ou blocking=False)"""
+        with self.lock:
+            entry = self.locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        acquired = entry[0].acquire(timeout=timeout) if blocking else entry[0].acquire(blocking=False)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                entry[0].release()
+            with self.lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self.locks[key]
+
+
+local_cache = LRUCache(settings.CACHE_TAGS_LOCAL_MAX_ENTRIES)
+key_locks = KeyLocks()
+
+
+def get_backend():
+    return caches[settings.CACHE_TAGS_ALIAS]
+
+
+def tag_key(tag):
+    return f'{TAG_PREFIX}{tag}'
+
+
+def new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def tag_versions(tags):
+    """Versão atual de cada tag; as que não existem (nunca invalidadas ou descartadas) são criadas"""
+    backend = get_backend()
+    keys = {tag: tag_key(tag) for tag in tags}
+    stored = backend.get_many(keys.values())
+    missing = [tag for tag in tags if keys[tag] not in stored]
+    if missing:
+        for tag in missing:
+            backend.add(keys[tag], new_version(), None)
+        # Outro processo pode ter criado a versão entre o get e o add
+        stored.update(backend.get_many([keys[tag] for tag in missing]))
+    return tuple(stored.get(keys[tag]) for tag in tags)
+
+
+def invalidate(*tags):
+    """Invalida todas as entradas que dependem de alguma das tags"""
+    if not tags:
+        return
+    try:
+        get_backend().set_many({tag_key(tag): new_version() for tag in set(tags)}, None)
+    except Exception as e:
+        logger.warning(f'Erro ao invalidar as tags {sorted(set(tags))}: {str(e)}')
+
+
+def instance_tags(name, pk):
+    return [f'{name}:{pk}', f'{name}:*']
+
+
+def invalidate_on_commit(*tags):
+    """
+    Invalida agora e de novo depois do commit: entre os dois momentos outra
+    requisição pode ter guardado os dados ainda não confirmados.
+    """
+    invalidate(*tags)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: invalidate(*tags))
+
+
+def make_key(name, parts):
+    digest = hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()[:32]
+    return f'{KEY_PREFIX}{name}:{digest}'
+
+
+def lookup(key, versions, now):
+    """Entrada com as versões atuais: a do LRU local se ainda válida, senão a do cache compartilhado"""
+    entry = local_cache.get(key)
+    if entry is not None and entry[0] == versions and now < entry[2]:
+        return entry
+    shared = get_backend().get(key)
+    if shared is not None and shared[0] == versions:
+        local_cache.set(key, shared, shared[2] + settings.CACHE_TAGS_STALE_TTL - now)
+        return shared
+    return entry if entry is not None and entry[0] == versions else None
+
+
+def should_refresh(entry, now):
+    """
+    Recálculo antecipado probabilístico (XFetch): a chance cresce perto da
+    expiração e com o tempo que o cálculo leva (delta), de modo que
+    normalmente um único chamador recalcula antes de a entrada expirar.
+    """
+    versions, value, expires_at, delta = entry
+    beta = settings.CACHE_TAGS_EARLY_REFRESH_BETA
+    return now - delta * beta * math.log(1 - random.random()) >= expires_at
+
+
+def store(name, key, versions, compute, ttl):
+    started = time.monotonic()
+    value = compute()
+    delta = time.monotonic() - started
+    entry = (versions, value, time.time() + ttl, delta)
+    timeout = ttl + settings.CACHE_TAGS_STALE_TTL
+    try:
+        get_backend().set(key, entry, timeout)
+    except Exception as e:
+        logger.warning(f'Erro ao gravar {name} no cache: {str(e)}')
+    local_cache.set(key, entry, timeout)
+    return value
+
+
+def acquire_lease(key):
+    """Lease entre processos: só quem o obtém recalcula a entrada"""
+    token = uuid.uuid4().hex
+    if get_backend().add(f'{LEASE_PREFIX}{key}', token, settings.CACHE_TAGS_LOCK_TIMEOUT):
+        return token
+    return None
+
+
+def release_lease(key, token):
+    lease_key = f'{LEASE_PREFIX}{key}'
+    try:
+        # Se o lease expirou durante o cálculo, pode já ser de outro processo
+        if get_backend().get(lease_key) == token:
+            get_backend().delete(lease_key)
+    except Exception as e:
+        logger.warning(f'Erro ao liberar o lease de {key}: {str(e)}')
+
+
+def wait_for_entry(key, versions):
+    """Espera o dono do lease gravar a entrada; None se ele desistiu ou o tempo acabou"""
+    deadline = time.monotonic() + settings.CACHE_TAGS_LOCK_TIMEOUT
+    backend = get_backend()
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        entry = backend.get(key)
+        if entry is not None and entry[0] == versions and time.time() < entry[2]:
+            local_cache.set(key, entry, entry[2] + settings.CACHE_TAGS_STALE_TTL - time.time())
+            return entry
+        if backend.get(f'{LEASE_PREFIX}{key}') is None:
+            return None
+    return None
+
+
+def compute_once(name, key, versions, compute, ttl):
+    """
+    Single-flight: no processo, uma thread por chave calcula e as outras
+    esperam; entre processos, quem não obtém o lease espera a entrada gravada.
+    """
+    with key_locks.hold(key, timeout=settings.CACHE_TAGS_LOCK_TIMEOUT):
+        try:
+            # Outra thread pode ter calculado enquanto esta esperava
+            entry = lookup(key, versions, time.time())
+            if entry is not None and time.time() < entry[2]:
+                return entry[1]
+            token = acquire_lease(key)
+            if token is None:
+                entry = wait_for_entry(key, versions)
+                if entry is not None:
+                    return entry[1]
+        except Exception as e:
+            logger.warning(f'Cache indisponível para {name}: {str(e)}')
+            token = None
+        try:
+            return store(name, key, versions, compute, ttl)
+        finally:
+            if token is not None:
+                release_lease(key, token)
+
+
+def refresh(name, key, versions, compute, ttl, stale):
+    """
+    Recalcula em nome de todos e devolve o valor novo; se alguém (thread ou
+    processo) já estiver recalculando, devolve o antigo (stale) sem esperar
+    """
+    with key_locks.hold(key, blocking=False) as acquired:
+        if not acquired:
+            return stale
+        try:
+            token = acquire_lease(key)
+        except Exception as e:
+            logger.warning(f'Cache indisponível para {name}: {str(e)}')
+            return stale
+        if token is None:
+            return stale
+        try:
+            return store(name, key, versions, compute, ttl)
+        finally:
+            release_lease(key, token)
+
+
+def get_or_set(name, parts, tags, compute, ttl=None):
+    """
+    Valor guardado para (name, parts) se as tags não mudaram; senão calcula
+    com compute(). Entradas expiradas há menos de CACHE_TAGS_STALE_TTL
+    continuam sendo servidas enquanto um único chamador as recalcula (ele
+    recebe o valor novo); entradas invalidadas por tags nunca são servidas.
+    """
+    if not settings.CACHE_TAGS_ENABLED:
+        return compute()
+    ttl = settings.CACHE_TAGS_DEFAULT_TTL if ttl is None else ttl
+    tags = sorted(set(tags))
+    key = make_key(name, parts)
+
+    try:
+        # Lidas antes do cálculo: uma invalidação durante compute() invalida o resultado
+        versions = tag_versions(tags)
+        now = time.time()
+        entry = lookup(key, versions, now)
+    except Exception as e:
+        logger.warning(f'Cache indisponível para {name}: {str(e)}')
+        return compute()
+
+    metrics.observe_cache(name, entry is not None)
+    if entry is None:
+        return compute_once(name, key, versions, compute, ttl)
+    if should_refresh(entry, now):
+        # Expirada (ainda dentro da janela de stale) ou sorteada para recálculo antecipado
+        return refresh(name, key, versions, compute, ttl, entry[1])
+    return entry[1]
+
+
+def resolve_tags(tags, *args, **kwargs):
+    return tags(*args, **kwargs) if callable(tags) else tags
+
+
+def cached(tags, ttl=None, name=None):
+    """Decorator que guarda o resultado de uma função (argumentos com repr estável)"""
+    def decorator(func):
+        cache_name = name or f'{func.__module__}.{func.__qualname__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return get_or_set(
+                cache_name,
+                (args, sorted(kwargs.items())),
+                resolve_tags(tags, *args, **kwargs),
+                lambda: func(*args, **kwargs),
+                ttl
+            )
+        return wrapper
+    return decorator
+
+
+class Uncacheable(Exception):
+    """Resposta que não deve ser guardada (status diferente de 200)"""
+
+    def __init__(self, response):
+        self.response = response
+
+
+def cache_response(tags, ttl=None, per_user=False, name=None):
+    """
+    Decorator de views GET do DRF: guarda o response.data das respostas 200,
+    por URL completa (inclui a query string) e, com per_user, por usuário.
+    tags pode ser uma lista ou uma função (request, *args, **kwargs) -> lista.
+    Em views baseadas em classe, informe name (o método se chama apenas 'get').
+    """
+    def decorator(view):
+        cache_name = name or view.__name__
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            # Fixado no primário após uma escrita (db_routers): o cache pode ter dados
+            # lidos da réplica sem essa escrita, e o que ele lê não deve ir para os outros
+            if replica_aliases() and is_pinned(getattr(request, 'user', None)):
+                return view(request, *args, **kwargs)
+
+            parts = [request.build_absolute_uri()]
+            if per_user:
+                parts.append(request.user.pk)
+
+            def compute():
+                response = view(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    raise Uncacheable(response)
+                return response.data
+
+            try:
+                data = get_or_set(
+                    f'view:{cache_name}', parts, resolve_tags(tags, request, *args, **kwargs), compute, ttl
+                )
+            except Uncacheable as e:
+                return e.response
+            return Response(data, status=status.HTTP_200_OK)
+        return wrapper
+    return decorator
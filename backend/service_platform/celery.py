@@ -0,0 +1,22 @@
+import os
+
+from celery import Celery
+from celery.schedules import crontab
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'service_platform.settings')
+
+app = Celery('service_platform')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
+
+# Tarefas periódicas (celery -A service_platform beat)
+app.conf.beat_schedule = {
+    'purge-notifications': {
+        'task': 'services.tasks.purge_notifications',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'prune-sync-tombstones': {
+        'task': 'services.tasks.prune_sync_tombstones',
+        'schedule': crontab(hour=4, minute=0),
+    },
+}
@@ -0,0 +1,75 @@
+"""
+Configuração das conexões com o banco a partir de DATABASE_URL.
+
+Além do que o dj_database_url entende, a URL aceita parâmetros de
+gerenciamento de conexões (removidos antes de chegar ao driver):
+
+- conn_max_age: segundos que uma conexão persistente é reutilizada entre
+  requisições (0 fecha ao fim de cada requisição; padrão DB_CONN_MAX_AGE);
+- conn_health_checks: testa a conexão persistente antes de reutilizá-la
+  (padrão DB_CONN_HEALTH_CHECKS);
+- pool: usa o pool de conexões do processo (padrão DB_POOL, ligado no modo
+  ASGI), com pool_max_size, pool_timeout e pool_check_idle (ver
+  service_platform.db_backends.postgresql_pool).
+
+Ex: postgresql://user:senha@db:5432/servico_em_casa?conn_max_age=300&sslmode=require
+"""
+from urllib.parse import parse_qsl, urlencode
+
+import dj_database_url
+import environ
+
+env = environ.Env()
+
+POOL_ENGINE = 'service_platform.db_backends.postgresql_pool'
+SQLITE_ENGINE = 'service_platform.db_backends.sqlite3'
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+def as_bool(value):
+    return str(value).lower() in TRUE_VALUES
+
+
+def connection_defaults():
+    """Padrões vindos do ambiente; os parâmetros da URL têm precedência"""
+    return {
+        'conn_max_age': env.int('DB_CONN_MAX_AGE', default=60),
+        'conn_health_checks': env.bool('DB_CONN_HEALTH_CHECKS', default=True),
+        # Nos workers ASGI as views rodam em threads diferentes a cada requisição:
+        # conexões persistentes por thread se acumulariam, o pool as compartilha
+        'pool': env.bool('DB_POOL', default=env('SERVER_MODE', default='wsgi').lower() == 'asgi'),
+        'pool_max_size': env.int('DB_POOL_MAX_SIZE', default=10),
+        'pool_timeout': env.float('DB_POOL_TIMEOUT', default=10.0),
+        'pool_check_idle': env.float('DB_POOL_CHECK_IDLE', default=30.0),
+    }
+
+
+def database_config(url):
+    """Converte a URL no dicionário de DATABASES"""
+    base_url, _, query_string = url.partition('?')
+    options = connection_defaults()
+    query = []
+    for name, value in parse_qsl(query_string, keep_blank_values=True):
+        if name in options:
+            options[name] = value
+        else:
+            query.append((name, value))
+
+    config = dj_database_url.parse(
+        f'{base_url}?{urlencode(query)}' if query else base_url,
+        conn_max_age=int(options['conn_max_age']),
+        conn_health_checks=as_bool(options['conn_health_checks']),
+    )
+    if as_bool(options['pool']) and config['ENGINE'] == 'django.db.backends.postgresql':
+        config['ENGINE'] = POOL_ENGINE
+        # A conexão volta ao pool ao fim de cada requisição, em vez de ficar presa à thread
+        config['CONN_MAX_AGE'] = 0
+        config['POOL'] = {
+            'MAX_SIZE': int(options['pool_max_size']),
+            'TIMEOUT': float(options['pool_timeout']),
+            'CHECK_IDLE': float(options['pool_check_idle']),
+        }
+    elif config['ENGINE'] == 'django.db.backends.sqlite3' and env.bool('SQLITE_TUNED', default=True):
+        config['ENGINE'] = SQLITE_ENGINE
+    return config
@@ -0,0 +1,101 @@
+"""
+Pool de conexões do processo, compartilhado entre as threads.
+
+As conexões ociosas ficam numa pilha (a mais recente é reutilizada primeiro,
+as antigas envelhecem e são descartadas pelo servidor/checagem). Quando
+todas as MAX_SIZE conexões estão em uso, acquire() espera até TIMEOUT
+segundos por uma devolução.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, max_size, timeout, check_idle, is_usable, close):
+        self.max_size = max_size
+        self.timeout = timeout
+        # Conexões ociosas há mais tempo que isso são testadas antes do uso
+        self.check_idle = check_idle
+        self.is_usable = is_usable
+        self.close_connection = close
+        self.condition = threading.Condition()
+        self.idle = []
+        self.size = 0
+
+    def acquire(self, connect):
+        """Conexão ociosa do pool ou uma nova, criada por connect()"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            connection, returned_at = self.take(deadline)
+            if connection is None:
+                try:
+                    return connect()
+                except BaseException:
+                    self.forget()
+                    raise
+            if self.healthy(connection, returned_at):
+                return connection
+            self.discard(connection)
+
+    def take(self, deadline):
+        with self.condition:
+            while True:
+                if self.idle:
+                    return self.idle.pop()
+                if self.size < self.max_size:
+                    # Reserva a vaga; a conexão é aberta fora do lock
+                    self.size += 1
+                    return None, None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        f'Nenhuma conexão livre no pool após {self.timeout}s '
+                        f'({self.max_size} em uso)'
+                    )
+                self.condition.wait(remaining)
+
+    def healthy(self, connection, returned_at):
+        if connection.closed:
+            return False
+        if time.monotonic() - returned_at < self.check_idle:
+            return True
+        return self.is_usable(connection)
+
+    def release(self, connection):
+        """Devolve a conexão; as que não estão limpas são descartadas"""
+        if connection.closed:
+            self.discard(connection)
+            return
+        with self.condition:
+            self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+
+    def discard(self, connection):
+        try:
+            self.close_connection(connection)
+        except Exception as e:
+            logger.debug(f'Erro ao fechar conexão descartada do pool: {str(e)}')
+        self.forget()
+
+    def forget(self):
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def close(self):
+        """Fecha as conexões ociosas (as em uso são fechadas ao serem devolvidas)"""
+        with self.condition:
+            idle, self.idle = self.idle, []
+        for connection, _ in idle:
+            self.discard(connection)
+
+    def stats(self):
+        with self.condition:
+            return {'size': self.size, 'idle': len(self.idle), 'max_size': self.max_size}
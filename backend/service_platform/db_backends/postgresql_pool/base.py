@@ -0,0 +1,104 @@
+"""
+Backend PostgreSQL com pool de conexões no processo.
+
+Pensado para os workers ASGI: as views síncronas rodam em threads do
+executor, e com CONN_MAX_AGE > 0 cada thread manteria sua própria conexão
+aberta. Aqui o Django continua abrindo e fechando a conexão a cada
+requisição (CONN_MAX_AGE=0), mas abrir = pegar uma conexão pronta do pool e
+fechar = devolvê-la, sem o custo do handshake/autenticação com o servidor.
+
+Configuração em DATABASES['...']['POOL'] (montada por
+service_platform.database a partir da DATABASE_URL):
+MAX_SIZE (conexões por processo), TIMEOUT (espera por uma conexão livre, em
+segundos) e CHECK_IDLE (conexões ociosas há mais tempo que isso são testadas
+com SELECT 1 antes do uso).
+"""
+import logging
+import os
+import threading
+
+from django.db.backends.postgresql import base, creation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from ..pool import ConnectionPool, PoolTimeout
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL = {'MAX_SIZE': 10, 'TIMEOUT': 10.0, 'CHECK_IDLE': 30.0}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def is_usable(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except base.Database.Error:
+        return False
+    return True
+
+
+def get_pool(alias, conn_params, options):
+    # O pid na chave evita reutilizar num processo filho (fork) as conexões do pai;
+    # os parâmetros, que o banco de teste use um pool diferente do banco real
+    key = (os.getpid(), alias, tuple(sorted((name, str(value)) for name, value in conn_params.items())))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            options = {**DEFAULT_POOL, **options}
+            pool = _pools[key] = ConnectionPool(
+                max_size=options['MAX_SIZE'],
+                timeout=options['TIMEOUT'],
+                check_idle=options['CHECK_IDLE'],
+                is_usable=is_usable,
+                close=lambda connection: connection.close(),
+            )
+        return pool
+
+
+def close_pools(alias=None):
+    """Fecha as conexões ociosas dos pools (de um alias ou de todos)"""
+    with _pools_lock:
+        pools = [pool for (pid, pool_alias, _), pool in _pools.items() if alias in (None, pool_alias)]
+    for pool in pools:
+        pool.close()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # O DROP DATABASE falha enquanto houver conexões abertas no pool
+        close_pools(self.connection.alias)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(self.alias, conn_params, self.settings_dict.get('POOL', {}))
+        try:
+            connection = self.pool.acquire(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        except PoolTimeout as e:
+            # Convertido pelo Django em django.db.OperationalError
+            raise self.Database.OperationalError(str(e))
+        # Nas conexões reaproveitadas o nível de isolamento já foi aplicado na criação
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get('isolation_level', IsolationLevel.READ_COMMITTED)
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            connection = self.connection
+            try:
+                # A conexão volta ao pool sem transação aberta (ex: fechada dentro de um atomic)
+                if not connection.closed and connection.info.transaction_status != 0:
+                    connection.rollback()
+            except self.Database.Error as e:
+                logger.warning(f'Conexão descartada do pool: {str(e)}')
+                self.pool.discard(connection)
+                return
+            self.pool.release(connection)
@@ -0,0 +1,41 @@
+"""
+Backend SQLite ajustado para vários workers no mesmo nó.
+
+Com as configurações padrão do SQLite, leitores bloqueiam o escritor
+(journal de rollback) e uma transação que começa lendo e depois escreve
+recebe "database is locked" na hora, sem esperar, quando outro processo
+escreveu no meio tempo. Aqui:
+
+- cada conexão nova recebe os PRAGMAs de DATABASES['...']['PRAGMAS']
+  (WAL: leitores e escritor não se bloqueiam; synchronous=NORMAL, seguro em
+  WAL; busy_timeout: espera o lock em vez de falhar; mmap e cache maiores);
+- as transações (atomic) começam com BEGIN IMMEDIATE: o lock de escrita é
+  obtido no início, onde o busy_timeout se aplica, em vez de falhar no
+  meio da transação.
+"""
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 134217728,
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in {**DEFAULT_PRAGMAS, **self.settings_dict.get('PRAGMAS', {})}.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _set_autocommit(self, autocommit):
+        # Fora do autocommit o sqlite3 abre as transações com BEGIN IMMEDIATE
+        with self.wrap_database_errors:
+            self.connection.isolation_level = None if autocommit else 'IMMEDIATE'
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -0,0 +1,95 @@
+"""
+Roteamento de leituras para réplicas do banco.
+
+As réplicas são configuradas por DATABASE_REPLICA_URLS (aliases em
+REPLICA_DATABASES). Só as views marcadas com @read_from_replica leem das
+réplicas; todo o resto, inclusive todas as escritas, usa o primário
+('default').
+
+Como a réplica pode estar atrasada, depois de uma escrita bem-sucedida o
+usuário fica "fixado" no primário por REPLICA_PIN_SECONDS
+(ReplicaPinMiddleware), para que as leituras seguintes vejam o que ele
+acabou de gravar.
+"""
+import functools
+import logging
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+logger = logging.getLogger(__name__)
+
+# Ativo durante a execução de uma view marcada com @read_from_replica
+reads_from_replica = ContextVar('reads_from_replica', default=False)
+
+
+def replica_aliases():
+    return getattr(settings, 'REPLICA_DATABASES', [])
+
+
+def pin_key(user_id):
+    return f'db:pin:{user_id}'
+
+
+def pin_to_primary(user):
+    """Direciona as leituras do usuário ao primário pela janela configurada"""
+    try:
+        cache.set(pin_key(user.pk), 1, settings.REPLICA_PIN_SECONDS)
+    except Exception as e:
+        logger.warning(f'Erro ao fixar usuário no banco primário: {str(e)}')
+
+
+def is_pinned(user):
+    if user is None or not user.is_authenticated:
+        return False
+    try:
+        return cache.get(pin_key(user.pk)) is not None
+    except Exception:
+        # Na dúvida, o primário sempre tem os dados mais recentes
+        return True
+
+
+def read_from_replica(view):
+    """
+    Decorator das views de leitura que aceitam dados levemente defasados.
+    Para views baseadas em classe: @method_decorator(read_from_replica, name='get').
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not replica_aliases() or is_pinned(getattr(request, 'user', None)):
+            return view(request, *args, **kwargs)
+        token = reads_from_replica.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            reads_from_replica.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Leituras das views marcadas vão para uma réplica; escritas sempre ao primário"""
+
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if replicas and reads_from_replica.get():
+            return random.choice(replicas)
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Explícito: sem isso, objetos lidos da réplica seriam salvos nela
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # As réplicas recebem o schema pela replicação do primário
+        if db in replica_aliases():
+            return False
+        return None
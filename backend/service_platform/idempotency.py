@@ -0,0 +1,120 @@
+"""
+Chaves de idempotência para as views de escrita.
+
+O cliente envia um identificador único (ex: UUID) no cabeçalho
+Idempotency-Key. A primeira resposta (status < 500) é guardada no cache por
+IDEMPOTENCY_TTL, compactada; repetições com a mesma chave recebem a resposta
+guardada (cabeçalho Idempotent-Replayed: true) sem executar a view de novo.
+Enquanto a primeira requisição está em andamento, as repetições recebem 409.
+A chave vale por usuário e rota e só pode ser reutilizada com o mesmo corpo
+(caso contrário, 422).
+
+Uso:
+    @api_view(['POST'])
+    @permission_classes([...])
+    @idempotent
+    def view(request): ...
+
+    @method_decorator(idempotent, name='post')
+    class View(generics.CreateAPIView): ...
+"""
+import functools
+import hashlib
+import json
+import logging
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from monitoring import metrics
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+# Cabeçalhos da resposta original repetidos na reexecução
+STORED_HEADERS = ('Location',)
+
+
+def idempotent(view):
+    """Decorator que aplica o Idempotency-Key a uma view do DRF"""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.META.get(HEADER)
+        if not key:
+            return view(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'error': f'Idempotency-Key deve ter no máximo {MAX_KEY_LENGTH} caracteres.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        cache_key = storage_key(request, key)
+        fingerprint = request_fingerprint(request)
+        stored = cache.get(cache_key)
+        metrics.observe_cache('idempotency', stored is not None)
+        if stored is not None:
+            return replay(stored, fingerprint)
+
+        lock_key = f'{cache_key}:lock'
+        if not cache.add(lock_key, fingerprint, settings.IDEMPOTENCY_LOCK_TIMEOUT):
+            # A primeira requisição pode ter terminado entre o get e o add
+            stored = cache.get(cache_key)
+            if stored is not None:
+                return replay(stored, fingerprint)
+            return Response(
+                {'error': 'Uma requisição com esta Idempotency-Key ainda está em processamento.'},
+                status=status.HTTP_409_CONFLICT,
+                headers={'Retry-After': '1'}
+            )
+
+        try:
+            response = view(request, *args, **kwargs)
+            # Erros do servidor não são guardados: a repetição executa a view novamente
+            if response.status_code < 500:
+                try:
+                    cache.set(cache_key, serialize(response, fingerprint), settings.IDEMPOTENCY_TTL)
+                except (TypeError, ValueError) as e:
+                    logger.error(f'Resposta não pôde ser guardada para Idempotency-Key: {str(e)}')
+        finally:
+            cache.delete(lock_key)
+        return response
+    return wrapper
+
+
+def storage_key(request, key):
+    user = getattr(request, 'user', None)
+    owner = user.pk if user is not None and user.is_authenticated else 'anon'
+    digest = hashlib.sha256(f'{request.method}:{request.path}:{key}'.encode('utf-8')).hexdigest()
+    return f'idempotency:{owner}:{digest}'
+
+
+def request_fingerprint(request):
+    """Hash do corpo: a mesma chave com outro conteúdo é um erro do cliente"""
+    return hashlib.sha256(request.body).hexdigest()
+
+
+def serialize(response, fingerprint):
+    content = b''
+    if response.data is not None:
+        content = zlib.compress(json.dumps(response.data, cls=JSONEncoder, separators=(',', ':')).encode('utf-8'))
+    headers = {name: response[name] for name in STORED_HEADERS if response.has_header(name)}
+    return (fingerprint, response.status_code, headers, content)
+
+
+def replay(stored, fingerprint):
+    stored_fingerprint, status_code, headers, content = stored
+    if stored_fingerprint != fingerprint:
+        return Response(
+            {'error': 'Idempotency-Key já utilizada com outro conteúdo.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    data = json.loads(zlib.decompress(content)) if content else None
+    response = Response(data, status=status_code, headers=headers)
+    response[REPLAYED_HEADER] = 'true'
+    return response
@@ -0,0 +1,73 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from rest_framework.permissions import SAFE_METHODS
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import db_routers
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware que também funciona em modo assíncrono.
+
+    O middleware original é só síncrono; sob ASGI isso faria o Django
+    executar toda a cadeia abaixo dele (inclusive as views assíncronas)
+    através de threads. Aqui só o envio dos arquivos estáticos usa thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class ReplicaPinMiddleware:
+    """
+    Após uma requisição de escrita bem-sucedida, fixa o usuário no banco
+    primário por REPLICA_PIN_SECONDS (service_platform.db_routers). O usuário
+    autenticado pelo DRF (JWT) é propagado para a HttpRequest.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self.should_pin(request, response):
+            db_routers.pin_to_primary(request.user)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self.should_pin(request, response):
+            await sync_to_async(db_routers.pin_to_primary)(request.user)
+        return response
+
+    def should_pin(self, request, response):
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return False
+        user = getattr(request, 'user', None)
+        return bool(db_routers.replica_aliases()) and user is not None and user.is_authenticated
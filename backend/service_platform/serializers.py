@@ -0,0 +1,128 @@
+"""
+Campos esparsos e controle de expansão nos serializers do DRF.
+
+Nas requisições GET, o serializer raiz (com DynamicFieldsMixin) lê:
+
+    ?fields=id,title,client.first_name
+        só os campos listados; caminhos com ponto escolhem os campos dos
+        serializers aninhados (um aninhado sem subcampos vem completo)
+    ?expand=service_request,service_request.client
+        com o parâmetro presente, os serializers aninhados não listados
+        (nem com subcampos em ?fields=) viram apenas o id; sem ele, tudo
+        continua expandido como antes
+
+optimize_queryset() monta os select_related/prefetch_related a partir dos
+campos que o serializer vai de fato serializar: campos omitidos ou
+reduzidos ao id não geram joins. Nas views genéricas, use
+SparseFieldsQuerysetMixin.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import permissions, serializers
+
+
+def parse_paths(value):
+    """'a,b.c,b.d' -> {'a': {}, 'b': {'c': {}, 'd': {}}}; None sem o parâmetro"""
+    if value is None:
+        return None
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in path.strip().split('.'):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+class DynamicFieldsMixin:
+    """Mixin de ModelSerializer com suporte a ?fields= e ?expand= (ver o módulo)"""
+
+    def sparse_spec(self):
+        """(campos, expansão) deste serializer; None em cada um quando não há restrição"""
+        spec = getattr(self, '_sparse_spec', None)
+        if spec is not None:
+            return spec
+
+        # Só a raiz lê a requisição; os aninhados recebem a parte deles da raiz
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        request = self.context.get('request')
+        if parent is not None or request is None or request.method not in permissions.SAFE_METHODS:
+            return None, None
+        return parse_paths(request.query_params.get('fields')), parse_paths(request.query_params.get('expand'))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        only, expand = self.sparse_spec()
+        if only is not None:
+            fields = {name: field for name, field in fields.items() if name in only}
+
+        for name, field in list(fields.items()):
+            many = isinstance(field, serializers.ListSerializer)
+            nested = field.child if many else field
+            if not isinstance(nested, serializers.BaseSerializer):
+                continue
+            subfields = (only or {}).get(name) or None
+            if expand is not None and name not in expand and subfields is None:
+                source = field.source if field.source not in (None, name) else None
+                fields[name] = serializers.PrimaryKeyRelatedField(source=source, many=many, read_only=True)
+            elif isinstance(nested, DynamicFieldsMixin):
+                nested._sparse_spec = (subfields, None if expand is None else expand.get(name, {}))
+        return fields
+
+
+def collect_lookups(serializer, model, prefix, prefetching, select, prefetch):
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        path, current, fetching = prefix, model, prefetching
+        for index, attr in enumerate(field.source_attrs):
+            try:
+                related = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                break
+            if not related.is_relation or related.related_model is None:
+                break
+            # Id de uma FK: vem da própria coluna <attr>_id, sem join
+            last = index == len(field.source_attrs) - 1
+            if last and isinstance(field, serializers.PrimaryKeyRelatedField) and (
+                related.many_to_one or (related.one_to_one and related.concrete)
+            ):
+                break
+            path = f'{path}__{attr}' if path else attr
+            fetching = fetching or related.many_to_many or related.one_to_many
+            (prefetch if fetching else select).add(path)
+            current = related.related_model
+        else:
+            if isinstance(field, serializers.BaseSerializer):
+                collect_lookups(field, current, path, fetching, select, prefetch)
+
+
+def related_lookups(serializer):
+    """(select_related, prefetch_related) usados pelos campos ativos do serializer"""
+    select, prefetch = set(), set()
+    root = serializer.child if isinstance(serializer, serializers.ListSerializer) else serializer
+    collect_lookups(root, root.Meta.model, '', False, select, prefetch)
+    return sorted(select), sorted(prefetch)
+
+
+def optimize_queryset(queryset, serializer):
+    """Aplica ao queryset apenas os joins que o serializer vai usar"""
+    select, prefetch = related_lookups(serializer)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class SparseFieldsQuerysetMixin:
+    """Views genéricas: os joins do queryset seguem os campos pedidos em ?fields=/?expand="""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method in permissions.SAFE_METHODS:
+            queryset = optimize_queryset(queryset, self.get_serializer())
+        return queryset
@@ -14,6 +14,7 @@ from pathlib import Path
 import environ
 import os
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -82,18 +83,22 @@ INSTALLED_APPS = [
     # Local apps
     'accounts',
     'services',
+    'monitoring',
+    'uploads',
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.PerformanceMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'service_platform.middleware.AsyncWhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'service_platform.middleware.ReplicaPinMiddleware',
 ]
 
 ROOT_URLCONF = 'service_platform.urls'
@@ -120,10 +125,21 @@ WSGI_APPLICATION = 'service_platform.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# SQLITE_TUNED (padrão): WAL, busy timeout e BEGIN IMMEDIATE para vários workers
+# no mesmo nó (service_platform.db_backends.sqlite3); False usa o backend padrão
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': (
+            'service_platform.db_backends.sqlite3' if env.bool('SQLITE_TUNED', default=True)
+            else 'django.db.backends.sqlite3'
+        ),
         'NAME': BASE_DIR / 'db.sqlite3',
+        'PRAGMAS': {
+            'busy_timeout': env.int('SQLITE_BUSY_TIMEOUT_MS', default=5000),
+            'mmap_size': env.int('SQLITE_MMAP_SIZE', default=134217728),
+        },
+        # Banco de teste em arquivo: os testes de concorrência usam várias conexões
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -140,9 +156,26 @@ DATABASES = {
 # }
 
 # Parse database URL if provided (for deployment)
+# Conexões persistentes com health check por padrão (DB_CONN_MAX_AGE, DB_CONN_HEALTH_CHECKS);
+# parâmetros de conexão e pool também podem vir na URL (ver service_platform.database)
 if env('DATABASE_URL', default=None):
-    import dj_database_url
-    DATABASES['default'] = dj_database_url.parse(env('DATABASE_URL'))
+    from service_platform.database import database_config
+    DATABASES['default'] = database_config(env('DATABASE_URL'))
+
+# Réplicas de leitura (service_platform.db_routers): URLs separadas por vírgula
+REPLICA_DATABASES = []
+DATABASE_REPLICA_URLS = env.list('DATABASE_REPLICA_URLS', default=[])
+if DATABASE_REPLICA_URLS:
+    from service_platform.database import database_config
+    for index, replica_url in enumerate(DATABASE_REPLICA_URLS, 1):
+        alias = f'replica{index}'
+        DATABASES[alias] = database_config(replica_url)
+        DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+        REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['service_platform.db_routers.ReplicaRouter']
+# Janela em que as leituras de um usuário ficam no primário após uma escrita dele
+REPLICA_PIN_SECONDS = env.int('REPLICA_PIN_SECONDS', default=5)
 
 
 # Password validation
@@ -186,6 +219,24 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Prefixo da location interna do nginx para X-Accel-Redirect (ex: /protected-media/); vazio = Django entrega
+MEDIA_ACCEL_REDIRECT = env('MEDIA_ACCEL_REDIRECT', default='')
+MEDIA_CACHE_MAX_AGE = env.int('MEDIA_CACHE_MAX_AGE', default=365 * 24 * 3600)
+MEDIA_LEGACY_CACHE_MAX_AGE = env.int('MEDIA_LEGACY_CACHE_MAX_AGE', default=24 * 3600)
+# Validade (segundos) do token de ?token= das mídias protegidas (<img> não envia o cabeçalho Authorization)
+MEDIA_TOKEN_LIFETIME = env.int('MEDIA_TOKEN_LIFETIME', default=600)
+
+# Upload de imagens (uploads.images): variantes geradas no celery ('celery') ou na requisição ('sync')
+IMAGE_PROCESSING = env('IMAGE_PROCESSING', default='celery')
+IMAGE_UPLOAD_MAX_BYTES = env.int('IMAGE_UPLOAD_MAX_BYTES', default=15 * 1024 * 1024)
+IMAGE_MAX_PIXELS = env.int('IMAGE_MAX_PIXELS', default=50_000_000)
+IMAGE_VARIANT_WIDTHS = [int(width) for width in env.list('IMAGE_VARIANT_WIDTHS', default=['320', '960', '1920'])]
+IMAGE_WEBP_QUALITY = env.int('IMAGE_WEBP_QUALITY', default=80)
+IMAGE_JPEG_QUALITY = env.int('IMAGE_JPEG_QUALITY', default=82)
+IMAGE_MAX_PER_REQUEST = env.int('IMAGE_MAX_PER_REQUEST', default=10)
+
+# Operações em lote: solicitações por POST /api/requests/batch/ e ids por ?ids=
+BATCH_MAX_SIZE = env.int('BATCH_MAX_SIZE', default=100)
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -209,9 +260,38 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 20
+    'PAGE_SIZE': 20,
+    # Token buckets compartilhados entre os workers (service_platform.throttling)
+    'DEFAULT_THROTTLE_CLASSES': [
+        'service_platform.throttling.AnonBucketThrottle',
+        'service_platform.throttling.UserBucketThrottle',
+        'service_platform.throttling.ScopedBucketThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': env('THROTTLE_RATE_ANON', default='120/min'),
+        'user': env('THROTTLE_RATE_USER', default='1200/min'),
+        'auth': env('THROTTLE_RATE_AUTH', default='10/min'),
+        'public': env('THROTTLE_RATE_PUBLIC', default='300/min'),
+        'statistics': env('THROTTLE_RATE_STATISTICS', default='30/min'),
+        'uploads': env('THROTTLE_RATE_UPLOADS', default='30/min'),
+    },
+    # Proxies reversos à frente da aplicação: o IP do cliente é o N-ésimo endereço a partir do fim
+    # do X-Forwarded-For. 0 usa REMOTE_ADDR (sem proxy); nunca deixe None, que usa o cabeçalho
+    # inteiro enviado pelo cliente e permite trocar de balde a cada requisição.
+    # Atrás do nginx do frontend (docker-compose.prod.yml) é 1; com outro proxy à frente, 2.
+    'NUM_PROXIES': env.int('THROTTLE_NUM_PROXIES', default=0),
 }
 
+# Throttling: THROTTLE_ENABLED=False desliga os limites (ex: testes de carga)
+THROTTLE_ENABLED = env.bool('THROTTLE_ENABLED', default=True)
+# O LocalBucketStore é por processo (cada worker teria o próprio limite): com Redis configurado
+# o padrão é o RedisBucketStore, compartilhado entre os workers
+THROTTLE_REDIS_URL = env('THROTTLE_REDIS_URL', default=env('REDIS_URL', default=''))
+THROTTLE_STORE = env('THROTTLE_STORE', default=(
+    'service_platform.throttling.RedisBucketStore' if THROTTLE_REDIS_URL
+    else 'service_platform.throttling.LocalBucketStore'
+))
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -230,6 +310,8 @@ CORS_ALLOWED_ORIGINS = env.list('CORS_ALLOWED_ORIGINS', default=[
 ])
 
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
 
 # Celery Configuration (for background tasks)
 CELERY_BROKER_URL = env('REDIS_URL', default='redis://localhost:6379/0')
@@ -239,6 +321,92 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Cache: Redis em CACHE_URL (compartilhado entre workers) ou memória local do processo
+CACHE_URL = env('CACHE_URL', default='')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+            'KEY_PREFIX': 'service_platform',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Cache com invalidação por tags (service_platform.caching): alias de CACHES usado,
+# validade padrão das entradas e tamanho do LRU em memória de cada processo
+CACHE_TAGS_ENABLED = env.bool('CACHE_TAGS_ENABLED', default=True)
+CACHE_TAGS_ALIAS = env('CACHE_TAGS_ALIAS', default='default')
+CACHE_TAGS_DEFAULT_TTL = env.int('CACHE_TAGS_DEFAULT_TTL', default=300)
+CACHE_TAGS_LOCAL_MAX_ENTRIES = env.int('CACHE_TAGS_LOCAL_MAX_ENTRIES', default=512)
+# Proteção contra stampede: por quanto tempo uma entrada expirada ainda é servida enquanto
+# é recalculada, tempo máximo do lease/espera pelo cálculo e fator do recálculo antecipado (0 desliga)
+CACHE_TAGS_STALE_TTL = env.int('CACHE_TAGS_STALE_TTL', default=60)
+CACHE_TAGS_LOCK_TIMEOUT = env.int('CACHE_TAGS_LOCK_TIMEOUT', default=10)
+CACHE_TAGS_EARLY_REFRESH_BETA = env.float('CACHE_TAGS_EARLY_REFRESH_BETA', default=1.0)
+
+# Idempotency-Key (service_platform.idempotency): validade das respostas guardadas
+IDEMPOTENCY_TTL = env.int('IDEMPOTENCY_TTL', default=24 * 60 * 60)
+IDEMPOTENCY_LOCK_TIMEOUT = env.int('IDEMPOTENCY_LOCK_TIMEOUT', default=60)
+
+# Notificações em tempo real (services.realtime); use RedisBroker com vários workers/nós
+NOTIFICATION_BROKER = env('NOTIFICATION_BROKER', default='services.realtime.LocalBroker')
+NOTIFICATION_BROKER_URL = env('NOTIFICATION_BROKER_URL', default=CELERY_BROKER_URL)
+NOTIFICATION_STREAM_HEARTBEAT = env.int('NOTIFICATION_STREAM_HEARTBEAT', default=15)
+NOTIFICATION_STREAM_MAX_AGE = env.int('NOTIFICATION_STREAM_MAX_AGE', default=300)
+# Validade (segundos) do token do stream (?token=), pedido a cada conexão em /notifications/stream/token/
+NOTIFICATION_STREAM_TOKEN_LIFETIME = env.int('NOTIFICATION_STREAM_TOKEN_LIFETIME', default=60)
+# Validade do contador de não lidas no cache; ao expirar é recalculado no banco
+NOTIFICATION_UNREAD_TTL = env.int('NOTIFICATION_UNREAD_TTL', default=3600)
+
+# Retenção (services.retention): dias por tipo das notificações lidas (0 = manter sempre)
+NOTIFICATION_RETENTION_DAYS = env.dict('NOTIFICATION_RETENTION_DAYS', cast={'value': int}, default={
+    'new_request': 14,
+    'general': 30,
+    'request_accepted': 90,
+    'service_started': 90,
+    'service_completed': 180,
+    'review_received': 180,
+})
+NOTIFICATION_RETENTION_MODE = env('NOTIFICATION_RETENTION_MODE', default='archive')  # archive | delete
+NOTIFICATION_RETENTION_BATCH_SIZE = env.int('NOTIFICATION_RETENTION_BATCH_SIZE', default=1000)
+NOTIFICATION_RETENTION_BATCH_PAUSE = env.float('NOTIFICATION_RETENTION_BATCH_PAUSE', default=0.1)
+NOTIFICATION_ARCHIVE_RETENTION_DAYS = env.int('NOTIFICATION_ARCHIVE_RETENTION_DAYS', default=730)
+
+# Delta sync (services.sync): registros por tipo em cada resposta e validade dos cursores/tombstones
+SYNC_MAX_CHANGES = env.int('SYNC_MAX_CHANGES', default=500)
+SYNC_TOMBSTONE_RETENTION_DAYS = env.int('SYNC_TOMBSTONE_RETENTION_DAYS', default=30)
+# Prazo para uma transação que alocou um número da sequência terminar (e a réplica alcançá-la):
+# o cursor só avança até os números alocados há mais tempo que isso
+SYNC_SETTLE_SECONDS = env.int('SYNC_SETTLE_SECONDS', default=60)
+
+# Instrumentação de performance (monitoring.middleware.PerformanceMiddleware)
+PERFORMANCE_SERVER_TIMING = env.bool('PERFORMANCE_SERVER_TIMING', default=DEBUG)
+PERFORMANCE_SLOW_REQUEST_MS = env.int('PERFORMANCE_SLOW_REQUEST_MS', default=500)
+PERFORMANCE_PROFILE_SAMPLE_RATE = env.float('PERFORMANCE_PROFILE_SAMPLE_RATE', default=0.0)
+PERFORMANCE_PROFILE_TOKEN = env('PERFORMANCE_PROFILE_TOKEN', default='')
+PERFORMANCE_PROFILE_DIR = env('PERFORMANCE_PROFILE_DIR', default=str(BASE_DIR / 'profiles'))
+
+# Métricas (monitoring.metrics), agregadas entre processos via arquivos em METRICS_DIR.
+# Pode ser um volume compartilhado entre containers (os arquivos levam o host e cada host
+# compacta só os seus); apague-o no deploy para zerar os contadores.
+METRICS_ENABLED = env.bool('METRICS_ENABLED', default=True)
+METRICS_DIR = env('METRICS_DIR', default=str(BASE_DIR / 'metrics'))
+METRICS_FLUSH_INTERVAL = env.float('METRICS_FLUSH_INTERVAL', default=5)
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+METRICS_ALLOWED_IPS = env.list('METRICS_ALLOWED_IPS', default=['127.0.0.1', '::1'])
+METRICS_TRUST_X_FORWARDED_FOR = env.bool('METRICS_TRUST_X_FORWARDED_FOR', default=False)
+
+# Registro de queries lentas (monitoring.slow_queries)
+SLOW_QUERY_ENABLED = env.bool('SLOW_QUERY_ENABLED', default=True)
+SLOW_QUERY_THRESHOLD_MS = env.int('SLOW_QUERY_THRESHOLD_MS', default=200)
+SLOW_QUERY_EXPLAIN_ANALYZE = env.bool('SLOW_QUERY_EXPLAIN_ANALYZE', default=False)
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
@@ -257,5 +425,15 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'monitoring': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'uploads': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
@@ -0,0 +1,207 @@
+"""
+Throttling por token bucket, com o estado compartilhado entre os workers.
+
+Cada chave (escopo + usuário ou IP) tem um balde com capacidade N que é
+reabastecido continuamente à taxa N/período (formato do DRF, ex: '100/min').
+A verificação consome um token num único comando atômico no store definido
+em THROTTLE_STORE:
+
+- service_platform.throttling.LocalBucketStore: memória do processo (testes,
+  runserver);
+- service_platform.throttling.RedisBucketStore: script Lua no Redis, válido
+  para todos os workers e nós.
+
+Classes usadas no REST_FRAMEWORK: AnonBucketThrottle (anônimos, por IP),
+UserBucketThrottle (por usuário; anônimos por IP) e ScopedBucketThrottle
+(limite adicional por endpoint, pelo atributo throttle_scope da view).
+"""
+import logging
+import math
+import threading
+import time
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from monitoring import metrics
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Retorna {permitido (0/1), espera em segundos}; o horário é o do Redis, igual para todos os workers
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(wait)}
+"""
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """'100/min' → (capacidade, tokens por segundo)"""
+    try:
+        count, period = rate.split('/')
+        capacity = int(count)
+        seconds = PERIODS[period[0]]
+    except (ValueError, KeyError, IndexError):
+        raise ImproperlyConfigured(f'Taxa de throttling inválida: {rate!r}')
+    return capacity, capacity / seconds
+
+
+class LocalBucketStore:
+    """Baldes em memória do processo (cada worker com seus próprios limites)"""
+
+    # Baldes cheios há muito tempo são descartados quando o dicionário cresce
+    MAX_BUCKETS = 100000
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {}
+
+    def consume(self, key, capacity, rate, cost=1):
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= cost:
+                self.buckets[key] = (tokens - cost, now)
+                allowed, wait = True, 0.0
+            else:
+                self.buckets[key] = (tokens, now)
+                allowed, wait = False, (cost - tokens) / rate
+            if len(self.buckets) > self.MAX_BUCKETS:
+                self.prune(now)
+        return allowed, wait
+
+    def prune(self, now):
+        self.buckets = {
+            key: (tokens, updated) for key, (tokens, updated) in self.buckets.items()
+            if now - updated < 3600
+        }
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class RedisBucketStore:
+    """Baldes no Redis, atualizados atomicamente por um script Lua"""
+
+    def __init__(self, url=None):
+        self.url = url or settings.THROTTLE_REDIS_URL or 'redis://localhost:6379/0'
+        self.client = redis.Redis.from_url(self.url, socket_timeout=0.5)
+        self.script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def consume(self, key, capacity, rate, cost=1):
+        try:
+            allowed, wait = self.script(keys=[f'throttle:{key}'], args=[capacity, rate, cost])
+        except redis.RedisError as e:
+            # Sem o Redis as requisições não são bloqueadas
+            logger.warning(f'Throttling indisponível: {str(e)}')
+            return True, 0.0
+        return bool(allowed), float(wait)
+
+
+@lru_cache(maxsize=None)
+def get_store():
+    """Store configurado em THROTTLE_STORE (um por processo)"""
+    return import_string(settings.THROTTLE_STORE)()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Base: subclasses definem o escopo e a identificação (get_ident_key)"""
+
+    scope = None
+
+    def get_scope(self, view):
+        return self.scope
+
+    def get_ident_key(self, request):
+        """Identificação do cliente no balde; None dispensa o throttling"""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.wait_time = None
+        if not settings.THROTTLE_ENABLED:
+            return True
+        scope = self.get_scope(view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope) if scope else None
+        ident = self.get_ident_key(request)
+        if rate is None or ident is None:
+            return True
+
+        capacity, refill_rate = parse_rate(rate)
+        allowed, wait = get_store().consume(f'{scope}:{ident}', capacity, refill_rate)
+        if not allowed:
+            self.wait_time = wait
+            metrics.inc('throttled_requests_total', (scope,))
+        return allowed
+
+    def wait(self):
+        return math.ceil(self.wait_time) if self.wait_time else None
+
+    def user_or_ip(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return f'user:{user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+
+class AnonBucketThrottle(TokenBucketThrottle):
+    """Requisições anônimas, por IP (taxa 'anon')"""
+
+    scope = 'anon'
+
+    def get_ident_key(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return None
+        return f'ip:{self.get_ident(request)}'
+
+
+class UserBucketThrottle(TokenBucketThrottle):
+    """Por usuário autenticado (anônimos por IP), taxa 'user'"""
+
+    scope = 'user'
+
+    def get_ident_key(self, request):
+        return self.user_or_ip(request)
+
+
+class ScopedBucketThrottle(TokenBucketThrottle):
+    """Limite por endpoint: a view define throttle_scope (taxa de mesmo nome)"""
+
+    def get_scope(self, view):
+        return self.scope or getattr(view, 'throttle_scope', None)
+
+    def get_ident_key(self, request):
+        return self.user_or_ip(request)
+
+
+class StatisticsBucketThrottle(ScopedBucketThrottle):
+    """Endpoints de estatísticas (agregações caras), taxa 'statistics'"""
+
+    scope = 'statistics'
@@ -14,11 +14,15 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from uploads.views import serve_media
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     
@@ -26,9 +30,21 @@ urlpatterns = [
     path('api/auth/', include('accounts.urls')),
     path('api/accounts/', include('accounts.urls')),
     path('api/', include('services.urls')),
+    path('api/uploads/', include('uploads.urls')),
+
+    # Variantes assíncronas (ASGI) dos endpoints de leitura, com as mesmas rotas
+    path('api/async/auth/', include('accounts.async_urls')),
+    path('api/async/', include('services.async_urls')),
+
+    # Endpoints internos (métricas)
+    path('internal/', include('monitoring.urls')),
+]
+
+# Arquivos de mídia com controle de acesso (em produção a transferência é feita pelo nginx)
+urlpatterns += [
+    re_path(rf'^{re.escape(settings.MEDIA_URL.lstrip("/"))}(?P<path>.+)$', serve_media, name='media'),
 ]
 
-# Servir arquivos de mídia durante o desenvolvimento
+# Servir arquivos estáticos durante o desenvolvimento
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import ServiceRequest, ServiceAssignment, ServiceReview, Notification
+from .models import ServiceRequest, ServiceAssignment, ServiceReview, Notification, NotificationArchive
+from .sync import next_sequence
 
 
 @admin.register(ServiceRequest)
@@ -124,11 +125,28 @@ class NotificationAdmin(admin.ModelAdmin):
     actions = ['mark_as_read', 'mark_as_unread']
     
     def mark_as_read(self, request, queryset):
-        queryset.update(is_read=True)
+        queryset.update(is_read=True, change_seq=next_sequence())
         self.message_user(request, f"{queryset.count()} notificações marcadas como lidas.")
     mark_as_read.short_description = "Marcar como lidas"
     
     def mark_as_unread(self, request, queryset):
-        queryset.update(is_read=False)
+        queryset.update(is_read=False, change_seq=next_sequence())
         self.message_user(request, f"{queryset.count()} notificações marcadas como não lidas.")
     mark_as_unread.short_description = "Marcar como não lidas"
+
+
+@admin.register(NotificationArchive)
+class NotificationArchiveAdmin(admin.ModelAdmin):
+    """Admin para notificações arquivadas (somente leitura)"""
+    
+    list_display = ('title', 'user', 'notification_type', 'created_at', 'archived_at')
+    list_filter = ('notification_type', 'archived_at')
+    search_fields = ('title', 'user__username')
+    date_hierarchy = 'created_at'
+    raw_id_fields = ('user', 'related_service_request')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
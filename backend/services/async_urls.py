@@ -0,0 +1,9 @@
+from django.urls import path
+from . import async_views
+
+app_name = 'services_async'
+
+urlpatterns = [
+    path('reviews/provider/<int:provider_id>/', async_views.provider_reviews, name='provider_reviews'),
+    path('notifications/', async_views.notification_list, name='notification_list'),
+]
@@ -0,0 +1,119 @@
+"""
+Variantes assíncronas (ASGI) das views de leitura de services/views.py.
+As respostas são idênticas às das views síncronas; veja service_platform/async_api.py.
+"""
+import asyncio
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from accounts.models import ProviderProfile
+from service_platform.async_api import api_view, generic_view, is_asgi, paginate, render
+from .models import Notification
+from .realtime import get_broker
+from .serializers import NotificationSerializer, ServiceReviewSerializer
+from .views import NotificationListView, provider_reviews_queryset
+
+logger = logging.getLogger(__name__)
+
+
+@api_view()
+async def notification_list(request):
+    """View assíncrona para listar notificações do usuário"""
+    view = generic_view(NotificationListView, request)
+    queryset = view.filter_queryset(view.get_queryset())
+    page = await paginate(request, queryset)
+
+    serializer = view.get_serializer(page.items, many=True)
+    return render(request, page.response_data({
+        'notifications': serializer.data,
+        'total': page.count,
+        'totalPages': page.num_pages
+    }))
+
+
+@api_view()
+async def provider_reviews(request, provider_id):
+    """View assíncrona para listar avaliações de um prestador específico"""
+    logger.info(f"Getting reviews for provider {provider_id}")
+
+    try:
+        provider_profile = await ProviderProfile.objects.aget(id=provider_id)
+        context = {'request': request}
+        queryset = provider_reviews_queryset(provider_profile, ServiceReviewSerializer(context=context))
+        reviews = [review async for review in queryset]
+
+        serializer = ServiceReviewSerializer(reviews, many=True, context=context)
+        return render(request, serializer.data)
+
+    except ProviderProfile.DoesNotExist:
+        logger.error(f"Provider profile {provider_id} not found")
+        return render(request, {'error': 'Prestador não encontrado.'}, status=404)
+    except Exception as e:
+        logger.error(f"Error getting provider reviews: {str(e)}")
+        return render(request, {'error': 'Erro ao buscar avaliações.'}, status=500)
+
+
+def format_event(data):
+    """Evento SSE de notificação (o id permite retomar pelo Last-Event-ID)"""
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    return f'id: {data["id"]}\nevent: notification\ndata: {payload}\n\n'
+
+
+@api_view(token_param='token')
+async def notification_stream(request):
+    """
+    View de stream (Server-Sent Events) das notificações do usuário.
+    Requer o servidor em modo ASGI; o token de /notifications/stream/token/
+    pode ser enviado em ?token=.
+    """
+    if not is_asgi(request):
+        # Sob WSGI a resposta seria bufferizada inteira, prendendo um worker síncrono até max_age
+        return render(request, {'error': 'Stream de notificações indisponível neste servidor.'}, status=501)
+
+    user_id = request.user.id
+    last_event_id = request.headers.get('Last-Event-ID') or request.query_params.get('last_event_id')
+    try:
+        last_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_id = None
+
+    heartbeat = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', 15)
+    max_age = getattr(settings, 'NOTIFICATION_STREAM_MAX_AGE', 300)
+
+    async def events():
+        broker = get_broker()
+        # Assina antes de buscar as perdidas, para não haver intervalo sem cobertura
+        subscription = broker.subscribe(user_id)
+        deadline = time.monotonic() + max_age
+        sent_up_to = last_id or 0
+        try:
+            yield f'retry: {getattr(settings, "NOTIFICATION_STREAM_RETRY_MS", 3000)}\n\n'
+            if last_id is not None:
+                missed = Notification.objects.filter(user_id=user_id, id__gt=last_id).order_by('id')[:100]
+                async for notification in missed:
+                    data = NotificationSerializer(notification).data
+                    sent_up_to = max(sent_up_to, data['id'])
+                    yield format_event(data)
+
+            while time.monotonic() < deadline and not subscription.overflowed:
+                try:
+                    data = await subscription.get(timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    # Mantém a conexão aberta em proxies e detecta clientes desconectados
+                    yield ': keep-alive\n\n'
+                    continue
+                if data['id'] > sent_up_to:
+                    sent_up_to = data['id']
+                    yield format_event(data)
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Desativa o buffer do nginx para o stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
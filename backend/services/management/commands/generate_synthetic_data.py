@@ -0,0 +1,560 @@
+import json
+import os
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from accounts.models import ProviderProfile, ServiceCategory
+from service_platform.caching import invalidate
+from services.models import ServiceRequest, ServiceAssignment, ServiceReview, Notification, SyncSequence
+from services.sync import next_sequence
+
+User = get_user_model()
+
+DEFAULT_CATEGORIES = [
+    'Limpeza', 'Elétrica', 'Encanamento', 'Pintura', 'Jardinagem', 'Marcenaria',
+    'Climatização', 'Serviços Gerais', 'Tecnologia', 'Cuidador', 'Pet Care', 'Delivery',
+]
+
+# Cidades em ordem de popularidade; o peso de cada uma segue uma distribuição de Zipf
+CITIES = [
+    ('São Paulo', 'SP'), ('Rio de Janeiro', 'RJ'), ('Belo Horizonte', 'MG'), ('Curitiba', 'PR'),
+    ('Porto Alegre', 'RS'), ('Florianópolis', 'SC'), ('Blumenau', 'SC'), ('Joinville', 'SC'),
+    ('Campinas', 'SP'), ('Salvador', 'BA'), ('Recife', 'PE'), ('Fortaleza', 'CE'),
+    ('Goiânia', 'GO'), ('Brasília', 'DF'), ('Gaspar', 'SC'), ('Pomerode', 'SC'),
+    ('Itajaí', 'SC'), ('Balneário Camboriú', 'SC'), ('Santos', 'SP'), ('Niterói', 'RJ'),
+]
+
+FIRST_NAMES = [
+    'Ana', 'João', 'Maria', 'Pedro', 'Juliana', 'Lucas', 'Fernanda', 'Gabriel', 'Camila', 'Rafael',
+    'Beatriz', 'Gustavo', 'Larissa', 'Felipe', 'Mariana', 'Bruno', 'Patrícia', 'Thiago', 'Aline', 'Diego',
+]
+
+LAST_NAMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa', 'Rodrigues', 'Almeida', 'Nascimento',
+    'Ferreira', 'Carvalho', 'Gomes', 'Martins', 'Araújo', 'Ribeiro', 'Schmitt', 'Müller', 'Rocha', 'Barbosa',
+]
+
+TITLE_TEMPLATES = [
+    'Preciso de {category} urgente', 'Orçamento para {category}', '{category} em apartamento',
+    '{category} na casa de praia', 'Serviço de {category} no fim de semana', '{category} residencial',
+]
+
+REQUEST_STATUS_WEIGHTS = [
+    ('pending', 35), ('accepted', 10), ('in_progress', 10), ('completed', 38), ('cancelled', 7),
+]
+
+PRIORITY_WEIGHTS = [('low', 20), ('medium', 50), ('high', 22), ('urgent', 8)]
+
+RATING_WEIGHTS = [(1, 3), (2, 4), (3, 10), (4, 30), (5, 53)]
+
+# Status da atribuição correspondente a cada status da solicitação
+ASSIGNMENT_STATUS = {
+    'accepted': 'assigned',
+    'in_progress': 'started',
+    'completed': 'completed',
+}
+
+
+def zipf_cum_weights(size, exponent=1.1):
+    """Pesos cumulativos de Zipf para uso com random.choices"""
+    return list(accumulate(1 / (rank + 1) ** exponent for rank in range(size)))
+
+
+def split_weights(pairs):
+    """Separa [(valor, peso)] em (valores, pesos cumulativos)"""
+    values = [value for value, _ in pairs]
+    return values, list(accumulate(weight for _, weight in pairs))
+
+
+def copy_value(value):
+    """Formata um valor no formato texto do COPY do PostgreSQL"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, timedelta):
+        return f'{value.total_seconds()} seconds'
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        value = json.dumps(value, ensure_ascii=False)
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def auto_timestamp_fields(model):
+    """Campos com auto_now/auto_now_add, preenchidos pelo Django com o horário atual"""
+    return [
+        field.attname
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+
+
+class DatabaseSink:
+    """Grava os lotes diretamente no banco com bulk_create"""
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+
+    def write(self, model, rows):
+        if not rows:
+            return
+        objects = [model(**row) for row in rows]
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+        # O bulk_create grava auto_now/auto_now_add com o horário atual; as datas
+        # geradas são regravadas em seguida (bulk_update não passa pelo pre_save)
+        timestamps = [name for name in auto_timestamp_fields(model) if name in rows[0]]
+        if timestamps:
+            for obj, row in zip(objects, rows):
+                for name in timestamps:
+                    setattr(obj, name, row[name])
+            model.objects.bulk_update(objects, timestamps, batch_size=self.batch_size)
+
+    @contextmanager
+    def batch(self):
+        with transaction.atomic():
+            yield
+
+    def close(self, models):
+        # No PostgreSQL os IDs foram definidos explicitamente; ajusta as sequências
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+
+class CopySink:
+    """Gera arquivos no formato do COPY do PostgreSQL e um script load.sql"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.files = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, model, rows):
+        if not rows:
+            return
+        fields = model._meta.concrete_fields
+        table = model._meta.db_table
+        if table not in self.files:
+            self.files[table] = (
+                model,
+                open(os.path.join(self.directory, f'{table}.copy'), 'w', encoding='utf-8')
+            )
+        file = self.files[table][1]
+        defaults = {field.attname: field.get_default() for field in fields}
+        for row in rows:
+            file.write('\t'.join(
+                copy_value(row[field.attname] if field.attname in row else defaults[field.attname])
+                for field in fields
+            ))
+            file.write('\n')
+
+    @contextmanager
+    def batch(self):
+        yield
+
+    def close(self, models):
+        ordered = [model for model in models if model._meta.db_table in self.files]
+        with open(os.path.join(self.directory, 'load.sql'), 'w', encoding='utf-8') as script:
+            script.write('-- Execute com: psql "$DATABASE_URL" -f load.sql (a partir deste diretório)\n')
+            script.write('BEGIN;\n')
+            for model in ordered:
+                table = model._meta.db_table
+                columns = ', '.join(f'"{field.column}"' for field in model._meta.concrete_fields)
+                script.write(f"\\copy \"{table}\" ({columns}) FROM '{table}.copy'\n")
+            for model in ordered:
+                table = model._meta.db_table
+                pk = model._meta.pk.column
+                script.write(
+                    f"SELECT setval(pg_get_serial_sequence('\"{table}\"', '{pk}'), "
+                    f"(SELECT COALESCE(MAX(\"{pk}\"), 1) FROM \"{table}\"));\n"
+                )
+            script.write('COMMIT;\n')
+        for _, file in self.files.values():
+            file.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera dados sintéticos realistas (e reproduzíveis pela semente) para testes '
+        'de carga e capacidade'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help='Semente do gerador aleatório')
+        parser.add_argument('--clients', type=int, default=10000, help='Quantidade de clientes')
+        parser.add_argument('--providers', type=int, default=2000, help='Quantidade de prestadores')
+        parser.add_argument('--requests', type=int, default=100000, help='Quantidade de solicitações de serviço')
+        parser.add_argument(
+            '--fanout',
+            type=int,
+            default=3,
+            help='Notificações de nova solicitação enviadas a prestadores por solicitação'
+        )
+        parser.add_argument(
+            '--review-rate',
+            type=float,
+            default=0.6,
+            help='Fração dos serviços concluídos que recebem avaliação'
+        )
+        parser.add_argument('--days', type=int, default=365, help='Janela de tempo coberta pelos dados')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Linhas por lote de escrita')
+        parser.add_argument(
+            '--password',
+            type=str,
+            default='senha123',
+            help='Senha de todos os usuários gerados (o hash é calculado uma única vez)'
+        )
+        parser.add_argument(
+            '--prefix',
+            type=str,
+            default='synth',
+            help='Prefixo dos usernames gerados'
+        )
+        parser.add_argument(
+            '--copy-dir',
+            type=str,
+            default=None,
+            help=(
+                'Em vez de gravar no banco, gera arquivos COPY do PostgreSQL neste diretório, '
+                'para carregar em um banco vazio (o banco local não é lido nem alterado)'
+            )
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.days = max(options['days'], 1)
+        self.batch_size = max(options['batch_size'], 1)
+
+        self.copy_mode = bool(options['copy_dir'])
+        generated = [
+            User, ProviderProfile, ProviderProfile.service_categories.through,
+            ServiceRequest, ServiceAssignment, ServiceReview, Notification,
+        ]
+        models = [ServiceCategory, SyncSequence, *generated]
+        if self.copy_mode:
+            sink = CopySink(options['copy_dir'])
+            self.stdout.write(f'Gerando arquivos COPY em {options["copy_dir"]}')
+            # Os arquivos são carregados em outro banco, vazio: os IDs (e as categorias
+            # e números da sequência de alterações, também nos arquivos) começam em 1
+            self.next_ids = dict.fromkeys(models, 1)
+            categories = self.default_categories(sink)
+        else:
+            sink = DatabaseSink(self.batch_size)
+            self.next_ids = {
+                model: (model.objects.aggregate(max_id=Max('pk'))['max_id'] or 0) + 1
+                for model in generated
+            }
+            categories = self.ensure_categories()
+
+        password = make_password(options['password'])
+        client_ids = self.generate_users(
+            sink, options['clients'], 'client', password, options['prefix']
+        )
+        provider_ids = self.generate_users(
+            sink, options['providers'], 'provider', password, options['prefix']
+        )
+        if not client_ids:
+            raise CommandError('É necessário gerar ao menos um cliente.')
+        providers_by_category = self.generate_provider_profiles(sink, provider_ids, categories)
+        self.generate_requests(
+            sink,
+            options['requests'],
+            client_ids,
+            categories,
+            providers_by_category,
+            fanout=options['fanout'],
+            review_rate=options['review_rate']
+        )
+
+        sink.close(models)
+        if not self.copy_mode:
+            # Gravação em lote, sem os sinais que invalidam o cache (accounts.signals)
+            invalidate('provider:*', 'category:*')
+        self.stdout.write(self.style.SUCCESS('Dados sintéticos gerados com sucesso!'))
+
+    def allocate_ids(self, model, count):
+        start = self.next_ids[model]
+        self.next_ids[model] = start + count
+        return range(start, start + count)
+
+    def random_datetime(self, after=None):
+        """Data no período, mais concentrada nos dias recentes (crescimento da base)"""
+        age = self.days * (1 - self.rng.random() ** 0.5)
+        moment = self.now - timedelta(days=age)
+        if after is not None and moment < after:
+            moment = after + timedelta(minutes=self.rng.randint(5, 60 * 24 * 3))
+        return min(moment, self.now)
+
+    def allocate_sequence(self, sink):
+        """Número da sequência de alterações (services.sync) para um lote"""
+        if not self.copy_mode:
+            return next_sequence()
+        sequence = self.allocate_ids(SyncSequence, 1)[0]
+        sink.write(SyncSequence, [{'id': sequence, 'allocated_at': self.now}])
+        return sequence
+
+    def default_categories(self, sink):
+        """Categorias padrão incluídas nos arquivos COPY"""
+        ids = self.allocate_ids(ServiceCategory, len(DEFAULT_CATEGORIES))
+        categories = list(zip(ids, DEFAULT_CATEGORIES))
+        sink.write(ServiceCategory, [
+            {'id': category_id, 'name': name, 'description': f'Serviços de {name}', 'created_at': self.now}
+            for category_id, name in categories
+        ])
+        # Embaralha como em ensure_categories
+        self.rng.shuffle(categories)
+        return categories
+
+    def ensure_categories(self):
+        """Usa as categorias ativas existentes, criando as padrão se não houver nenhuma"""
+        categories = list(
+            ServiceCategory.objects.filter(is_active=True).order_by('id').values_list('id', 'name')
+        )
+        if not categories:
+            ServiceCategory.objects.bulk_create(
+                [ServiceCategory(name=name, description=f'Serviços de {name}') for name in DEFAULT_CATEGORIES],
+                ignore_conflicts=True
+            )
+            categories = list(
+                ServiceCategory.objects.filter(is_active=True).order_by('id').values_list('id', 'name')
+            )
+        # Embaralha para que a categoria mais popular não dependa da ordem de cadastro
+        self.rng.shuffle(categories)
+        return categories
+
+    def generate_users(self, sink, count, user_type, password, prefix):
+        """Gera usuários em lotes e retorna os IDs criados"""
+        ids = self.allocate_ids(User, count)
+        city_weights = zipf_cum_weights(len(CITIES))
+        tag = 'c' if user_type == 'client' else 'p'
+
+        for offset in range(0, count, self.batch_size):
+            rows = []
+            for user_id in ids[offset:offset + self.batch_size]:
+                city, state = self.rng.choices(CITIES, cum_weights=city_weights)[0]
+                first_name = self.rng.choice(FIRST_NAMES)
+                last_name = self.rng.choice(LAST_NAMES)
+                joined = self.random_datetime()
+                rows.append({
+                    'id': user_id,
+                    'username': f'{prefix}_{tag}{user_id}',
+                    'email': f'{prefix}_{tag}{user_id}@example.com',
+                    'password': password,
+                    'first_name': first_name,
+                    'last_name': last_name,
+                    'user_type': user_type,
+                    'phone_number': f'+55{self.rng.randint(11, 99)}9{self.rng.randint(10000000, 99999999)}',
+                    'city': city,
+                    'state': state,
+                    'address': f'Rua {self.rng.choice(LAST_NAMES)}, {self.rng.randint(1, 3000)}',
+                    'is_active': True,
+                    'date_joined': joined,
+                    'created_at': joined,
+                    'updated_at': joined,
+                })
+            with sink.batch():
+                sink.write(User, rows)
+            self.stdout.write(f'{user_type}: {min(offset + self.batch_size, count)}/{count}')
+
+        return list(ids)
+
+    def generate_provider_profiles(self, sink, provider_ids, categories):
+        """Gera perfis de prestadores com 1 a 3 categorias cada"""
+        ProfileCategory = ProviderProfile.service_categories.through
+        profile_ids = self.allocate_ids(ProviderProfile, len(provider_ids))
+        category_weights = zipf_cum_weights(len(categories), exponent=0.8)
+        providers_by_category = {category_id: [] for category_id, _ in categories}
+
+        for offset in range(0, len(provider_ids), self.batch_size):
+            profiles = []
+            links = []
+            for user_id, profile_id in zip(
+                provider_ids[offset:offset + self.batch_size],
+                profile_ids[offset:offset + self.batch_size]
+            ):
+                chosen = {
+                    category_id
+                    for category_id, _ in self.rng.choices(
+                        categories, cum_weights=category_weights, k=self.rng.randint(1, 3)
+                    )
+                }
+                created = self.random_datetime()
+                profiles.append({
+                    'id': profile_id,
+                    'user_id': user_id,
+                    'bio': 'Prestador de serviços com experiência comprovada.',
+                    'experience_years': self.rng.randint(0, 30),
+                    'hourly_rate': Decimal(self.rng.randint(30, 250)),
+                    'is_available': self.rng.random() < 0.85,
+                    'rating': Decimal(str(round(self.rng.triangular(2.5, 5.0, 4.6), 2))),
+                    'total_jobs': min(int(self.rng.paretovariate(1.2)) - 1, 5000),
+                    'created_at': created,
+                    'updated_at': created,
+                })
+                for category_id in chosen:
+                    providers_by_category[category_id].append(user_id)
+                    links.append({
+                        'id': self.allocate_ids(ProfileCategory, 1)[0],
+                        'providerprofile_id': profile_id,
+                        'servicecategory_id': category_id,
+                    })
+            with sink.batch():
+                sink.write(ProviderProfile, profiles)
+                sink.write(ProfileCategory, links)
+            self.stdout.write(f'perfis: {min(offset + self.batch_size, len(provider_ids))}/{len(provider_ids)}')
+
+        return {
+            category_id: (ids, zipf_cum_weights(len(ids)))
+            for category_id, ids in providers_by_category.items()
+            if ids
+        }
+
+    def generate_requests(self, sink, count, client_ids, categories, providers_by_category,
+                          fanout, review_rate):
+        """Gera solicitações com suas atribuições, avaliações e notificações, lote a lote"""
+        client_weights = zipf_cum_weights(len(client_ids), exponent=0.7)
+        category_weights = zipf_cum_weights(len(categories), exponent=0.8)
+        city_weights = zipf_cum_weights(len(CITIES))
+        statuses, status_weights = split_weights(REQUEST_STATUS_WEIGHTS)
+        priorities, priority_weights = split_weights(PRIORITY_WEIGHTS)
+        ratings, rating_weights = split_weights(RATING_WEIGHTS)
+
+        request_ids = self.allocate_ids(ServiceRequest, count)
+        for offset in range(0, count, self.batch_size):
+            requests, assignments, reviews, notifications = [], [], [], []
+
+            for request_id in request_ids[offset:offset + self.batch_size]:
+                client_id = self.rng.choices(client_ids, cum_weights=client_weights)[0]
+                category_id, category_name = self.rng.choices(categories, cum_weights=category_weights)[0]
+                city, state = self.rng.choices(CITIES, cum_weights=city_weights)[0]
+                providers = providers_by_category.get(category_id)
+                status = self.rng.choices(statuses, cum_weights=status_weights)[0]
+                if status in ASSIGNMENT_STATUS and not providers:
+                    status = 'pending'
+
+                created = self.random_datetime()
+                budget_min = self.rng.randint(5, 100) * 10
+                title = self.rng.choice(TITLE_TEMPLATES).format(category=category_name.lower())
+                requests.append({
+                    'id': request_id,
+                    'client_id': client_id,
+                    'category_id': category_id,
+                    'title': title,
+                    'description': f'{title}. Detalhes combinados pelo chat.',
+                    'address': f'Rua {self.rng.choice(LAST_NAMES)}, {self.rng.randint(1, 3000)}',
+                    'city': city,
+                    'state': state,
+                    'budget_min': Decimal(budget_min),
+                    'budget_max': Decimal(budget_min * self.rng.choice([1, 2, 3])),
+                    'priority': self.rng.choices(priorities, cum_weights=priority_weights)[0],
+                    'status': status,
+                    'images': [],
+                    'created_at': created,
+                    'updated_at': created,
+                })
+
+                # Fan-out de novas solicitações para prestadores da categoria
+                if providers:
+                    provider_ids, provider_weights = providers
+                    notified = set(self.rng.choices(provider_ids, cum_weights=provider_weights, k=fanout))
+                    for provider_id in notified:
+                        notifications.append(self.notification_row(
+                            provider_id, request_id, 'new_request', 'Nova Solicitação Disponível', title, created
+                        ))
+
+                if status not in ASSIGNMENT_STATUS:
+                    continue
+
+                provider_ids, provider_weights = providers
+                provider_id = self.rng.choices(provider_ids, cum_weights=provider_weights)[0]
+                assigned = self.random_datetime(after=created)
+                started = self.random_datetime(after=assigned) if status != 'accepted' else None
+                completed = self.random_datetime(after=started) if status == 'completed' else None
+                assignment_id = self.allocate_ids(ServiceAssignment, 1)[0]
+                assignments.append({
+                    'id': assignment_id,
+                    'service_request_id': request_id,
+                    'provider_id': provider_id,
+                    'proposed_price': Decimal(self.rng.randint(budget_min // 10, budget_min // 5) * 10),
+                    'estimated_duration': timedelta(hours=self.rng.choice([1, 2, 4, 8, 16])),
+                    'status': ASSIGNMENT_STATUS[status],
+                    'notes': '',
+                    'started_at': started,
+                    'completed_at': completed,
+                    'created_at': assigned,
+                    'updated_at': completed or started or assigned,
+                })
+                notifications.append(self.notification_row(
+                    provider_id, request_id, 'request_accepted', 'Proposta Aceita!', title, assigned
+                ))
+
+                if status != 'completed':
+                    continue
+
+                notifications.append(self.notification_row(
+                    client_id, request_id, 'service_completed', 'Serviço Concluído!', title, completed
+                ))
+                if self.rng.random() < review_rate:
+                    reviewed = self.random_datetime(after=completed)
+                    rating = self.rng.choices(ratings, cum_weights=rating_weights)[0]
+                    reviews.append({
+                        'id': self.allocate_ids(ServiceReview, 1)[0],
+                        'assignment_id': assignment_id,
+                        'reviewer_id': client_id,
+                        'rating': rating,
+                        'comment': '',
+                        'would_recommend': rating >= 4,
+                        'created_at': reviewed,
+                    })
+                    notifications.append(self.notification_row(
+                        provider_id, request_id, 'review_received', 'Avaliação Recebida', title, reviewed
+                    ))
+
+            for row in notifications:
+                row['id'] = self.allocate_ids(Notification, 1)[0]
+
+            # bulk_create/COPY não passam pelo sinal que numera as alterações (services.sync)
+            with sink.batch():
+                change_seq = self.allocate_sequence(sink)
+                for row in (*requests, *assignments, *notifications):
+                    row['change_seq'] = change_seq
+                sink.write(ServiceRequest, requests)
+                sink.write(ServiceAssignment, assignments)
+                sink.write(ServiceReview, reviews)
+                sink.write(Notification, notifications)
+            self.stdout.write(f'solicitações: {min(offset + self.batch_size, count)}/{count}')
+
+    def notification_row(self, user_id, request_id, notification_type, title, message, created):
+        # Notificações antigas têm mais chance de já terem sido lidas
+        age_days = (self.now - created).days
+        return {
+            'user_id': user_id,
+            'title': title,
+            'message': message,
+            'notification_type': notification_type,
+            'is_read': self.rng.random() < min(0.95, 0.2 + age_days / 30),
+            'related_service_request_id': request_id,
+            'created_at': created,
+        }
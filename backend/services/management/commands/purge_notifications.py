@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from services.retention import MODES, purge_notifications
+
+
+class Command(BaseCommand):
+    help = 'Aplica a política de retenção: arquiva ou apaga as notificações lidas expiradas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode',
+            choices=MODES,
+            help='Arquivar ou apagar (padrão: NOTIFICATION_RETENTION_MODE)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Notificações por transação (padrão: NOTIFICATION_RETENTION_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            help='Pausa em segundos entre os lotes'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas conta as notificações que seriam removidas'
+        )
+
+    def handle(self, *args, **options):
+        results = purge_notifications(
+            mode=options['mode'],
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            dry_run=options['dry_run'],
+        )
+        verb = 'seriam removidas' if options['dry_run'] else 'removidas'
+        for notification_type, total in results.items():
+            self.stdout.write(f'{notification_type}: {total} {verb}')
+        self.stdout.write(self.style.SUCCESS(f'Total: {sum(results.values())}'))
@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from services.models import Notification
+from services.notifications import reconcile_unread
+
+
+class Command(BaseCommand):
+    help = 'Recalcula no banco os contadores de notificações não lidas mantidos no cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='users',
+            help='ID do usuário (pode ser repetido)'
+        )
+        parser.add_argument(
+            '--since-hours',
+            type=int,
+            default=24,
+            help='Usuários que receberam notificações nas últimas N horas'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Todos os usuários com notificações'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Usuários recalculados por consulta'
+        )
+
+    def handle(self, *args, **options):
+        if options['users']:
+            user_ids = options['users']
+        else:
+            queryset = Notification.objects.all()
+            if not options['all']:
+                since = timezone.now() - timedelta(hours=options['since_hours'])
+                queryset = queryset.filter(created_at__gte=since)
+            user_ids = list(queryset.order_by().values_list('user_id', flat=True).distinct())
+
+        batch_size = options['batch_size']
+        for start in range(0, len(user_ids), batch_size):
+            reconcile_unread(user_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(f'{len(user_ids)} contadores recalculados.'))
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('services', '0002_notification_user_read_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField(unique=True, verbose_name='ID Original')),
+                ('title', models.CharField(max_length=200, verbose_name='Título')),
+                ('message', models.TextField(verbose_name='Mensagem')),
+                ('notification_type', models.CharField(choices=[('new_request', 'Nova Solicitação Disponível'), ('request_accepted', 'Solicitação Aceita'), ('service_started', 'Serviço Iniciado'), ('service_completed', 'Serviço Concluído'), ('review_received', 'Avaliação Recebida'), ('general', 'Geral')], max_length=20, verbose_name='Tipo de Notificação')),
+                ('created_at', models.DateTimeField(verbose_name='Criada em')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Notificação Arquivada',
+                'verbose_name_plural': 'Notificações Arquivadas',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', True)), fields=['notification_type', 'created_at'], name='notification_retention_idx'),
+        ),
+        migrations.AddField(
+            model_name='notificationarchive',
+            name='related_service_request',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='services.servicerequest', verbose_name='Solicitação Relacionada'),
+        ),
+        migrations.AddField(
+            model_name='notificationarchive',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_notifications', to=settings.AUTH_USER_MODEL, verbose_name='Usuário'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationarchive',
+            index=models.Index(fields=['user', 'created_at'], name='notif_archive_user_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0001_initial'),
+        ('services', '0003_notification_retention'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='servicerequest',
+            name='image_assets',
+            field=models.ManyToManyField(blank=True, related_name='service_requests', to='uploads.imageasset', verbose_name='Imagens Enviadas'),
+        ),
+        migrations.AlterField(
+            model_name='servicerequest',
+            name='images',
+            field=models.JSONField(blank=True, default=list, help_text='Imagens do problema: payload das imagens enviadas (com as variantes) ou URLs externas', verbose_name='Imagens'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('services', '0004_servicerequest_image_assets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncSequence',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+            ],
+            options={
+                'verbose_name': 'Sequência de Sincronização',
+                'verbose_name_plural': 'Sequências de Sincronização',
+            },
+        ),
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.BigIntegerField(db_index=True, verbose_name='Sequência')),
+                ('model', models.CharField(choices=[('request', 'Solicitação de Serviço'), ('assignment', 'Atribuição de Serviço'), ('notification', 'Notificação')], max_length=20, verbose_name='Modelo')),
+                ('object_id', models.BigIntegerField(verbose_name='ID do Registro')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Remoção Sincronizada',
+                'verbose_name_plural': 'Remoções Sincronizadas',
+                'ordering': ['seq'],
+            },
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Sequência de Alteração'),
+        ),
+        migrations.AddField(
+            model_name='serviceassignment',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False, verbose_name='Sequência de Alteração'),
+        ),
+        migrations.AddField(
+            model_name='servicerequest',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False, verbose_name='Sequência de Alteração'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'change_seq'], name='notification_user_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceassignment',
+            index=models.Index(fields=['provider', 'change_seq'], name='assignment_provider_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicerequest',
+            index=models.Index(fields=['client', 'change_seq'], name='request_client_seq_idx'),
+        ),
+        migrations.AddField(
+            model_name='synctombstone',
+            name='user',
+            field=models.ForeignKey(blank=True, db_constraint=False, help_text='Vazio: todos os prestadores (solicitação que estava pendente)', null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Usuário'),
+        ),
+        migrations.AddIndex(
+            model_name='synctombstone',
+            index=models.Index(fields=['user', 'seq'], name='sync_tombstone_user_seq_idx'),
+        ),
+    ]
@@ -99,16 +99,35 @@ class ServiceRequest(models.Model):
         default=list,
         blank=True,
         verbose_name='Imagens',
-        help_text='URLs das imagens relacionadas ao problema'
+        help_text='Imagens do problema: payload das imagens enviadas (com as variantes) ou URLs externas'
+    )
+    
+    image_assets = models.ManyToManyField(
+        'uploads.ImageAsset',
+        blank=True,
+        related_name='service_requests',
+        verbose_name='Imagens Enviadas'
     )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Número da última alteração na sequência global (services.sync)
+    change_seq = models.BigIntegerField(
+        default=0,
+        editable=False,
+        db_index=True,
+        verbose_name='Sequência de Alteração'
+    )
+    
     class Meta:
         verbose_name = 'Solicitação de Serviço'
         verbose_name_plural = 'Solicitações de Serviços'
         ordering = ['-created_at']
+        indexes = [
+            # Delta sync das solicitações do cliente (services.sync)
+            models.Index(fields=['client', 'change_seq'], name='request_client_seq_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.client.get_full_name()}"
@@ -180,10 +199,22 @@ class ServiceAssignment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Número da última alteração na sequência global (services.sync)
+    change_seq = models.BigIntegerField(
+        default=0,
+        editable=False,
+        db_index=True,
+        verbose_name='Sequência de Alteração'
+    )
+    
     class Meta:
         verbose_name = 'Atribuição de Serviço'
         verbose_name_plural = 'Atribuições de Serviços'
         ordering = ['-created_at']
+        indexes = [
+            # Delta sync das atribuições do prestador (services.sync)
+            models.Index(fields=['provider', 'change_seq'], name='assignment_provider_seq_idx'),
+        ]
     
     def __str__(self):
         return f"{self.service_request.title} -> {self.provider.get_full_name()}"
@@ -290,10 +321,144 @@ class Notification(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     
+    # Número da última alteração na sequência global (services.sync)
+    change_seq = models.BigIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Sequência de Alteração'
+    )
+    
     class Meta:
         verbose_name = 'Notificação'
         verbose_name_plural = 'Notificações'
         ordering = ['-created_at']
+        indexes = [
+            # Delta sync das notificações do usuário (services.sync)
+            models.Index(fields=['user', 'change_seq'], name='notification_user_seq_idx'),
+            # Contagem de não lidas (services.notifications.unread_count) sem varrer a tabela
+            models.Index(fields=['user', 'is_read'], name='notification_user_read_idx'),
+            # Busca das notificações lidas expiradas (services.retention)
+            models.Index(
+                fields=['notification_type', 'created_at'],
+                condition=models.Q(is_read=True),
+                name='notification_retention_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.user.username}"
+
+
+class NotificationArchive(models.Model):
+    """Notificações lidas retiradas da tabela principal pela política de retenção"""
+    
+    original_id = models.BigIntegerField(
+        unique=True,
+        verbose_name='ID Original'
+    )
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_notifications',
+        verbose_name='Usuário'
+    )
+    
+    title = models.CharField(
+        max_length=200,
+        verbose_name='Título'
+    )
+    
+    message = models.TextField(
+        verbose_name='Mensagem'
+    )
+    
+    notification_type = models.CharField(
+        max_length=20,
+        choices=Notification.TYPE_CHOICES,
+        verbose_name='Tipo de Notificação'
+    )
+    
+    related_service_request = models.ForeignKey(
+        ServiceRequest,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Solicitação Relacionada'
+    )
+    
+    created_at = models.DateTimeField(verbose_name='Criada em')
+    archived_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        verbose_name = 'Notificação Arquivada'
+        verbose_name_plural = 'Notificações Arquivadas'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='notif_archive_user_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.title} - {self.user_id}"
+
+
+class SyncSequence(models.Model):
+    """Números alocados da sequência global de alterações (services.sync.next_sequence)"""
+    
+    id = models.BigAutoField(primary_key=True)
+    allocated_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        verbose_name = 'Sequência de Sincronização'
+        verbose_name_plural = 'Sequências de Sincronização'
+
+
+class SyncTombstone(models.Model):
+    """Remoção de uma solicitação, atribuição ou notificação, para o delta sync (services.sync)"""
+    
+    MODEL_CHOICES = [
+        ('request', 'Solicitação de Serviço'),
+        ('assignment', 'Atribuição de Serviço'),
+        ('notification', 'Notificação'),
+    ]
+    
+    seq = models.BigIntegerField(
+        db_index=True,
+        verbose_name='Sequência'
+    )
+    
+    model = models.CharField(
+        max_length=20,
+        choices=MODEL_CHOICES,
+        verbose_name='Modelo'
+    )
+    
+    object_id = models.BigIntegerField(
+        verbose_name='ID do Registro'
+    )
+    
+    # Sem constraint: a remoção de um usuário também grava tombstones para ele
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Usuário',
+        help_text='Vazio: todos os prestadores (solicitação que estava pendente)'
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        verbose_name = 'Remoção Sincronizada'
+        verbose_name_plural = 'Remoções Sincronizadas'
+        ordering = ['seq']
+        indexes = [
+            models.Index(fields=['user', 'seq'], name='sync_tombstone_user_seq_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.model} {self.object_id} ({self.seq})"
@@ -0,0 +1,206 @@
+"""
+Criação de notificações internas com publicação em tempo real.
+
+Toda notificação deve ser criada por notify()/notify_many(): além de gravar
+o Notification, o evento é publicado no broker (services.realtime) depois do
+commit da transação, para os usuários conectados ao stream SSE.
+
+O total de não lidas de cada usuário fica num contador no cache, ajustado a
+cada criação/leitura e descartado quando notificações não lidas são
+removidas (sinal post_delete, inclusive em cascata); o COUNT(*) no banco,
+sempre no primário, só é feito quando o contador não existe (primeira
+consulta, cache reiniciado ou expiração após NOTIFICATION_UNREAD_TTL, que
+também corrige eventuais desvios). Ajustes que chegam durante essa contagem
+descartam o valor contado (fill_unread).
+"""
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from monitoring import metrics
+
+from .models import Notification
+from .realtime import get_broker
+from .serializers import NotificationSerializer
+from .sync import next_sequence
+
+logger = logging.getLogger(__name__)
+
+
+def notify(user, title, message, notification_type='general', service_request=None):
+    """Cria uma notificação para o usuário e a publica no stream"""
+    notification = Notification.objects.create(
+        user=user,
+        title=title,
+        message=message,
+        notification_type=notification_type,
+        related_service_request=service_request
+    )
+    publish_on_commit([notification])
+    adjust_unread({user.pk: 1})
+    return notification
+
+
+def notify_many(users, title, message, notification_type='general', service_request=None):
+    """Cria a mesma notificação para vários usuários com um único INSERT"""
+    # bulk_create não dispara pre_save/post_save (services.signals, monitoring.signals)
+    change_seq = next_sequence()
+    notifications = Notification.objects.bulk_create([
+        Notification(
+            user=user,
+            title=title,
+            message=message,
+            notification_type=notification_type,
+            related_service_request=service_request,
+            change_seq=change_seq
+        )
+        for user in users
+    ])
+    metrics.inc('notifications_created_total', (notification_type,), len(notifications))
+    publish_on_commit(notifications)
+    adjust_unread(Counter(notification.user_id for notification in notifications))
+    return notifications
+
+
+def publish_on_commit(notifications):
+    events = [(notification.user_id, NotificationSerializer(notification).data) for notification in notifications]
+    transaction.on_commit(lambda: publish(events))
+
+
+def publish(events):
+    broker = get_broker()
+    for user_id, data in events:
+        try:
+            broker.publish(user_id, dict(data))
+        except Exception as e:
+            logger.error(f'Erro ao publicar notificação {data.get("id")}: {str(e)}')
+
+
+def unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_version_key(user_id):
+    return f'notifications:unread:{user_id}:version'
+
+
+def unread_count(user_id):
+    """Notificações não lidas do usuário (contador no cache, banco apenas no miss)"""
+    key = unread_key(user_id)
+    try:
+        count = cache.get(key)
+    except Exception as e:
+        logger.warning(f'Cache indisponível para o contador de não lidas: {str(e)}')
+        return count_unread(user_id)
+
+    metrics.observe_cache('notifications_unread', count is not None)
+    if count is None or count < 0:
+        count = fill_unread(user_id, stale=count is not None)
+    return count
+
+
+def fill_unread(user_id, stale=False):
+    """
+    Conta no banco e grava o contador, sem sobrescrever um ajuste concorrente.
+
+    Um ajuste commitado depois da contagem encontra o contador ausente e não
+    tem onde ser aplicado; ele incrementa a versão do usuário, e o contador
+    gravado com uma versão diferente da lida antes da contagem é descartado
+    (recalculado na próxima consulta).
+    """
+    key = unread_key(user_id)
+    version_key = unread_version_key(user_id)
+    try:
+        version = cache.get(version_key)
+    except Exception as e:
+        logger.warning(f'Erro ao ler a versão do contador de não lidas: {str(e)}')
+        return count_unread(user_id)
+
+    count = count_unread(user_id)
+    try:
+        if stale:
+            cache.delete(key)
+        # add(): um contador gravado (e possivelmente já ajustado) por outro processo prevalece
+        if cache.add(key, count, settings.NOTIFICATION_UNREAD_TTL) and cache.get(version_key) != version:
+            cache.delete(key)
+    except Exception as e:
+        logger.warning(f'Erro ao gravar o contador de não lidas: {str(e)}')
+    return count
+
+
+def count_unread(user_id):
+    # Sempre no primário: um contador recalculado numa réplica atrasada ficaria gravado até expirar
+    return Notification.objects.using('default').filter(user_id=user_id, is_read=False).count()
+
+
+def adjust_unread(deltas):
+    """
+    Ajusta os contadores ({user_id: delta}) após o commit. Contadores ausentes
+    não são criados: serão calculados no banco na próxima consulta.
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if deltas:
+        transaction.on_commit(lambda: _apply_unread(deltas))
+
+
+def _apply_unread(deltas):
+    for user_id, delta in deltas.items():
+        try:
+            cache.incr(unread_key(user_id), delta)
+        except ValueError:
+            # Sem contador: um fill_unread em andamento pode ter contado antes deste commit
+            _discard_fill(user_id)
+        except Exception as e:
+            # O contador fica defasado até expirar (NOTIFICATION_UNREAD_TTL)
+            logger.warning(f'Erro ao ajustar o contador de não lidas: {str(e)}')
+
+
+def _discard_fill(user_id):
+    version_key = unread_version_key(user_id)
+    try:
+        try:
+            cache.incr(version_key)
+        except ValueError:
+            cache.add(version_key, 1, settings.NOTIFICATION_UNREAD_TTL)
+        # Contador gravado entre o incr que falhou e a nova versão
+        cache.delete(unread_key(user_id))
+    except Exception as e:
+        logger.warning(f'Erro ao descartar o contador de não lidas: {str(e)}')
+
+
+def forget_unread(user_ids):
+    """
+    Remove os contadores após o commit (recalculados na próxima consulta);
+    usado nas remoções, inclusive em cascata, que não passam por adjust_unread.
+    """
+    keys = [unread_key(user_id) for user_id in set(user_ids)]
+    if keys:
+        transaction.on_commit(lambda: _delete_unread(keys))
+
+
+def _delete_unread(keys):
+    try:
+        cache.delete_many(keys)
+    except Exception as e:
+        logger.warning(f'Erro ao remover os contadores de não lidas: {str(e)}')
+
+
+def reconcile_unread(user_ids):
+    """Recalcula no banco e grava no cache os contadores dos usuários informados"""
+    user_ids = set(user_ids)
+    counts = dict.fromkeys(user_ids, 0)
+    counts.update(
+        Notification.objects.filter(user_id__in=user_ids, is_read=False)
+        .values_list('user_id')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    cache.set_many(
+        {unread_key(user_id): count for user_id, count in counts.items()},
+        settings.NOTIFICATION_UNREAD_TTL
+    )
+    return counts
@@ -0,0 +1,142 @@
+"""
+Pub/sub das notificações em tempo real.
+
+As views publicam as notificações criadas (services/notifications.py) e o
+endpoint de stream (SSE) assina o canal do usuário. O broker é definido em
+NOTIFICATION_BROKER:
+
+- services.realtime.LocalBroker: em memória, para um único processo
+  (runserver ou um único worker ASGI);
+- services.realtime.RedisBroker: Redis pub/sub, para vários workers e nós.
+"""
+import asyncio
+import json
+import logging
+import threading
+from functools import lru_cache
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Fila máxima por conexão; um cliente lento demais perde eventos e é
+# reconectado (recupera as notificações pelo Last-Event-ID)
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class Subscription:
+    """Fila de eventos de uma conexão, ligada ao event loop que a consome"""
+
+    def __init__(self, user_id, loop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class LocalBroker:
+    """Broker em memória: entrega os eventos às conexões deste processo"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = {}
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id, asyncio.get_running_loop())
+        with self.lock:
+            self.subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscriptions[subscription.user_id]
+
+    def publish(self, user_id, event):
+        """Publica um evento (dict serializável em JSON) para o usuário"""
+        self.dispatch(user_id, event)
+
+    def dispatch(self, user_id, event):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            # publish() pode ser chamado de uma view síncrona, fora do event loop
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # Event loop já encerrado (conexão abandonada)
+                self.unsubscribe(subscription)
+
+
+class RedisBroker(LocalBroker):
+    """
+    Broker via Redis pub/sub. Cada processo mantém uma única conexão de
+    assinatura (iniciada na primeira conexão SSE) e repassa os eventos
+    recebidos às conexões locais.
+    """
+
+    def __init__(self, url=None, channel=None):
+        super().__init__()
+        self.url = url or getattr(settings, 'NOTIFICATION_BROKER_URL', settings.CELERY_BROKER_URL)
+        self.channel = channel or getattr(settings, 'NOTIFICATION_BROKER_CHANNEL', 'notifications')
+        self.listener = None
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url)
+        return self._client
+
+    def subscribe(self, user_id):
+        subscription = super().subscribe(user_id)
+        if self.listener is None or self.listener.done():
+            self.listener = asyncio.get_running_loop().create_task(self.listen())
+        return subscription
+
+    def publish(self, user_id, event):
+        try:
+            self.client.publish(self.channel, json.dumps({'user_id': user_id, 'event': event}))
+        except Exception as e:
+            logger.error(f'Erro ao publicar notificação no Redis: {str(e)}')
+
+    async def listen(self):
+        while True:
+            client = aioredis.Redis.from_url(self.url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message.get('type') != 'message':
+                            continue
+                        data = json.loads(message['data'])
+                        self.dispatch(data['user_id'], data['event'])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f'Conexão de assinatura do Redis perdida: {str(e)}')
+                await asyncio.sleep(1)
+            finally:
+                await client.aclose()
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    """Broker configurado em NOTIFICATION_BROKER (um por processo)"""
+    broker_class = import_string(getattr(settings, 'NOTIFICATION_BROKER', 'services.realtime.LocalBroker'))
+    return broker_class()
@@ -0,0 +1,128 @@
+"""
+Política de retenção das notificações.
+
+Notificações lidas mais antigas que o prazo do seu tipo
+(NOTIFICATION_RETENTION_DAYS) saem da tabela principal em lotes, cada lote
+numa transação curta, para não manter locks longos: são copiadas para
+NotificationArchive (NOTIFICATION_RETENTION_MODE='archive') ou apenas
+apagadas ('delete'). Notificações não lidas nunca são removidas, então o
+contador de não lidas não é afetado. O arquivo é limpo após
+NOTIFICATION_ARCHIVE_RETENTION_DAYS.
+
+Executada diariamente pelo Celery beat (services.tasks) ou pelo comando
+purge_notifications.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Notification, NotificationArchive
+from .sync import bulk_tombstones
+
+logger = logging.getLogger(__name__)
+
+MODES = ('archive', 'delete')
+
+ARCHIVE_FIELDS = (
+    'id', 'user_id', 'title', 'message', 'notification_type',
+    'related_service_request_id', 'created_at',
+)
+
+
+def expired_notifications(notification_type, days, now):
+    cutoff = now - timedelta(days=days)
+    return Notification.objects.filter(
+        notification_type=notification_type,
+        is_read=True,
+        created_at__lt=cutoff
+    )
+
+
+def purge_notifications(mode=None, batch_size=None, pause=None, dry_run=False, now=None):
+    """
+    Remove (ou arquiva) as notificações lidas expiradas. Retorna a quantidade
+    por tipo, mais 'archive' com os registros removidos do arquivo.
+    """
+    mode = mode or settings.NOTIFICATION_RETENTION_MODE
+    if mode not in MODES:
+        raise ImproperlyConfigured(f'NOTIFICATION_RETENTION_MODE inválido: {mode}')
+    batch_size = batch_size or settings.NOTIFICATION_RETENTION_BATCH_SIZE
+    pause = settings.NOTIFICATION_RETENTION_BATCH_PAUSE if pause is None else pause
+    now = now or timezone.now()
+
+    results = {}
+    for notification_type, days in settings.NOTIFICATION_RETENTION_DAYS.items():
+        if not days:
+            continue
+        queryset = expired_notifications(notification_type, days, now)
+        if dry_run:
+            results[notification_type] = queryset.count()
+            continue
+
+        total = 0
+        while True:
+            removed = purge_batch(queryset, mode, batch_size)
+            total += removed
+            if removed < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+        results[notification_type] = total
+        if total:
+            logger.info(f'{total} notificações "{notification_type}" removidas ({mode})')
+
+    archive_days = settings.NOTIFICATION_ARCHIVE_RETENTION_DAYS
+    if archive_days:
+        archived = NotificationArchive.objects.filter(archived_at__lt=now - timedelta(days=archive_days))
+        results['archive'] = archived.count() if dry_run else purge_archive(archived, batch_size, pause)
+    return results
+
+
+def purge_batch(queryset, mode, batch_size):
+    """Move um lote numa transação própria; retorna o número de notificações removidas"""
+    with transaction.atomic():
+        # Com SKIP LOCKED (PostgreSQL/MySQL) linhas em uso por outras transações ficam para a próxima execução
+        rows = list(
+            queryset.select_for_update(skip_locked=connection.features.has_select_for_update_skip_locked)
+            .order_by('id')
+            .values(*ARCHIVE_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+        if mode == 'archive':
+            NotificationArchive.objects.bulk_create([
+                NotificationArchive(
+                    original_id=row['id'],
+                    user_id=row['user_id'],
+                    title=row['title'],
+                    message=row['message'],
+                    notification_type=row['notification_type'],
+                    related_service_request_id=row['related_service_request_id'],
+                    created_at=row['created_at'],
+                )
+                for row in rows
+            ], ignore_conflicts=True)
+        # Tombstones do delta sync (services.sync) em um só INSERT por lote
+        with bulk_tombstones():
+            Notification.objects.filter(id__in=[row['id'] for row in rows]).delete()
+    return len(rows)
+
+
+def purge_archive(queryset, batch_size, pause):
+    total = 0
+    while True:
+        ids = list(queryset.order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        NotificationArchive.objects.filter(id__in=ids).delete()
+        total += len(ids)
+        if len(ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return total
@@ -1,13 +1,17 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from .models import ServiceRequest, ServiceAssignment, ServiceReview, Notification
+from accounts.category_classifier import suggest_category_id
 from accounts.models import ServiceCategory, ProviderProfile
 from accounts.serializers import UserProfileSerializer, ProviderProfileSerializer
+from service_platform.serializers import DynamicFieldsMixin
+from uploads import images
 
 User = get_user_model()
 
 
-class ServiceRequestSerializer(serializers.ModelSerializer):
+class ServiceRequestSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer para solicitações de serviço"""
     client = UserProfileSerializer(read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
@@ -26,7 +30,23 @@ class ServiceRequestSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         # Definir o cliente como o usuário autenticado
         validated_data['client'] = self.context['request'].user
-        return super().create(validated_data)
+        service_request = super().create(validated_data)
+        self.link_images(service_request)
+        return service_request
+    
+    def update(self, instance, validated_data):
+        service_request = super().update(instance, validated_data)
+        self.link_images(service_request)
+        return service_request
+    
+    def link_images(self, service_request):
+        if hasattr(self, 'image_assets'):
+            images.link_request_images(service_request, self.image_assets)
+    
+    def validate_images(self, value):
+        """Ids de imagens enviadas viram o payload com as variantes"""
+        entries, self.image_assets = images.resolve_images(value)
+        return entries
     
     def validate_category(self, value):
         """Validar se a categoria está ativa"""
@@ -55,9 +75,43 @@ class ServiceRequestCreateSerializer(ServiceRequestSerializer):
             'id', 'category', 'title', 'description', 'address', 'city', 'state',
             'preferred_date', 'budget_min', 'budget_max', 'priority', 'images'
         ]
+        extra_kwargs = {'category': {'required': False}}
+    
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if 'category' not in attrs:
+            # Sem categoria: sugerida pelo classificador a partir do título e da descrição
+            category_id = suggest_category_id(
+                ServiceRequest(title=attrs.get('title', ''), description=attrs.get('description', ''))
+            )
+            category = ServiceCategory.objects.filter(pk=category_id).first() if category_id else None
+            if category is None:
+                raise serializers.ValidationError({'category': 'Informe a categoria do serviço.'})
+            attrs['category'] = category
+        return attrs
+
+
+class PrefetchedCategoryField(serializers.PrimaryKeyRelatedField):
+    """Categoria buscada em context['categories'] (carregadas de uma vez pela view), sem uma query por item"""
+    
+    def to_internal_value(self, data):
+        categories = self.context.get('categories')
+        if categories is None:
+            return super().to_internal_value(data)
+        try:
+            return categories[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class ServiceRequestBatchItemSerializer(ServiceRequestCreateSerializer):
+    """Item da criação em lote: validado como na criação individual, gravado pela view com bulk_create"""
+    category = PrefetchedCategoryField(queryset=ServiceCategory.objects.all())
 
 
-class ServiceRequestListSerializer(serializers.ModelSerializer):
+class ServiceRequestListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer simplificado para listagem de solicitações"""
     client_name = serializers.CharField(source='client.get_full_name', read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
@@ -71,17 +125,17 @@ class ServiceRequestListSerializer(serializers.ModelSerializer):
         ]
 
 
-class ServiceAssignmentSerializer(serializers.ModelSerializer):
+class ServiceAssignmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer para atribuições de serviço"""
     service_request = ServiceRequestSerializer(read_only=True)
-    provider = ProviderProfileSerializer(read_only=True)
+    provider = UserProfileSerializer(read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     
     class Meta:
         model = ServiceAssignment
         fields = [
             'id', 'service_request', 'provider', 'proposed_price', 'estimated_duration',
-            'status', 'status_display', 'notes', 'start_date', 'completion_date',
+            'status', 'status_display', 'notes', 'started_at', 'completed_at',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
@@ -105,39 +159,43 @@ class ServiceAssignmentCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = ServiceAssignment
         fields = ['service_request', 'proposed_price', 'estimated_duration', 'notes']
+        # A unicidade é verificada em validate_service_request, com mensagens próprias
+        extra_kwargs = {'service_request': {'validators': []}}
     
     def create(self, validated_data):
-        # Obter o perfil do prestador do usuário autenticado
-        user = self.context['request'].user
+        # ServiceAssignment.provider é o usuário do prestador
+        validated_data['provider'] = self.context['request'].user
         try:
-            provider_profile = ProviderProfile.objects.get(user=user)
-        except ProviderProfile.DoesNotExist:
-            raise serializers.ValidationError("Usuário não possui perfil de prestador.")
-        
-        validated_data['provider'] = provider_profile
-        return super().create(validated_data)
+            # Savepoint: a proposta concorrente para a mesma solicitação viola a OneToOne
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {'service_request': ["Esta solicitação já recebeu uma proposta."]}
+            )
     
     def validate_service_request(self, value):
         """Validar se a solicitação está disponível para propostas"""
-        if value.status != 'open':
-            raise serializers.ValidationError("Esta solicitação não está mais disponível para propostas.")
-        
-        # Verificar se o prestador já fez uma proposta
         user = self.context['request'].user
-        try:
-            provider_profile = ProviderProfile.objects.get(user=user)
-            if ServiceAssignment.objects.filter(
-                service_request=value,
-                provider=provider_profile
-            ).exists():
-                raise serializers.ValidationError("Você já fez uma proposta para esta solicitação.")
-        except ProviderProfile.DoesNotExist:
+        if not ProviderProfile.objects.filter(user=user).exists():
             raise serializers.ValidationError("Usuário não possui perfil de prestador.")
         
+        if value.status != 'pending':
+            raise serializers.ValidationError("Esta solicitação não está mais disponível para propostas.")
+        
+        # Cada solicitação recebe uma única proposta (ServiceAssignment.service_request é OneToOne)
+        provider_id = ServiceAssignment.objects.filter(
+            service_request=value
+        ).values_list('provider_id', flat=True).first()
+        if provider_id == user.pk:
+            raise serializers.ValidationError("Você já fez uma proposta para esta solicitação.")
+        if provider_id is not None:
+            raise serializers.ValidationError("Esta solicitação já recebeu uma proposta.")
+        
         return value
 
 
-class ServiceReviewSerializer(serializers.ModelSerializer):
+class ServiceReviewSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer para avaliações de serviço"""
     assignment = ServiceAssignmentSerializer(read_only=True)
     reviewer = UserProfileSerializer(read_only=True)
@@ -146,9 +204,9 @@ class ServiceReviewSerializer(serializers.ModelSerializer):
         model = ServiceReview
         fields = [
             'id', 'assignment', 'reviewer', 'rating', 'comment', 'would_recommend',
-            'created_at', 'updated_at'
+            'created_at'
         ]
-        read_only_fields = ['id', 'reviewer', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'reviewer', 'created_at']
     
     def create(self, validated_data):
         # Definir o avaliador como o usuário autenticado
@@ -185,9 +243,11 @@ class ServiceReviewCreateSerializer(ServiceReviewSerializer):
         fields = ['assignment', 'rating', 'comment', 'would_recommend']
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer para notificações"""
-    type_display = serializers.CharField(source='get_type_display', read_only=True)
+    type = serializers.CharField(source='notification_type', read_only=True)
+    type_display = serializers.CharField(source='get_notification_type_display', read_only=True)
+    service_request = serializers.PrimaryKeyRelatedField(source='related_service_request', read_only=True)
     
     class Meta:
         model = Notification
@@ -0,0 +1,101 @@
+"""
+Invalidação do cache (service_platform.caching) das avaliações e
+estatísticas quando solicitações, atribuições e avaliações mudam, e a
+sequência de alterações/tombstones do delta sync (services.sync) e o
+contador de notificações não lidas quando notificações são removidas.
+
+As transições de status (state_machine) gravam com UPDATE direto, sem
+sinais, e chamam invalidate_instance() e next_sequence() explicitamente.
+"""
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from accounts.models import ProviderProfile
+from service_platform.caching import invalidate_on_commit
+
+from .models import Notification, ServiceAssignment, ServiceRequest, ServiceReview
+from .notifications import forget_unread
+from .sync import next_sequence, record_deletion, record_departure
+
+
+def statistics_tag(user_id):
+    return f'stats:user:{user_id}'
+
+
+def assignment_tags(provider_id, client_id):
+    """Estatísticas do prestador e do cliente e as avaliações do prestador"""
+    tags = [statistics_tag(provider_id), statistics_tag(client_id)]
+    # As views de avaliações recebem o id do perfil, as atribuições guardam o usuário
+    profile_id = ProviderProfile.objects.filter(user_id=provider_id).values_list('pk', flat=True).first()
+    if profile_id is not None:
+        tags.append(f'provider:{profile_id}')
+    return tags
+
+
+def invalidate_instance(instance):
+    if isinstance(instance, ServiceRequest):
+        invalidate_on_commit(statistics_tag(instance.client_id))
+        return
+
+    if isinstance(instance, ServiceAssignment):
+        client_id = ServiceRequest.objects.filter(
+            pk=instance.service_request_id
+        ).values_list('client_id', flat=True).first()
+        invalidate_on_commit(*assignment_tags(instance.provider_id, client_id))
+        return
+
+    users = ServiceAssignment.objects.filter(
+        pk=instance.assignment_id
+    ).values_list('provider_id', 'service_request__client_id').first()
+    if users is not None:
+        invalidate_on_commit(*assignment_tags(*users))
+
+
+@receiver(post_save, sender=ServiceRequest, dispatch_uid='services.cache.request_saved')
+@receiver(post_delete, sender=ServiceRequest, dispatch_uid='services.cache.request_deleted')
+@receiver(post_save, sender=ServiceAssignment, dispatch_uid='services.cache.assignment_saved')
+@receiver(post_delete, sender=ServiceAssignment, dispatch_uid='services.cache.assignment_deleted')
+@receiver(post_save, sender=ServiceReview, dispatch_uid='services.cache.review_saved')
+@receiver(post_delete, sender=ServiceReview, dispatch_uid='services.cache.review_deleted')
+def invalidate_on_change(sender, instance, **kwargs):
+    invalidate_instance(instance)
+
+
+@receiver(pre_save, sender=ServiceRequest, dispatch_uid='services.sync.request_saving')
+@receiver(pre_save, sender=ServiceAssignment, dispatch_uid='services.sync.assignment_saving')
+@receiver(pre_save, sender=Notification, dispatch_uid='services.sync.notification_saving')
+def assign_change_sequence(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.change_seq = next_sequence()
+
+
+@receiver(pre_save, sender=ServiceRequest, dispatch_uid='services.sync.request_leaving')
+@receiver(pre_save, sender=ServiceAssignment, dispatch_uid='services.sync.assignment_leaving')
+def record_visibility_loss(sender, instance, raw=False, **kwargs):
+    # Solicitação que sai de pending, atribuição passada a outro prestador
+    if not raw and not instance._state.adding:
+        record_departure(instance)
+
+
+@receiver(post_save, sender=ServiceRequest, dispatch_uid='services.sync.request_saved')
+@receiver(post_save, sender=ServiceAssignment, dispatch_uid='services.sync.assignment_saved')
+@receiver(post_save, sender=Notification, dispatch_uid='services.sync.notification_saved')
+def save_change_sequence(sender, instance, raw=False, update_fields=None, **kwargs):
+    # save(update_fields=[...]) sem change_seq não grava o número atribuído no pre_save
+    if not raw and update_fields is not None and 'change_seq' not in update_fields:
+        sender._default_manager.filter(pk=instance.pk).update(change_seq=instance.change_seq)
+
+
+@receiver(pre_delete, sender=ServiceRequest, dispatch_uid='services.sync.request_deleting')
+@receiver(pre_delete, sender=ServiceAssignment, dispatch_uid='services.sync.assignment_deleting')
+@receiver(pre_delete, sender=Notification, dispatch_uid='services.sync.notification_deleting')
+def record_tombstone(sender, instance, **kwargs):
+    # No pre_delete a atribuição da solicitação ainda existe (cascata)
+    record_deletion(instance)
+
+
+@receiver(post_delete, sender=Notification, dispatch_uid='services.notifications.unread_deleted')
+def forget_unread_on_delete(sender, instance, **kwargs):
+    # Remoções em cascata (usuário, solicitação) não ajustam o contador
+    if not instance.is_read:
+        forget_unread([instance.user_id])
@@ -0,0 +1,89 @@
+"""
+Transições de status de ServiceRequest e ServiceAssignment.
+
+Cada transição é um UPDATE condicional (WHERE id = ... AND status IN
+(origens)) que grava apenas os campos alterados, sem ler e salvar a linha
+inteira. Se outra requisição alterou o status antes, o UPDATE não afeta
+nenhuma linha e TransitionConflict é lançada: entre requisições concorrentes
+apenas uma vence, sem depender de locks na aplicação.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ServiceAssignment, ServiceRequest
+from .signals import invalidate_instance
+from .sync import next_sequence, request_left_pending
+
+# ação: (status de origem permitidos, status de destino)
+TRANSITIONS = {
+    ServiceRequest: {
+        'accept': (('pending',), 'accepted'),
+        'start': (('accepted',), 'in_progress'),
+        'complete': (('accepted', 'in_progress'), 'completed'),
+        'cancel': (('pending', 'accepted'), 'cancelled'),
+    },
+    ServiceAssignment: {
+        # Aceitar a proposta não muda o status da atribuição, mas exige que ela siga ativa
+        'accept': (('assigned',), 'assigned'),
+        'start': (('assigned',), 'started'),
+        'complete': (('assigned', 'started'), 'completed'),
+        'cancel': (('assigned', 'started'), 'cancelled'),
+    },
+}
+
+
+class TransitionConflict(Exception):
+    """O status atual do registro não permite a transição"""
+
+    def __init__(self, instance, action, current_status):
+        self.instance = instance
+        self.action = action
+        self.current_status = current_status
+        super().__init__(
+            f'{instance._meta.verbose_name} {instance.pk}: transição "{action}" '
+            f'não permitida a partir de "{current_status}"'
+        )
+
+
+def transition(instance, action, **values):
+    """
+    Aplica a transição com um único UPDATE condicional e atualiza a instância.
+    values são campos adicionais gravados no mesmo UPDATE (ex: completed_at).
+    """
+    model = type(instance)
+    sources, target = TRANSITIONS[model][action]
+    values = {'status': target, 'updated_at': timezone.now(), 'change_seq': next_sequence(), **values}
+
+    updated = model._default_manager.filter(pk=instance.pk, status__in=sources).update(**values)
+    if not updated:
+        current_status = model._default_manager.filter(pk=instance.pk).values_list('status', flat=True).first()
+        raise TransitionConflict(instance, action, current_status)
+
+    for field, value in values.items():
+        setattr(instance, field, value)
+    # O UPDATE direto não dispara os sinais que invalidam o cache (nem o da sequência, gravada acima)
+    invalidate_instance(instance)
+    if model is ServiceRequest and 'pending' in sources and target != 'pending':
+        # Nem o que registra quem deixa de ver a solicitação (services.sync); em 'cancel' a partir
+        # de accepted o tombstone é redundante, mas inofensivo
+        request_left_pending(instance.pk, values['change_seq'])
+    return instance
+
+
+# As operações abaixo alteram sempre a solicitação antes da atribuição, para que
+# transações concorrentes bloqueiem as linhas na mesma ordem (sem deadlocks).
+
+def accept_assignment(assignment):
+    """Cliente aceita a proposta: solicitação pending → accepted"""
+    with transaction.atomic():
+        transition(assignment.service_request, 'accept')
+        transition(assignment, 'accept')
+    return assignment
+
+
+def complete_assignment(assignment):
+    """Prestador conclui o serviço (solicitação e atribuição → completed)"""
+    with transaction.atomic():
+        transition(assignment.service_request, 'complete')
+        transition(assignment, 'complete', completed_at=timezone.now())
+    return assignment
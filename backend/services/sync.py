@@ -0,0 +1,329 @@
+"""
+Sincronização incremental (delta sync) de solicitações, atribuições e
+notificações.
+
+Toda gravação em ServiceRequest, ServiceAssignment e Notification recebe um
+número da sequência global de alterações (change_seq, indexado junto com o
+dono do registro); as remoções ficam em SyncTombstone com o número da
+sequência e os usuários que viam o registro. Assim GET /api/sync/?since=
+devolve apenas o que mudou depois do cursor, e um cliente sem alterações
+recebe listas vazias.
+
+    save()/create()       sinal pre_save (services.signals)
+    bulk_create/update()  next_sequence() explícito (notify_many, lote,
+                          state_machine, marcar como lidas)
+    delete()              sinal pre_delete -> SyncTombstone
+    deixar de ver         record_departure() -> SyncTombstone (solicitação
+                          que sai de pending, atribuição de outro prestador)
+
+Um prestador só recebe a remoção de solicitações que ele via: as pendentes
+(tombstone para todos os prestadores, gravado quando a solicitação deixa de
+estar pendente ou é removida) e as atribuídas a ele.
+
+O cursor ('<sequência>.<emitido em>') vale por SYNC_TOMBSTONE_RETENTION_DAYS,
+o prazo dos tombstones; com um cursor mais antigo a view responde 410 e o
+cliente recarrega tudo (sem since).
+
+A sequência vem de um INSERT (não bloqueia outras transações) feito na hora
+da gravação, não do commit: uma transação mais lenta pode tornar visível um
+número menor depois que um maior já foi entregue. Por isso o cursor só avança
+até settled_sequence(), o maior número alocado há mais de SYNC_SETTLE_SECONDS
+(cada alocação fica em SyncSequence com a data); as alterações acima dele são
+entregues de novo na próxima sincronização, e o cliente as aplica outra vez
+(upsert por id). Transações que alteram esses modelos, e o atraso da réplica,
+precisam ficar abaixo desse prazo. Nas páginas intermediárias (has_more) o
+cursor leva, depois do número da página, o ponto de retomada calculado na
+primeira página: '<sequência>.<emitido em>.<retomada>'.
+"""
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from service_platform.serializers import optimize_queryset
+
+from .models import Notification, ServiceAssignment, ServiceRequest, SyncSequence, SyncTombstone
+from .serializers import NotificationSerializer, ServiceAssignmentSerializer, ServiceRequestSerializer
+
+TOMBSTONE_MODELS = {
+    ServiceRequest: 'request',
+    ServiceAssignment: 'assignment',
+    Notification: 'notification',
+}
+
+# SyncTombstone.model -> chave na resposta
+RESPONSE_KEYS = {
+    'request': 'requests',
+    'assignment': 'assignments',
+    'notification': 'notifications',
+}
+
+# Tombstones acumulados por bulk_tombstones() (None fora do bloco)
+pending_tombstones = ContextVar('pending_tombstones', default=None)
+
+
+class Cursor:
+    """Posição na sequência de alterações e quando foi emitida"""
+
+    def __init__(self, sequence, issued_at, resume=None):
+        self.sequence = sequence
+        self.issued_at = issued_at
+        # Só nas páginas intermediárias: de onde a sincronização seguinte recomeça
+        self.resume = resume
+
+    @classmethod
+    def parse(cls, value):
+        """Cursor de ?since=; ValueError se inválido"""
+        sequence, _, rest = value.partition('.')
+        issued_at, separator, resume = rest.partition('.')
+        cursor = cls(int(sequence), int(issued_at), int(resume) if separator else None)
+        if cursor.sequence < 0 or cursor.issued_at < 0 or (cursor.resume or 0) < 0:
+            raise ValueError(value)
+        return cursor
+
+    def expired(self, now):
+        return self.issued_at < now - settings.SYNC_TOMBSTONE_RETENTION_DAYS * 24 * 60 * 60
+
+    def __str__(self):
+        if self.resume is None:
+            return f'{self.sequence}.{self.issued_at}'
+        return f'{self.sequence}.{self.issued_at}.{self.resume}'
+
+
+def next_sequence():
+    """Próximo número da sequência global de alterações (a alocação fica em SyncSequence)"""
+    return SyncSequence.objects.create().pk
+
+
+def settled_sequence(now=None):
+    """
+    Maior número alocado há mais de SYNC_SETTLE_SECONDS (0 se nenhum): as
+    transações que o usaram já terminaram, então tudo até ele está visível.
+    """
+    cutoff = (now or timezone.now()) - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+    return SyncSequence.objects.filter(
+        allocated_at__lte=cutoff
+    ).order_by('-pk').values_list('pk', flat=True).first() or 0
+
+
+def tombstone_audience(instance):
+    """(usuários que viam o registro, se todos os prestadores o viam)"""
+    if isinstance(instance, Notification):
+        return [instance.user_id], False
+
+    if isinstance(instance, ServiceAssignment):
+        client_id = ServiceRequest.objects.filter(
+            pk=instance.service_request_id
+        ).values_list('client_id', flat=True).first()
+        return [instance.provider_id, client_id], False
+
+    provider_id = ServiceAssignment.objects.filter(
+        service_request_id=instance.pk
+    ).values_list('provider_id', flat=True).first()
+    return [instance.client_id, provider_id], instance.status == 'pending'
+
+
+def record_deletion(instance):
+    """Grava os tombstones do registro que vai ser removido"""
+    users, providers = tombstone_audience(instance)
+    model = TOMBSTONE_MODELS[type(instance)]
+    tombstones = [
+        SyncTombstone(model=model, object_id=instance.pk, user_id=user_id)
+        for user_id in dict.fromkeys(users) if user_id is not None
+    ]
+    if providers:
+        tombstones.append(SyncTombstone(model=model, object_id=instance.pk, user=None))
+    if isinstance(instance, ServiceAssignment) and instance.provider_id is not None:
+        # Sem a atribuição o prestador deixa de ver a solicitação (salvo se ela estiver pendente)
+        tombstones.append(SyncTombstone(
+            model='request', object_id=instance.service_request_id, user_id=instance.provider_id
+        ))
+    save_tombstones(tombstones)
+
+
+def record_departure(instance):
+    """
+    Tombstones de quem deixa de ver um registro que continua existindo: todos
+    os prestadores quando a solicitação deixa de estar pendente, o prestador
+    anterior quando a atribuição passa para outro. Chamada antes de gravar.
+    """
+    if isinstance(instance, ServiceRequest):
+        if instance.status == 'pending' or not ServiceRequest.objects.filter(
+            pk=instance.pk, status='pending'
+        ).exists():
+            return
+        request_left_pending(instance.pk)
+        return
+
+    previous_provider_id = ServiceAssignment.objects.filter(pk=instance.pk).exclude(
+        provider_id=instance.provider_id
+    ).values_list('provider_id', flat=True).first()
+    if previous_provider_id is not None:
+        save_tombstones([
+            SyncTombstone(model='assignment', object_id=instance.pk, user_id=previous_provider_id),
+            SyncTombstone(model='request', object_id=instance.service_request_id, user_id=previous_provider_id),
+        ])
+
+
+def request_left_pending(request_id, seq=None):
+    """Tombstone para todos os prestadores: a solicitação deixou de estar aberta a propostas"""
+    save_tombstones([SyncTombstone(model='request', object_id=request_id, user=None)], seq)
+
+
+def save_tombstones(tombstones, seq=None):
+    if not tombstones:
+        return
+    buffer = pending_tombstones.get()
+    if buffer is not None:
+        buffer.extend(tombstones)
+        return
+    seq = seq or next_sequence()
+    for tombstone in tombstones:
+        tombstone.seq = seq
+    SyncTombstone.objects.bulk_create(tombstones)
+
+
+@contextmanager
+def bulk_tombstones():
+    """Os tombstones das remoções feitas no bloco são gravados juntos, com um só número de sequência"""
+    buffer = []
+    token = pending_tombstones.set(buffer)
+    try:
+        yield
+    finally:
+        pending_tombstones.reset(token)
+    if buffer:
+        seq = next_sequence()
+        for tombstone in buffer:
+            tombstone.seq = seq
+        SyncTombstone.objects.bulk_create(buffer)
+
+
+def prune_tombstones(now=None):
+    """Remove os tombstones mais antigos que a validade dos cursores; retorna quantos"""
+    cutoff = (now or timezone.now()) - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    deleted, _ = SyncTombstone.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+def prune_sequences(now=None):
+    """
+    Remove as alocações já assentadas, menos a maior delas (a que
+    settled_sequence() devolve); retorna quantas
+    """
+    latest = settled_sequence(now)
+    deleted, _ = SyncSequence.objects.filter(pk__lt=latest).delete()
+    return deleted
+
+
+def visible_requests(user):
+    if user.user_type == 'client':
+        return ServiceRequest.objects.filter(client=user)
+    if user.user_type == 'provider':
+        # Solicitações abertas a propostas e as atribuídas a ele
+        return ServiceRequest.objects.filter(Q(status='pending') | Q(assignment__provider=user))
+    return ServiceRequest.objects.all()
+
+
+def visible_assignments(user):
+    if user.user_type == 'client':
+        return ServiceAssignment.objects.filter(service_request__client=user)
+    if user.user_type == 'provider':
+        return ServiceAssignment.objects.filter(provider=user)
+    return ServiceAssignment.objects.all()
+
+
+def visible_tombstones(user):
+    if user.user_type == 'client':
+        return SyncTombstone.objects.filter(user=user)
+    if user.user_type == 'provider':
+        # Solicitação que voltou a ser visível (pendente de novo ou atribuída a ele) não é removida
+        return SyncTombstone.objects.filter(Q(user=user) | Q(user__isnull=True)).exclude(
+            model='request', object_id__in=visible_requests(user).values('pk')
+        )
+    # Administradores: todas as solicitações e atribuições, só as próprias notificações
+    return SyncTombstone.objects.filter(Q(user=user) | ~Q(model='notification'))
+
+
+def changed_rows(queryset, field, since, limit):
+    """
+    Linhas com <field> > since, em ordem, até limit, sem separar as linhas de
+    um mesmo número (gravadas juntas). Retorna (linhas, truncado).
+    """
+    ordered = queryset.filter(**{f'{field}__gt': since}).order_by(field, 'pk')
+    rows = list(ordered[:limit])
+    if len(rows) < limit:
+        return rows, False
+    last = getattr(rows[-1], field)
+    return list(ordered.filter(**{f'{field}__lte': last})), True
+
+
+def changes_since(user, cursor, context):
+    """
+    Resposta do sync: registros criados/alterados e ids removidos depois do
+    cursor (sem cursor, tudo que o usuário vê), com o próximo cursor.
+    """
+    # Antes das leituras: tudo até esse número já está visível para elas
+    settled = settled_sequence()
+    since = -1 if cursor is None else cursor.sequence
+    limit = settings.SYNC_MAX_CHANGES
+    sources = {
+        'requests': (visible_requests(user), ServiceRequestSerializer),
+        'assignments': (visible_assignments(user), ServiceAssignmentSerializer),
+        'notifications': (Notification.objects.filter(user=user), NotificationSerializer),
+    }
+
+    # Com algum tipo truncado, a resposta vai até o menor número entre os truncados
+    upper = math.inf
+    updated = {}
+    for key, (queryset, serializer_class) in sources.items():
+        queryset = optimize_queryset(queryset, serializer_class(context=context))
+        rows, truncated = changed_rows(queryset, 'change_seq', since, limit)
+        updated[key] = rows
+        if truncated:
+            upper = min(upper, rows[-1].change_seq)
+
+    tombstones = []
+    if cursor is not None:
+        tombstones, truncated = changed_rows(visible_tombstones(user), 'seq', since, limit)
+        if truncated:
+            upper = min(upper, tombstones[-1].seq)
+
+    base = 0 if cursor is None else cursor.sequence
+    sequences = [base]
+    for key, rows in updated.items():
+        updated[key] = [row for row in rows if row.change_seq <= upper]
+        sequences.extend(row.change_seq for row in updated[key])
+    tombstones = [tombstone for tombstone in tombstones if tombstone.seq <= upper]
+    sequences.extend(tombstone.seq for tombstone in tombstones)
+
+    deleted = {key: [] for key in sources}
+    for tombstone in tombstones:
+        deleted[RESPONSE_KEYS[tombstone.model]].append(tombstone.object_id)
+
+    has_more = upper is not math.inf
+    # Uma sequência de páginas recomeça de onde estava assentado na primeira delas
+    resume = cursor.resume if cursor is not None and cursor.resume is not None else max(base, settled)
+    if has_more:
+        # Página intermediária: os tombstones ainda não entregues são do período do cursor anterior
+        issued_at = int(time.time()) if cursor is None else cursor.issued_at
+        next_cursor = Cursor(max(sequences), issued_at, resume)
+    else:
+        # Acima de resume pode haver números menores ainda não confirmados: são lidos de novo
+        next_cursor = Cursor(resume, int(time.time()))
+    response = {
+        'cursor': str(next_cursor),
+        'has_more': has_more,
+    }
+    for key, (queryset, serializer_class) in sources.items():
+        response[key] = {
+            'updated': serializer_class(updated[key], many=True, context=context).data,
+            'deleted': sorted(set(deleted[key])),
+        }
+    return response
+
@@ -0,0 +1,23 @@
+import logging
+
+from celery import shared_task
+
+from . import retention, sync
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='services.tasks.purge_notifications', ignore_result=True)
+def purge_notifications():
+    """Aplica a política de retenção das notificações (agendada no beat)"""
+    results = retention.purge_notifications()
+    logger.info(f'Retenção de notificações: {results}')
+
+
+@shared_task(name='services.tasks.prune_sync_tombstones', ignore_result=True)
+def prune_sync_tombstones():
+    """Remove os tombstones do delta sync mais antigos que a validade dos cursores e as alocações assentadas"""
+    deleted = sync.prune_tombstones()
+    logger.info(f'Tombstones do sync removidos: {deleted}')
+    deleted = sync.prune_sequences()
+    logger.info(f'Alocações da sequência do sync removidas: {deleted}')
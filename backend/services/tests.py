@@ -1,3 +1,626 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import threading
+from collections import Counter
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, Client, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import ProviderProfile, ServiceCategory, User
+from service_platform.idempotency import storage_key
+
+from . import notifications, state_machine
+from .models import Notification, ServiceAssignment, ServiceRequest, ServiceReview, SyncSequence
+from .notifications import notify, unread_count
+from .state_machine import TransitionConflict
+from .sync import next_sequence, prune_sequences, settled_sequence
+
+
+def create_assignment(suffix=''):
+    client = User.objects.create_user(username=f'cliente{suffix}', password='123456', user_type='client')
+    provider = User.objects.create_user(username=f'prestador{suffix}', password='123456', user_type='provider')
+    category = ServiceCategory.objects.create(name=f'Elétrica{suffix}')
+    service_request = ServiceRequest.objects.create(
+        client=client,
+        category=category,
+        title='Trocar tomadas',
+        description='Trocar 3 tomadas da sala',
+        address='Rua A, 123',
+        city='Blumenau',
+        state='SC'
+    )
+    return ServiceAssignment.objects.create(service_request=service_request, provider=provider)
+
+
+def api_client(user):
+    token = RefreshToken.for_user(user).access_token
+    return Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+
+class StateMachineTest(TestCase):
+    """Transições condicionais de status"""
+
+    def setUp(self):
+        self.assignment = create_assignment()
+
+    def test_accept_and_complete(self):
+        state_machine.accept_assignment(self.assignment)
+        state_machine.complete_assignment(self.assignment)
+
+        self.assignment.refresh_from_db()
+        self.assertEqual(self.assignment.status, 'completed')
+        self.assertIsNotNone(self.assignment.completed_at)
+        self.assertEqual(self.assignment.service_request.status, 'completed')
+
+    def test_accept_twice_conflicts(self):
+        state_machine.accept_assignment(self.assignment)
+
+        with self.assertRaises(TransitionConflict) as context:
+            state_machine.accept_assignment(ServiceAssignment.objects.get(pk=self.assignment.pk))
+        self.assertEqual(context.exception.current_status, 'accepted')
+
+    def test_conflict_rolls_back_whole_operation(self):
+        ServiceAssignment.objects.filter(pk=self.assignment.pk).update(status='cancelled')
+
+        with self.assertRaises(TransitionConflict):
+            state_machine.accept_assignment(self.assignment)
+        self.assertEqual(
+            ServiceRequest.objects.get(pk=self.assignment.service_request_id).status,
+            'pending'
+        )
+
+
+class ServiceRequestApiTest(TestCase):
+    """Visibilidade, propostas e permissões em /api/requests/ e /api/assignments/"""
+
+    def setUp(self):
+        self.assignment = create_assignment()
+        self.client_user = self.assignment.service_request.client
+        self.provider = self.assignment.provider
+        ProviderProfile.objects.create(user=self.provider)
+        self.other_provider = User.objects.create_user(username='outro_prestador', password='123456', user_type='provider')
+        ProviderProfile.objects.create(user=self.other_provider)
+        self.open_request = ServiceRequest.objects.create(
+            client=self.client_user,
+            category=self.assignment.service_request.category,
+            title='Instalar chuveiro',
+            description='Chuveiro novo no banheiro',
+            address='Rua A, 123',
+            city='Blumenau',
+            state='SC'
+        )
+
+    def request_ids(self, user):
+        return {row['id'] for row in api_client(user).get('/api/requests/').json()['results']['results']}
+
+    def propose(self, user, service_request):
+        return api_client(user).post(
+            '/api/assignments/', {'service_request': service_request.id, 'proposed_price': '150.00'},
+            content_type='application/json'
+        )
+
+    def test_provider_sees_pending_and_own_requests(self):
+        taken = self.assignment.service_request
+        state_machine.accept_assignment(self.assignment)
+
+        self.assertEqual(self.request_ids(self.provider), {taken.id, self.open_request.id})
+        self.assertEqual(self.request_ids(self.other_provider), {self.open_request.id})
+        with self.assertLogs('django.request', 'WARNING'):
+            response = api_client(self.other_provider).get(f'/api/requests/{taken.id}/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_assignments_are_scoped_to_the_provider(self):
+        response = api_client(self.other_provider).get('/api/assignments/')
+
+        self.assertEqual(response.json()['count'], 0)
+        self.assertEqual(api_client(self.provider).get('/api/assignments/').json()['count'], 1)
+
+    def test_proposal_is_stored_for_the_provider_user(self):
+        response = self.propose(self.other_provider, self.open_request)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ServiceAssignment.objects.get(service_request=self.open_request).provider, self.other_provider)
+
+    def test_request_receives_a_single_proposal(self):
+        with self.assertLogs('django.request', 'WARNING'):
+            own = self.propose(self.provider, self.assignment.service_request)
+            other = self.propose(self.other_provider, self.assignment.service_request)
+
+        self.assertEqual(own.status_code, 400)
+        self.assertEqual(own.json()['service_request'], ['Você já fez uma proposta para esta solicitação.'])
+        self.assertEqual(other.status_code, 400)
+        self.assertEqual(other.json()['service_request'], ['Esta solicitação já recebeu uma proposta.'])
+
+    def test_proposal_requires_provider_profile(self):
+        ProviderProfile.objects.filter(user=self.other_provider).delete()
+
+        with self.assertLogs('django.request', 'WARNING'):
+            response = self.propose(self.other_provider, self.open_request)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ServiceAssignment.objects.filter(service_request=self.open_request).exists())
+
+    def test_only_the_client_updates_or_deletes(self):
+        url = f'/api/requests/{self.open_request.id}/'
+        with self.assertLogs('django.request', 'WARNING'):
+            update = api_client(self.provider).patch(url, {'title': 'Outro'}, content_type='application/json')
+            delete = api_client(self.provider).delete(url)
+
+        self.assertEqual(update.status_code, 403)
+        self.assertEqual(delete.status_code, 403)
+        self.open_request.refresh_from_db()
+        self.assertEqual(self.open_request.title, 'Instalar chuveiro')
+
+    def test_only_pending_requests_are_deleted(self):
+        state_machine.accept_assignment(self.assignment)
+        taken = self.assignment.service_request
+
+        with self.assertLogs('django.request', 'WARNING'):
+            response = api_client(self.client_user).delete(f'/api/requests/{taken.id}/')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(ServiceRequest.objects.filter(pk=taken.id).exists())
+        self.assertEqual(api_client(self.client_user).delete(f'/api/requests/{self.open_request.id}/').status_code, 204)
+
+
+class IdempotencyKeyTest(TestCase):
+    """Idempotency-Key em POST /api/requests/"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='cliente', password='123456', user_type='client')
+        self.category = ServiceCategory.objects.create(name='Elétrica')
+        self.payload = {
+            'category': self.category.id,
+            'title': 'Trocar tomadas',
+            'description': 'Trocar 3 tomadas da sala',
+            'address': 'Rua A, 123',
+            'city': 'Blumenau',
+            'state': 'SC',
+        }
+
+    def post(self, payload, key='chave-1', user=None):
+        return api_client(user or self.user).post(
+            '/api/requests/', payload, content_type='application/json', HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_repeated_request_is_replayed(self):
+        first = self.post(self.payload)
+        second = self.post(self.payload)
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertFalse(first.has_header('Idempotent-Replayed'))
+        self.assertEqual(ServiceRequest.objects.count(), 1)
+
+    def test_key_is_scoped_by_user(self):
+        other = User.objects.create_user(username='outro_cliente', password='123456', user_type='client')
+
+        self.post(self.payload)
+        response = self.post(self.payload, user=other)
+
+        self.assertFalse(response.has_header('Idempotent-Replayed'))
+        self.assertEqual(ServiceRequest.objects.count(), 2)
+
+    def test_reused_key_with_other_body(self):
+        self.post(self.payload)
+
+        with self.assertLogs('django.request', 'WARNING'):
+            response = self.post({**self.payload, 'title': 'Trocar disjuntor'})
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(ServiceRequest.objects.count(), 1)
+
+    def test_request_in_progress_conflicts(self):
+        request = SimpleNamespace(user=self.user, method='POST', path='/api/requests/')
+        cache.add(f'{storage_key(request, "chave-1")}:lock', 'em andamento')
+
+        with self.assertLogs('django.request', 'WARNING'):
+            response = self.post(self.payload)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(ServiceRequest.objects.count(), 0)
+
+
+class UnreadCountTest(TestCase):
+    """Contador de não lidas no cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.assignment = create_assignment()
+        self.client_user = self.assignment.service_request.client
+
+    def test_cascade_delete_drops_counter(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(self.client_user, 'Nova proposta', 'Mensagem', service_request=self.assignment.service_request)
+        self.assertEqual(unread_count(self.client_user.id), 1)
+
+        # A notificação é removida em cascata com a solicitação
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assignment.service_request.delete()
+
+        self.assertEqual(unread_count(self.client_user.id), 0)
+
+    def test_notification_committed_during_count_is_not_lost(self):
+        count_unread = notifications.count_unread
+
+        def racing_count(user_id):
+            count = count_unread(user_id)
+            # Commitada depois da contagem, antes de o contador ser gravado
+            with self.captureOnCommitCallbacks(execute=True):
+                notify(self.client_user, 'Nova proposta', 'Mensagem')
+            return count
+
+        with mock.patch.object(notifications, 'count_unread', racing_count):
+            self.assertEqual(unread_count(self.client_user.id), 0)
+
+        self.assertEqual(unread_count(self.client_user.id), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(self.client_user, 'Outra proposta', 'Mensagem')
+        self.assertEqual(unread_count(self.client_user.id), 2)
+
+
+class NotificationStreamTest(TestCase):
+    """Stream SSE: apenas sob ASGI e com o token de curta duração na query string"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='cliente', password='123456', user_type='client')
+        self.access = str(RefreshToken.for_user(self.user).access_token)
+
+    def test_unavailable_under_wsgi(self):
+        client = api_client(self.user)
+        with self.assertLogs('django.request', 'ERROR'):
+            self.assertEqual(client.post('/api/notifications/stream/token/').status_code, 501)
+            self.assertEqual(client.get('/api/notifications/stream/').status_code, 501)
+
+    @override_settings(NOTIFICATION_STREAM_MAX_AGE=0)
+    async def test_stream_token(self):
+        client = AsyncClient(headers={'Host': 'localhost'})
+        response = await client.post(
+            '/api/notifications/stream/token/', headers={'Authorization': f'Bearer {self.access}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        stream_token = response.json()['token']
+
+        response = await client.get(f'/api/notifications/stream/?token={stream_token}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([chunk async for chunk in response.streaming_content], [b'retry: 3000\n\n'])
+
+        # O JWT de acesso não é aceito na URL, nem o token do stream como Bearer
+        with self.assertLogs('django.request', 'WARNING'):
+            response = await client.get(f'/api/notifications/stream/?token={self.access}')
+            self.assertEqual(response.status_code, 401)
+            response = await client.get(
+                '/api/notifications/unread-count/', headers={'Authorization': f'Bearer {stream_token}'}
+            )
+            self.assertEqual(response.status_code, 401)
+
+
+class AsyncViewsTest(TestCase):
+    """services/async_views.py: mesmas respostas das views síncronas"""
+
+    def setUp(self):
+        cache.clear()
+        self.assignment = create_assignment()
+        self.client_user = self.assignment.service_request.client
+        self.provider = ProviderProfile.objects.create(user=self.assignment.provider)
+        state_machine.accept_assignment(self.assignment)
+        state_machine.complete_assignment(self.assignment)
+        ServiceReview.objects.create(
+            assignment=self.assignment, reviewer=self.client_user, rating=5, comment='Ótimo'
+        )
+        for number in range(3):
+            notify(self.client_user, f'Aviso {number}', 'Mensagem')
+
+    async def get_both(self, path):
+        headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.client_user).access_token}'}
+        sync_response = await sync_to_async(Client(HTTP_HOST='localhost', headers=headers).get)(f'/api/{path}')
+        async_response = await AsyncClient(headers={'Host': 'localhost'}).get(f'/api/async/{path}', headers=headers)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response.json(), sync_response.json())
+        return async_response
+
+    async def test_notification_list(self):
+        data = (await self.get_both('notifications/')).json()
+
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(data['results']['total'], 3)
+        await self.get_both('notifications/?is_read=true')
+
+    async def test_provider_reviews(self):
+        data = (await self.get_both(f'reviews/provider/{self.provider.id}/')).json()
+
+        self.assertEqual([review['comment'] for review in data], ['Ótimo'])
+        with self.assertLogs('django.request', 'WARNING'):
+            self.assertEqual((await self.get_both('reviews/provider/999999/')).status_code, 404)
+
+
+class RequestsByIdsTest(TestCase):
+    """GET /api/requests/?ids=: só as solicitações visíveis a cada tipo de usuário"""
+
+    def setUp(self):
+        self.pending = create_assignment('1')
+        self.private = create_assignment('2')
+        state_machine.accept_assignment(self.private)
+        self.ids = [self.pending.service_request_id, self.private.service_request_id, 999999]
+
+    def get_by_ids(self, user):
+        response = api_client(user).get(f'/api/requests/?ids={",".join(map(str, self.ids))}')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return [row['id'] for row in data['results']], data['missing']
+
+    def test_client_sees_own_requests(self):
+        found, missing = self.get_by_ids(self.pending.service_request.client)
+
+        self.assertEqual(found, [self.pending.service_request_id])
+        self.assertEqual(missing, [self.private.service_request_id, 999999])
+
+    def test_provider_sees_pending_and_assigned_requests(self):
+        found, missing = self.get_by_ids(self.private.provider)
+        self.assertEqual(found, [self.pending.service_request_id, self.private.service_request_id])
+        self.assertEqual(missing, [999999])
+
+        found, missing = self.get_by_ids(self.pending.provider)
+        self.assertEqual(found, [self.pending.service_request_id])
+        self.assertEqual(missing, [self.private.service_request_id, 999999])
+
+    def test_invalid_ids(self):
+        with self.assertLogs('django.request', 'WARNING'):
+            response = api_client(self.pending.provider).get('/api/requests/?ids=1,abc')
+        self.assertEqual(response.status_code, 400)
+
+
+# Sem prazo de assentamento o cursor vai até o último número entregue
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class DeltaSyncTest(TestCase):
+    """GET /api/sync/: cursores e tombstones"""
+
+    def setUp(self):
+        self.assignment = create_assignment()
+        self.service_request = self.assignment.service_request
+        self.other_provider = User.objects.create_user(
+            username='outro_prestador', password='123456', user_type='provider'
+        )
+
+    def sync(self, user, cursor=None, expected_status=200):
+        url = '/api/sync/' if cursor is None else f'/api/sync/?since={cursor}'
+        response = api_client(user).get(url)
+        self.assertEqual(response.status_code, expected_status)
+        return response.json()
+
+    def test_unchanged_cursor_returns_empty_lists(self):
+        data = self.sync(self.service_request.client)
+        self.assertEqual([row['id'] for row in data['requests']['updated']], [self.service_request.id])
+
+        data = self.sync(self.service_request.client, data['cursor'])
+
+        self.assertFalse(data['has_more'])
+        for key in ('requests', 'assignments', 'notifications'):
+            self.assertEqual(data[key], {'updated': [], 'deleted': []})
+
+    def test_invalid_and_expired_cursors(self):
+        with self.assertLogs('django.request', 'WARNING'):
+            self.sync(self.service_request.client, 'abc', expected_status=400)
+            self.sync(self.service_request.client, '1.0', expected_status=410)
+
+    def test_request_leaving_pending_is_removed_for_other_providers(self):
+        cursor = self.sync(self.other_provider)['cursor']
+        provider_cursor = self.sync(self.assignment.provider)['cursor']
+
+        state_machine.accept_assignment(self.assignment)
+
+        data = self.sync(self.other_provider, cursor)
+        self.assertEqual(data['requests'], {'updated': [], 'deleted': [self.service_request.id]})
+        # O prestador escolhido continua vendo a solicitação
+        data = self.sync(self.assignment.provider, provider_cursor)
+        self.assertEqual([row['id'] for row in data['requests']['updated']], [self.service_request.id])
+        self.assertEqual(data['requests']['deleted'], [])
+
+    def test_private_requests_are_not_reported_to_providers(self):
+        cursor = self.sync(self.other_provider)['cursor']
+        private = ServiceRequest.objects.create(
+            client=self.service_request.client,
+            category=self.service_request.category,
+            title='Pintar parede',
+            description='Pintar a parede da sala',
+            address='Rua A, 123',
+            city='Blumenau',
+            state='SC',
+            status='accepted'
+        )
+        private.status = 'completed'
+        private.save()
+
+        data = self.sync(self.other_provider, cursor)
+        self.assertNotIn(private.id, data['requests']['deleted'])
+        self.assertNotIn(private.id, [row['id'] for row in data['requests']['updated']])
+
+    def test_deleted_assignment_is_removed_for_provider_and_client(self):
+        state_machine.accept_assignment(self.assignment)
+        provider = self.assignment.provider
+        client = self.service_request.client
+        provider_cursor = self.sync(provider)['cursor']
+        client_cursor = self.sync(client)['cursor']
+        assignment_id = self.assignment.id
+
+        self.assignment.delete()
+
+        data = self.sync(provider, provider_cursor)
+        self.assertEqual(data['assignments']['deleted'], [assignment_id])
+        self.assertEqual(data['requests']['deleted'], [self.service_request.id])
+        data = self.sync(client, client_cursor)
+        self.assertEqual(data['assignments']['deleted'], [assignment_id])
+        self.assertEqual(data['requests']['deleted'], [])
+
+    @override_settings(SYNC_MAX_CHANGES=1)
+    def test_pages_until_has_more_is_false(self):
+        client = self.service_request.client
+        for index in range(3):
+            notify(client, f'Aviso {index}', 'Mensagem')
+
+        seen = []
+        data = self.sync(client)
+        seen.extend(row['id'] for row in data['notifications']['updated'])
+        while data['has_more']:
+            data = self.sync(client, data['cursor'])
+            seen.extend(row['id'] for row in data['notifications']['updated'])
+
+        self.assertEqual(sorted(seen), sorted(Notification.objects.filter(user=client).values_list('pk', flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def age_allocations(self):
+        SyncSequence.objects.update(allocated_at=timezone.now() - timedelta(seconds=61))
+
+    @override_settings(SYNC_SETTLE_SECONDS=60)
+    def test_lower_sequence_committed_late_is_delivered(self):
+        client = self.service_request.client
+        # Uma transação lenta alocou o número antes da gravação que o cliente já recebeu
+        late_seq = next_sequence()
+        notify(client, 'Aviso', 'Mensagem')
+        cursor = self.sync(client)['cursor']
+
+        late = notify(client, 'Atrasada', 'Mensagem')
+        Notification.objects.filter(pk=late.pk).update(change_seq=late_seq)
+
+        data = self.sync(client, cursor)
+        self.assertIn(late.pk, [row['id'] for row in data['notifications']['updated']])
+
+        # Passado o prazo o cursor alcança a última alocação e a resposta seguinte vem vazia
+        self.age_allocations()
+        data = self.sync(client, self.sync(client, data['cursor'])['cursor'])
+        for key in ('requests', 'assignments', 'notifications'):
+            self.assertEqual(data[key], {'updated': [], 'deleted': []})
+
+    @override_settings(SYNC_SETTLE_SECONDS=60, SYNC_MAX_CHANGES=1)
+    def test_pages_resume_from_the_first_settled_sequence(self):
+        client = self.service_request.client
+        self.age_allocations()
+        settled = settled_sequence()
+        for index in range(2):
+            notify(client, f'Aviso {index}', 'Mensagem')
+
+        data = self.sync(client, f'{settled}.{int(timezone.now().timestamp())}')
+        while data['has_more']:
+            data = self.sync(client, data['cursor'])
+
+        self.assertEqual(data['cursor'].split('.')[0], str(settled))
+
+    def test_prune_keeps_the_settled_allocation(self):
+        first, second = next_sequence(), next_sequence()
+        self.age_allocations()
+        next_sequence()
+
+        with override_settings(SYNC_SETTLE_SECONDS=60):
+            self.assertEqual(settled_sequence(), second)
+            self.assertGreater(prune_sequences(), 0)
+            self.assertEqual(settled_sequence(), second)
+        self.assertFalse(SyncSequence.objects.filter(pk=first).exists())
+
+    def test_synthetic_data_gets_change_sequence(self):
+        call_command(
+            'generate_synthetic_data', clients=3, providers=3, requests=10, batch_size=4,
+            prefix='sintetico', stdout=StringIO()
+        )
+
+        self.assertFalse(ServiceRequest.objects.filter(change_seq=0).exists())
+        self.assertFalse(ServiceAssignment.objects.filter(change_seq=0).exists())
+        self.assertFalse(Notification.objects.filter(change_seq=0).exists())
+
+
+class SyntheticDataTest(TestCase):
+    """generate_synthetic_data: datas geradas e modo --copy-dir"""
+
+    def test_synthetic_data_keeps_generated_timestamps(self):
+        call_command(
+            'generate_synthetic_data', clients=3, providers=3, requests=20, batch_size=4, days=30,
+            prefix='sintetico', stdout=StringIO()
+        )
+
+        oldest = ServiceRequest.objects.order_by('created_at').first()
+        self.assertLess(oldest.created_at, timezone.now() - timedelta(hours=1))
+        self.assertEqual(oldest.updated_at, oldest.created_at)
+        # Os campos auto_now/auto_now_add continuam valendo para as demais gravações
+        self.assertTrue(ServiceRequest._meta.get_field('created_at').auto_now_add)
+        request = create_assignment('2').service_request
+        self.assertGreater(request.created_at, timezone.now() - timedelta(minutes=1))
+
+    def test_synthetic_copy_files_leave_local_database_alone(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        with self.assertNumQueries(0):
+            call_command(
+                'generate_synthetic_data', clients=3, providers=3, requests=10, batch_size=4,
+                copy_dir=directory, stdout=StringIO()
+            )
+
+        with open(os.path.join(directory, 'load.sql'), encoding='utf-8') as script:
+            load = script.read()
+        tables = [ServiceCategory._meta.db_table, SyncSequence._meta.db_table, ServiceRequest._meta.db_table]
+        for table in tables:
+            self.assertIn(f"\\copy \"{table}\"", load)
+        with open(os.path.join(directory, f'{SyncSequence._meta.db_table}.copy'), encoding='utf-8') as file:
+            self.assertEqual([line.split('\t')[0] for line in file], ['1', '2', '3'])
+
+
+# Sob contenção todas as requisições ficam lentas: sem registro de queries/requisições lentas
+@override_settings(SLOW_QUERY_ENABLED=False, PERFORMANCE_SLOW_REQUEST_MS=60000)
+class ConcurrentTransitionTest(TransactionTestCase):
+    """Requisições paralelas: apenas uma transição vence, as demais recebem 409"""
+
+    parallel_requests = 200
+
+    def fire(self, user, url):
+        barrier = threading.Barrier(self.parallel_requests)
+        results = []
+
+        def worker():
+            client = api_client(user)
+            try:
+                barrier.wait()
+                results.append(client.post(url).status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.parallel_requests)]
+        # As respostas 409 são registradas como warning pelo django.request
+        with self.assertLogs('django.request', 'WARNING'):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        return Counter(results)
+
+    def test_parallel_accepts(self):
+        assignment = create_assignment()
+
+        results = self.fire(assignment.service_request.client, f'/api/assignments/{assignment.id}/accept/')
+
+        self.assertEqual(results, {200: 1, 409: self.parallel_requests - 1})
+        self.assertEqual(ServiceRequest.objects.get(pk=assignment.service_request_id).status, 'accepted')
+        self.assertEqual(assignment.provider.notifications.filter(notification_type='request_accepted').count(), 1)
+
+    def test_parallel_completes(self):
+        assignment = create_assignment()
+        state_machine.accept_assignment(assignment)
+
+        results = self.fire(assignment.provider, f'/api/assignments/{assignment.id}/complete/')
+
+        self.assertEqual(results, {200: 1, 409: self.parallel_requests - 1})
+        assignment.refresh_from_db()
+        self.assertEqual(assignment.status, 'completed')
+        self.assertEqual(assignment.service_request.status, 'completed')
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 from accounts.views import ServiceCategoryListView
 
 app_name = 'services'
@@ -7,6 +7,7 @@ app_name = 'services'
 urlpatterns = [
     # Solicitações de serviço
     path('requests/', views.ServiceRequestListCreateView.as_view(), name='service_request_list_create'),
+    path('requests/batch/', views.ServiceRequestBatchCreateView.as_view(), name='service_request_batch_create'),
     path('requests/<int:pk>/', views.ServiceRequestDetailView.as_view(), name='service_request_detail'),
     
     # Propostas de serviço
@@ -22,9 +23,15 @@ urlpatterns = [
     
     # Notificações
     path('notifications/', views.NotificationListView.as_view(), name='notification_list'),
+    path('notifications/stream/', async_views.notification_stream, name='notification_stream'),
+    path('notifications/stream/token/', views.notification_stream_token, name='notification_stream_token'),
+    path('notifications/unread-count/', views.unread_notifications_count, name='unread_notifications_count'),
     path('notifications/<int:pk>/', views.NotificationDetailView.as_view(), name='notification_detail'),
     path('notifications/mark-read/', views.mark_notifications_read, name='mark_notifications_read'),
     
+    # Sincronização incremental
+    path('sync/', views.sync_changes, name='sync_changes'),
+    
     # Estatísticas
     path('statistics/', views.service_statistics, name='service_statistics'),
     
@@ -1,16 +1,21 @@
 from rest_framework import generics, status, permissions, filters
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
+from django.conf import settings
+from django.db import transaction
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, Avg, Count, Sum
+from django.db.models import Avg, Count, Sum
 from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import ServiceRequest, ServiceAssignment, ServiceReview, Notification
-from accounts.models import ProviderProfile
+from accounts.models import ProviderProfile, ServiceCategory, User
 from .serializers import (
     ServiceRequestSerializer,
     ServiceRequestCreateSerializer,
     ServiceRequestListSerializer,
+    ServiceRequestBatchItemSerializer,
     ServiceAssignmentSerializer,
     ServiceAssignmentCreateSerializer,
     ServiceReviewSerializer,
@@ -20,13 +25,57 @@ from .serializers import (
     ServiceStatisticsSerializer,
     ProviderStatisticsSerializer
 )
+from .notifications import adjust_unread, notify, notify_many, unread_count
+from .signals import statistics_tag
+from .sync import Cursor, bulk_tombstones, changes_since, next_sequence, visible_assignments, visible_requests
+from . import state_machine
+from .state_machine import TransitionConflict
 from .whatsapp_service import whatsapp_service
+from monitoring import metrics
+from service_platform.async_api import is_asgi
+from service_platform.authentication import StreamToken
+from service_platform.caching import cache_response, invalidate_on_commit
+from service_platform.db_routers import read_from_replica
+from service_platform.idempotency import idempotent
+from service_platform.serializers import SparseFieldsQuerysetMixin, optimize_queryset
+from service_platform.throttling import StatisticsBucketThrottle, UserBucketThrottle
+from uploads import images
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 
-class ServiceRequestListCreateView(generics.ListCreateAPIView):
+def parse_ids(value):
+    """Ids de ?ids=1,2,3, sem repetições e na ordem recebida; ValueError se inválidos"""
+    try:
+        ids = list(dict.fromkeys(int(item) for item in value.split(',') if item.strip()))
+    except ValueError:
+        raise ValueError('O parâmetro ids deve ser uma lista de números separados por vírgula.')
+    if not ids:
+        raise ValueError('Informe ao menos um id.')
+    if len(ids) > settings.BATCH_MAX_SIZE:
+        raise ValueError(f'Informe no máximo {settings.BATCH_MAX_SIZE} ids.')
+    return ids
+
+
+def list_by_ids(queryset, value, serializer_class, results_key, context):
+    """Resposta de ?ids=: os registros encontrados (uma query) e os ids ausentes ou sem acesso"""
+    try:
+        ids = parse_ids(value)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    found = optimize_queryset(queryset, serializer_class(context=context)).in_bulk(ids)
+    return Response({
+        results_key: serializer_class([found[pk] for pk in ids if pk in found], many=True, context=context).data,
+        'missing': [pk for pk in ids if pk not in found]
+    })
+
+
+@method_decorator(idempotent, name='post')
+@method_decorator(read_from_replica, name='get')
+class ServiceRequestListCreateView(SparseFieldsQuerysetMixin, generics.ListCreateAPIView):
     """View para listar e criar solicitações de serviço"""
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -36,23 +85,30 @@ class ServiceRequestListCreateView(generics.ListCreateAPIView):
     ordering = ['-created_at']
     
     def perform_create(self, serializer):
-        """Override to add logging and WhatsApp notifications"""
-        print(f"=== SERVICE REQUEST CREATION DEBUG ===")
-        print(f"Request data: {dict(self.request.data)}")
-        print(f"User: {self.request.user}")
-        print(f"User authenticated: {self.request.user.is_authenticated}")
-        try:
-            # Salva a solicitação
-            service_request = serializer.save()
-            print(f"Service request created successfully: {service_request.id}")
-            
-            # Envia notificações WhatsApp para prestadores da categoria
-            self.send_whatsapp_notifications(service_request)
-            
-        except Exception as e:
-            print(f"Error creating service request: {e}")
-            print(f"Serializer errors: {serializer.errors}")
-            raise
+        """Salva a solicitação e notifica os prestadores (no app e via WhatsApp)"""
+        service_request = serializer.save()
+        logger.info(f"Service request {service_request.id} created by user {self.request.user.id}")
+        
+        # Notificações no app (entregues em tempo real aos prestadores conectados)
+        self.notify_providers(service_request)
+        
+        # Envia notificações WhatsApp para prestadores da categoria
+        self.send_whatsapp_notifications(service_request)
+    
+    def notify_providers(self, service_request):
+        """Cria notificações de nova solicitação para os prestadores da categoria"""
+        providers = User.objects.filter(
+            provider_profile__service_categories=service_request.category,
+            is_active=True
+        ).exclude(id=service_request.client_id).only('id').distinct()
+        
+        notify_many(
+            providers,
+            title='Nova Solicitação Disponível',
+            message=f'{service_request.category.name} em {service_request.city}: "{service_request.title}"',
+            notification_type='new_request',
+            service_request=service_request
+        )
     
     def send_whatsapp_notifications(self, service_request):
         """Envia notificações WhatsApp para prestadores da categoria"""
@@ -72,8 +128,6 @@ class ServiceRequestListCreateView(generics.ListCreateAPIView):
                     user__phone_number__isnull=False
                 ).exclude(user__phone_number='')
             
-            print(f"📱 Enviando WhatsApp para {providers.count()} prestadores...")
-            
             # Envia WhatsApp para cada prestador
             for provider in providers:
                 try:
@@ -81,15 +135,14 @@ class ServiceRequestListCreateView(generics.ListCreateAPIView):
                         provider.user.phone_number,
                         service_request
                     )
-                    if success:
-                        print(f"✅ WhatsApp enviado para {provider.user.get_full_name()} ({provider.user.phone_number})")
-                    else:
-                        print(f"❌ Falha ao enviar WhatsApp para {provider.user.get_full_name()}")
+                    metrics.observe_notification_sent('whatsapp', success)
+                    if not success:
+                        logger.warning(f"Falha ao enviar WhatsApp para {provider.user.get_full_name()}")
                 except Exception as e:
-                    print(f"❌ Erro ao enviar WhatsApp para {provider.user.get_full_name()}: {str(e)}")
+                    metrics.observe_notification_sent('whatsapp', False)
+                    logger.error(f"Erro ao enviar WhatsApp para {provider.user.get_full_name()}: {str(e)}")
                     
         except Exception as e:
-            print(f"❌ Erro geral no envio de WhatsApp: {str(e)}")
             logger.error(f"Erro ao enviar notificações WhatsApp: {str(e)}")
     
     def get_serializer_class(self):
@@ -97,31 +150,23 @@ class ServiceRequestListCreateView(generics.ListCreateAPIView):
             return ServiceRequestCreateSerializer
         return ServiceRequestListSerializer
     
-    def post(self, request, *args, **kwargs):
-        """Override post method for debugging"""
-        print(f"=== POST METHOD DEBUG ===")
-        print(f"Request data: {dict(request.data)}")
-        print(f"User: {request.user}")
-        print(f"User authenticated: {request.user.is_authenticated}")
-        print(f"User type: {getattr(request.user, 'user_type', 'No user_type')}")
-        return super().post(request, *args, **kwargs)
-    
     def get_queryset(self):
-        user = self.request.user
-        
-        if user.user_type == 'client':
-            # Clientes veem apenas suas próprias solicitações
-            return ServiceRequest.objects.filter(client=user)
-        elif user.user_type == 'provider':
-            # Prestadores veem solicitações abertas e suas próprias propostas
-            return ServiceRequest.objects.filter(
-                Q(status='open') | Q(serviceassignment__provider__user=user)
-            ).distinct()
-        else:
-            # Administradores veem todas
-            return ServiceRequest.objects.all()
+        # Clientes veem as próprias solicitações, prestadores as pendentes e as atribuídas a eles,
+        # administradores todas (as mesmas regras do delta sync)
+        return visible_requests(self.request.user)
     
     def list(self, request, *args, **kwargs):
+        # Busca em lote por id (?ids=1,2,3), com os dados completos de cada solicitação
+        ids = request.query_params.get('ids')
+        if ids is not None:
+            return list_by_ids(
+                self.get_queryset(),
+                ids,
+                ServiceRequestSerializer,
+                'results',
+                self.get_serializer_context()
+            )
+        
         queryset = self.filter_queryset(self.get_queryset())
         
         # Paginação
@@ -142,50 +187,178 @@ class ServiceRequestListCreateView(generics.ListCreateAPIView):
         })
 
 
-class ServiceRequestDetailView(generics.RetrieveUpdateDestroyAPIView):
+@method_decorator(idempotent, name='post')
+class ServiceRequestBatchCreateView(generics.GenericAPIView):
+    """View para criar várias solicitações de uma vez (integrações de parceiros)"""
+    serializer_class = ServiceRequestBatchItemSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request, *args, **kwargs):
+        items = request.data.get('requests') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'error': 'Envie a lista de solicitações em "requests".'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > settings.BATCH_MAX_SIZE:
+            return Response(
+                {'error': f'Envie no máximo {settings.BATCH_MAX_SIZE} solicitações por lote.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Cada item é validado separadamente; as categorias são buscadas uma vez para o lote
+        context = {**self.get_serializer_context(), 'categories': self.categories_for(items)}
+        serializers_by_index = [self.get_serializer_class()(data=item, context=context) for item in items]
+        valid = [serializer for serializer in serializers_by_index if serializer.is_valid()]
+        
+        created = []
+        if valid:
+            with transaction.atomic():
+                # bulk_create não dispara o pre_save que numera as alterações (services.sync)
+                change_seq = next_sequence()
+                created = ServiceRequest.objects.bulk_create([
+                    ServiceRequest(client=request.user, change_seq=change_seq, **serializer.validated_data)
+                    for serializer in valid
+                ])
+                images.link_new_requests_images([
+                    (service_request, serializer.image_assets)
+                    for service_request, serializer in zip(created, valid)
+                    if getattr(serializer, 'image_assets', None)
+                ])
+                # bulk_create não dispara os sinais que invalidam o cache (services.signals)
+                invalidate_on_commit(statistics_tag(request.user.pk))
+            logger.info(f"{len(created)} service requests created in batch by user {request.user.id}")
+            
+            self.notify_providers(created)
+            self.send_whatsapp_notifications(created)
+        
+        results = []
+        created_requests = iter(created)
+        for index, serializer in enumerate(serializers_by_index):
+            if serializer.errors:
+                results.append({'index': index, 'status': 'invalid', 'errors': serializer.errors})
+            else:
+                results.append({
+                    'index': index,
+                    'status': 'created',
+                    'request': ServiceRequestCreateSerializer(next(created_requests)).data
+                })
+        
+        if not created:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif len(created) < len(items):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response({
+            'created': len(created),
+            'invalid': len(items) - len(created),
+            'results': results
+        }, status=response_status)
+    
+    def categories_for(self, items):
+        category_ids = set()
+        for item in items:
+            if isinstance(item, dict):
+                try:
+                    category_ids.add(int(item.get('category')))
+                except (TypeError, ValueError):
+                    pass
+        return ServiceCategory.objects.in_bulk(category_ids)
+    
+    def requests_by_category(self, service_requests):
+        groups = {}
+        for service_request in service_requests:
+            groups.setdefault(service_request.category, []).append(service_request)
+        return groups.items()
+    
+    def notify_providers(self, service_requests):
+        """Uma notificação por prestador e categoria do lote, não uma por solicitação"""
+        for category, category_requests in self.requests_by_category(service_requests):
+            providers = User.objects.filter(
+                provider_profile__service_categories=category,
+                is_active=True
+            ).exclude(id=self.request.user.id).only('id').distinct()
+            
+            if len(category_requests) == 1:
+                service_request = category_requests[0]
+                notify_many(
+                    providers,
+                    title='Nova Solicitação Disponível',
+                    message=f'{category.name} em {service_request.city}: "{service_request.title}"',
+                    notification_type='new_request',
+                    service_request=service_request
+                )
+                continue
+            
+            titles = ', '.join(f'"{service_request.title}"' for service_request in category_requests[:3])
+            if len(category_requests) > 3:
+                titles += f' e mais {len(category_requests) - 3}'
+            notify_many(
+                providers,
+                title='Novas Solicitações Disponíveis',
+                message=f'{len(category_requests)} solicitações de {category.name}: {titles}',
+                notification_type='new_request'
+            )
+    
+    def send_whatsapp_notifications(self, service_requests):
+        """Uma mensagem WhatsApp por prestador e categoria do lote"""
+        for category, category_requests in self.requests_by_category(service_requests):
+            try:
+                providers = ProviderProfile.objects.filter(
+                    service_categories=category,
+                    user__is_active=True,
+                    user__phone_number__isnull=False
+                ).exclude(user__phone_number='').select_related('user')
+                
+                for provider in providers:
+                    try:
+                        success = whatsapp_service.send_service_requests_summary(
+                            provider.user.phone_number,
+                            category,
+                            category_requests
+                        )
+                        metrics.observe_notification_sent('whatsapp', success)
+                        if not success:
+                            logger.warning(f"Falha ao enviar WhatsApp para {provider.user.get_full_name()}")
+                    except Exception as e:
+                        metrics.observe_notification_sent('whatsapp', False)
+                        logger.error(f"Erro ao enviar WhatsApp para {provider.user.get_full_name()}: {str(e)}")
+                        
+            except Exception as e:
+                logger.error(f"Erro ao enviar notificações WhatsApp: {str(e)}")
+
+
+class ServiceRequestDetailView(SparseFieldsQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """View para detalhes de solicitação de serviço"""
     serializer_class = ServiceRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        user = self.request.user
-        
-        if user.user_type == 'client':
-            return ServiceRequest.objects.filter(client=user)
-        elif user.user_type == 'provider':
-            return ServiceRequest.objects.filter(
-                Q(status='open') | Q(serviceassignment__provider__user=user)
-            ).distinct()
-        else:
-            return ServiceRequest.objects.all()
+        return visible_requests(self.request.user)
     
     def perform_update(self, serializer):
         # Apenas o cliente pode atualizar sua solicitação
         if self.request.user != serializer.instance.client:
-            return Response(
-                {'error': 'Apenas o cliente pode atualizar esta solicitação.'},
-                status=status.HTTP_403_FORBIDDEN
-            )
+            raise PermissionDenied('Apenas o cliente pode atualizar esta solicitação.')
         serializer.save()
     
     def perform_destroy(self, instance):
-        # Apenas o cliente pode deletar sua solicitação se estiver aberta
+        # Apenas o cliente pode deletar sua solicitação se ainda estiver pendente
         if self.request.user != instance.client:
-            return Response(
-                {'error': 'Apenas o cliente pode deletar esta solicitação.'},
-                status=status.HTTP_403_FORBIDDEN
-            )
+            raise PermissionDenied('Apenas o cliente pode deletar esta solicitação.')
         
-        if instance.status != 'open':
-            return Response(
-                {'error': 'Apenas solicitações abertas podem ser deletadas.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        if instance.status != 'pending':
+            raise ValidationError({'error': 'Apenas solicitações pendentes podem ser deletadas.'})
         
-        instance.delete()
+        # Atribuição e notificações saem em cascata: os tombstones vão em um só INSERT
+        with transaction.atomic(), bulk_tombstones():
+            instance.delete()
 
 
-class ServiceAssignmentListCreateView(generics.ListCreateAPIView):
+@method_decorator(idempotent, name='post')
+@method_decorator(read_from_replica, name='get')
+class ServiceAssignmentListCreateView(SparseFieldsQuerysetMixin, generics.ListCreateAPIView):
     """View para listar e criar propostas de serviço"""
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
@@ -199,54 +372,35 @@ class ServiceAssignmentListCreateView(generics.ListCreateAPIView):
         return ServiceAssignmentSerializer
     
     def get_queryset(self):
-        user = self.request.user
-        
-        if user.user_type == 'client':
-            # Clientes veem propostas para suas solicitações
-            return ServiceAssignment.objects.filter(service_request__client=user)
-        elif user.user_type == 'provider':
-            # Prestadores veem apenas suas próprias propostas
-            return ServiceAssignment.objects.filter(provider__user=user)
-        else:
-            return ServiceAssignment.objects.all()
+        # Clientes veem propostas para suas solicitações, prestadores apenas as próprias
+        return visible_assignments(self.request.user)
 
 
-class ServiceAssignmentDetailView(generics.RetrieveUpdateAPIView):
+class ServiceAssignmentDetailView(SparseFieldsQuerysetMixin, generics.RetrieveUpdateAPIView):
     """View para detalhes de proposta de serviço"""
     serializer_class = ServiceAssignmentSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        user = self.request.user
-        
-        if user.user_type == 'client':
-            return ServiceAssignment.objects.filter(service_request__client=user)
-        elif user.user_type == 'provider':
-            return ServiceAssignment.objects.filter(provider__user=user)
-        else:
-            return ServiceAssignment.objects.all()
+        return visible_assignments(self.request.user)
     
     def perform_update(self, serializer):
         user = self.request.user
         assignment = serializer.instance
         
         # Verificar permissões baseadas no tipo de usuário
-        if user.user_type == 'provider' and assignment.provider.user != user:
-            return Response(
-                {'error': 'Você só pode atualizar suas próprias propostas.'},
-                status=status.HTTP_403_FORBIDDEN
-            )
+        if user.user_type == 'provider' and assignment.provider_id != user.pk:
+            raise PermissionDenied('Você só pode atualizar suas próprias propostas.')
         
-        if user.user_type == 'client' and assignment.service_request.client != user:
-            return Response(
-                {'error': 'Você só pode atualizar propostas para suas solicitações.'},
-                status=status.HTTP_403_FORBIDDEN
-            )
+        if user.user_type == 'client' and assignment.service_request.client_id != user.pk:
+            raise PermissionDenied('Você só pode atualizar propostas para suas solicitações.')
         
         serializer.save()
 
 
-class ServiceReviewListCreateView(generics.ListCreateAPIView):
+@method_decorator(idempotent, name='post')
+@method_decorator(read_from_replica, name='get')
+class ServiceReviewListCreateView(SparseFieldsQuerysetMixin, generics.ListCreateAPIView):
     """View para listar e criar avaliações de serviço"""
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
@@ -267,11 +421,12 @@ class ServiceReviewListCreateView(generics.ListCreateAPIView):
             return ServiceReview.objects.filter(reviewer=user)
         elif user.user_type == 'provider':
             # Prestadores veem avaliações de seus serviços
-            return ServiceReview.objects.filter(assignment__provider__user=user)
+            return ServiceReview.objects.filter(assignment__provider=user)
         else:
             return ServiceReview.objects.all()
 
 
+@method_decorator(read_from_replica, name='get')
 class NotificationListView(generics.ListAPIView):
     """View para listar notificações do usuário"""
     serializer_class = NotificationSerializer
@@ -284,6 +439,13 @@ class NotificationListView(generics.ListAPIView):
         return Notification.objects.filter(user=self.request.user)
     
     def list(self, request, *args, **kwargs):
+        # Busca em lote por id (?ids=1,2,3)
+        ids = request.query_params.get('ids')
+        if ids is not None:
+            return list_by_ids(
+                self.get_queryset(), ids, NotificationSerializer, 'notifications', self.get_serializer_context()
+            )
+        
         queryset = self.filter_queryset(self.get_queryset())
         
         # Paginação
@@ -311,14 +473,49 @@ class NotificationDetailView(generics.RetrieveUpdateAPIView):
     
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user)
+    
+    def perform_update(self, serializer):
+        # UPDATE condicional: o contador de não lidas é ajustado só por quem de fato alterou
+        notification = serializer.instance
+        is_read = serializer.validated_data.get('is_read', notification.is_read)
+        changed = Notification.objects.filter(pk=notification.pk).exclude(
+            is_read=is_read
+        ).update(is_read=is_read, change_seq=next_sequence())
+        notification.is_read = is_read
+        if changed:
+            adjust_unread({notification.user_id: -1 if is_read else 1})
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def notification_stream_token(request):
+    """View que emite o token de curta duração para abrir o stream de notificações"""
+    # Sob WSGI o stream prenderia um worker síncrono por conexão: o cliente consulta periodicamente
+    if not is_asgi(request):
+        return Response(
+            {'error': 'Stream de notificações indisponível neste servidor.'},
+            status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+    return Response({
+        'token': str(StreamToken.for_user(request.user)),
+        'expires_in': settings.NOTIFICATION_STREAM_TOKEN_LIFETIME
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def unread_notifications_count(request):
+    """View para o total de notificações não lidas"""
+    return Response({'count': unread_count(request.user.id)})
 
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@idempotent
 def accept_assignment(request, assignment_id):
     """View para aceitar uma proposta de serviço"""
     try:
-        assignment = ServiceAssignment.objects.get(
+        assignment = assignment_for_transition().get(
             id=assignment_id,
             service_request__client=request.user
         )
@@ -328,32 +525,22 @@ def accept_assignment(request, assignment_id):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    if assignment.status != 'pending':
+    try:
+        state_machine.accept_assignment(assignment)
+    except TransitionConflict as e:
         return Response(
-            {'error': 'Esta proposta não pode mais ser aceita.'},
-            status=status.HTTP_400_BAD_REQUEST
+            {'error': 'Esta proposta não pode mais ser aceita.', 'status': e.current_status},
+            status=status.HTTP_409_CONFLICT
         )
     
-    # Aceitar a proposta
-    assignment.status = 'accepted'
-    assignment.save()
-    
-    # Atualizar status da solicitação
     service_request = assignment.service_request
-    service_request.status = 'in_progress'
-    service_request.save()
-    
-    # Rejeitar outras propostas
-    ServiceAssignment.objects.filter(
-        service_request=service_request
-    ).exclude(id=assignment_id).update(status='rejected')
     
     # Criar notificação para o prestador
-    Notification.objects.create(
-        user=assignment.provider.user,
+    notify(
+        assignment.provider,
         title='Proposta Aceita!',
         message=f'Sua proposta para "{service_request.title}" foi aceita.',
-        type='assignment_accepted',
+        notification_type='request_accepted',
         service_request=service_request
     )
     
@@ -365,12 +552,13 @@ def accept_assignment(request, assignment_id):
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@idempotent
 def complete_assignment(request, assignment_id):
     """View para marcar um serviço como concluído"""
     try:
-        assignment = ServiceAssignment.objects.get(
+        assignment = assignment_for_transition().get(
             id=assignment_id,
-            provider__user=request.user
+            provider=request.user
         )
     except ServiceAssignment.DoesNotExist:
         return Response(
@@ -378,28 +566,22 @@ def complete_assignment(request, assignment_id):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    if assignment.status != 'accepted':
+    try:
+        state_machine.complete_assignment(assignment)
+    except TransitionConflict as e:
         return Response(
-            {'error': 'Este serviço não pode ser marcado como concluído.'},
-            status=status.HTTP_400_BAD_REQUEST
+            {'error': 'Este serviço não pode ser marcado como concluído.', 'status': e.current_status},
+            status=status.HTTP_409_CONFLICT
         )
     
-    # Marcar como concluído
-    assignment.status = 'completed'
-    assignment.completion_date = timezone.now()
-    assignment.save()
-    
-    # Atualizar status da solicitação
     service_request = assignment.service_request
-    service_request.status = 'completed'
-    service_request.save()
     
     # Criar notificação para o cliente
-    Notification.objects.create(
-        user=service_request.client,
+    notify(
+        service_request.client,
         title='Serviço Concluído!',
         message=f'O serviço "{service_request.title}" foi marcado como concluído.',
-        type='service_completed',
+        notification_type='service_completed',
         service_request=service_request
     )
     
@@ -409,6 +591,13 @@ def complete_assignment(request, assignment_id):
     }, status=status.HTTP_200_OK)
 
 
+def assignment_for_transition():
+    """Atribuição com o que a resposta serializa, lida numa única query"""
+    return ServiceAssignment.objects.select_related(
+        'provider', 'service_request__client', 'service_request__category'
+    )
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def mark_notifications_read(request):
@@ -416,7 +605,8 @@ def mark_notifications_read(request):
     updated_count = Notification.objects.filter(
         user=request.user,
         is_read=False
-    ).update(is_read=True)
+    ).update(is_read=True, change_seq=next_sequence())
+    adjust_unread({request.user.id: -updated_count})
     
     return Response({
         'message': f'{updated_count} notificações marcadas como lidas.'
@@ -425,6 +615,37 @@ def mark_notifications_read(request):
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@read_from_replica
+def sync_changes(request):
+    """View para sincronizar solicitações, atribuições e notificações alteradas desde o cursor"""
+    cursor = None
+    since = request.query_params.get('since')
+    if since:
+        try:
+            cursor = Cursor.parse(since)
+        except ValueError:
+            return Response({'error': 'Cursor inválido.'}, status=status.HTTP_400_BAD_REQUEST)
+        if cursor.expired(time.time()):
+            return Response(
+                {'error': 'Cursor expirado: sincronize novamente sem "since".'},
+                status=status.HTTP_410_GONE
+            )
+    
+    return Response(changes_since(request.user, cursor, {'request': request}), status=status.HTTP_200_OK)
+
+
+def service_statistics_tags(request):
+    if request.user.user_type in ('client', 'provider'):
+        return [statistics_tag(request.user.pk)]
+    # Totais gerais: atualizados pelo TTL, não a cada solicitação gravada
+    return []
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([UserBucketThrottle, StatisticsBucketThrottle])
+@cache_response(tags=service_statistics_tags, per_user=True)
+@read_from_replica
 def service_statistics(request):
     """View para estatísticas de serviços"""
     user = request.user
@@ -452,14 +673,14 @@ def service_statistics(request):
         # Estatísticas do prestador
         try:
             provider_profile = ProviderProfile.objects.get(user=user)
-            assignments = ServiceAssignment.objects.filter(provider=provider_profile)
+            assignments = ServiceAssignment.objects.filter(provider=user)
             
             stats = {
                 'total_proposals': assignments.count(),
                 'accepted_proposals': assignments.filter(status='accepted').count(),
                 'completed_services': assignments.filter(status='completed').count(),
                 'average_rating': ServiceReview.objects.filter(
-                    assignment__provider=provider_profile
+                    assignment__provider=user
                 ).aggregate(avg_rating=Avg('rating'))['avg_rating'] or 0,
                 'total_earnings': assignments.filter(
                     status='completed'
@@ -499,17 +720,33 @@ def service_statistics(request):
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+def provider_reviews_queryset(provider_profile, serializer=None):
+    """Avaliações dos serviços de um prestador, com os relacionamentos usados pelo serializer (por padrão, o completo)"""
+    return optimize_queryset(
+        ServiceReview.objects.filter(assignment__provider_id=provider_profile.user_id),
+        serializer or ServiceReviewSerializer()
+    )
+
+
+def provider_reviews_tags(request, provider_id):
+    # As avaliações incluem a solicitação, com a categoria
+    return [f'provider:{provider_id}', 'category:*']
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@cache_response(tags=provider_reviews_tags)
+@read_from_replica
 def provider_reviews(request, provider_id):
     """View para listar avaliações de um prestador específico"""
     logger.info(f"Getting reviews for provider {provider_id}")
     
     try:
         provider_profile = ProviderProfile.objects.get(id=provider_id)
-        reviews = ServiceReview.objects.filter(assignment__provider=provider_profile)
+        context = {'request': request}
+        reviews = provider_reviews_queryset(provider_profile, ServiceReviewSerializer(context=context))
         
-        serializer = ServiceReviewSerializer(reviews, many=True)
+        serializer = ServiceReviewSerializer(reviews, many=True, context=context)
         return Response(serializer.data, status=status.HTTP_200_OK)
         
     except ProviderProfile.DoesNotExist:
@@ -528,13 +765,16 @@ def provider_reviews(request, provider_id):
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@throttle_classes([UserBucketThrottle, StatisticsBucketThrottle])
+@cache_response(tags=lambda request, provider_id: [f'provider:{provider_id}'])
+@read_from_replica
 def provider_review_stats(request, provider_id):
     """View para estatísticas de avaliações de um prestador específico"""
     logger.info(f"Getting review stats for provider {provider_id}")
     
     try:
         provider_profile = ProviderProfile.objects.get(id=provider_id)
-        reviews = ServiceReview.objects.filter(assignment__provider=provider_profile)
+        reviews = ServiceReview.objects.filter(assignment__provider_id=provider_profile.user_id)
         
         stats = {
             'total_reviews': reviews.count(),
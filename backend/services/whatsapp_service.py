@@ -102,6 +102,40 @@ class WhatsAppService:
 
 🌐 Acesse a plataforma para mais detalhes e fazer sua proposta!
 
+---
+*Serviço em Casa - Conectando você aos melhores profissionais*"""
+        
+        return self.send_message(provider_phone, message)
+    
+    def send_service_requests_summary(self, provider_phone: str, category, service_requests) -> bool:
+        """
+        Envia uma única mensagem com várias solicitações novas de uma categoria
+        (criação em lote), em vez de uma mensagem por solicitação
+        
+        Args:
+            provider_phone: Telefone do prestador
+            category: ServiceCategory das solicitações
+            service_requests: Lista de ServiceRequest
+            
+        Returns:
+            bool: True se enviado com sucesso
+        """
+        if len(service_requests) == 1:
+            return self.send_service_request_notification(provider_phone, service_requests[0])
+        
+        items = "\n".join(
+            f"• *{service_request.title}* - {service_request.city}, {service_request.state} "
+            f"(R$ {service_request.budget_min or 'N/A'} - R$ {service_request.budget_max or 'N/A'})"
+            for service_request in service_requests
+        )
+        message = f"""🔔 *{len(service_requests)} Novas Solicitações de Serviço!*
+
+🏷️ *Categoria:* {category.name}
+
+{items}
+
+🌐 Acesse a plataforma para mais detalhes e fazer suas propostas!
+
 ---
 *Serviço em Casa - Conectando você aos melhores profissionais*"""
         
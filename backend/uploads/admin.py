@@ -0,0 +1,16 @@
+from django.contrib import admin
+
+from .models import ImageAsset
+
+
+@admin.register(ImageAsset)
+class ImageAssetAdmin(admin.ModelAdmin):
+    """Admin para imagens enviadas"""
+
+    list_display = ('sha256', 'content_type', 'width', 'height', 'size', 'status', 'created_at')
+    list_filter = ('status', 'content_type', 'created_at')
+    search_fields = ('sha256', 'uploaded_by__username')
+    readonly_fields = (
+        'sha256', 'original', 'content_type', 'size', 'width', 'height', 'variants', 'blurhash',
+        'error', 'uploaded_by', 'created_at', 'processed_at'
+    )
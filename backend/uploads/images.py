@@ -0,0 +1,271 @@
+"""
+Armazenamento e processamento das imagens enviadas.
+
+Os arquivos são endereçados pelo SHA-256 do conteúdo:
+
+    images/originals/ab/<sha256>.<ext>
+    images/variants/ab/<sha256>/<largura>.webp|.jpg
+
+Reenviar a mesma imagem devolve o ImageAsset existente, sem gravar nem
+processar de novo (se o processamento falhou, ele é agendado outra vez). O processamento (variantes redimensionadas e BlurHash)
+roda no celery (IMAGE_PROCESSING='celery') ou na própria requisição
+('sync', útil em desenvolvimento e testes).
+
+Quem referencia uma imagem (ServiceRequest.images, User.profile_picture_variants)
+guarda uma cópia do payload da imagem no JSON; quando o processamento
+termina, propagate() atualiza essas cópias.
+"""
+import io
+import logging
+import re
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework import serializers
+
+from service_platform.caching import invalidate
+
+from . import blurhash
+from .models import ImageAsset
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    'JPEG': ('jpg', 'image/jpeg'),
+    'PNG': ('png', 'image/png'),
+    'WEBP': ('webp', 'image/webp'),
+    'GIF': ('gif', 'image/gif'),
+}
+
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+def shard(sha256):
+    return f'{sha256[:2]}/{sha256}'
+
+
+def original_name(sha256, extension):
+    return f'images/originals/{shard(sha256)}.{extension}'
+
+
+def variant_name(sha256, width, extension):
+    return f'images/variants/{shard(sha256)}/{width}.{extension}'
+
+
+def inspect_upload(upload):
+    """Formato e dimensões, lidos só do cabeçalho; rejeita o que não é imagem suportada"""
+    try:
+        with Image.open(upload) as image:
+            image_format, (width, height) = image.format, image.size
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise serializers.ValidationError('O arquivo enviado não é uma imagem válida.')
+    finally:
+        upload.seek(0)
+    if image_format not in FORMATS:
+        raise serializers.ValidationError(
+            f'Formato não suportado. Use {", ".join(sorted(FORMATS))}.'
+        )
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise serializers.ValidationError('A imagem tem resolução maior que a permitida.')
+    return image_format, width, height
+
+
+def store_upload(upload, user):
+    """Guarda o upload (já com upload.sha256) e agenda o processamento; retorna (asset, criado)"""
+    asset = ImageAsset.objects.filter(sha256=upload.sha256).first()
+    if asset is not None:
+        if asset.status == 'failed':
+            retry(asset, upload)
+        return asset, False
+
+    image_format, width, height = inspect_upload(upload)
+    extension, content_type = FORMATS[image_format]
+    name = original_name(upload.sha256, extension)
+    # Upload simultâneo do mesmo conteúdo: o arquivo já existe e é idêntico
+    if not default_storage.exists(name):
+        name = default_storage.save(name, upload)
+
+    asset, created = ImageAsset.objects.get_or_create(
+        sha256=upload.sha256,
+        defaults={
+            'original': name,
+            'content_type': content_type,
+            'size': upload.size,
+            'width': width,
+            'height': height,
+            'uploaded_by': user,
+        }
+    )
+    if created:
+        transaction.on_commit(lambda: enqueue(asset.pk))
+    return asset, created
+
+
+def retry(asset, upload):
+    """Agenda de novo o processamento que falhou, regravando o original se ele não estiver no storage"""
+    if not default_storage.exists(asset.original.name):
+        default_storage.save(asset.original.name, upload)
+    if ImageAsset.objects.filter(pk=asset.pk, status='failed').update(status='pending', error=''):
+        asset.status, asset.error = 'pending', ''
+        transaction.on_commit(lambda: enqueue(asset.pk))
+
+
+def enqueue(asset_id):
+    if settings.IMAGE_PROCESSING == 'sync':
+        process(asset_id)
+        return
+    from .tasks import process_image
+    process_image.delay(asset_id)
+
+
+def process(asset_id):
+    """Gera as variantes e o BlurHash; cada imagem é processada uma vez"""
+    claimed = ImageAsset.objects.filter(
+        pk=asset_id, status__in=['pending', 'failed']
+    ).update(status='processing', error='')
+    if not claimed:
+        return None
+
+    asset = ImageAsset.objects.get(pk=asset_id)
+    try:
+        with default_storage.open(asset.original.name, 'rb') as original, Image.open(original) as image:
+            image = ImageOps.exif_transpose(image).convert('RGB')
+            variants = build_variants(asset.sha256, image)
+            placeholder = image.copy()
+            placeholder.thumbnail((32, 32))
+            hash_value = blurhash.encode(placeholder)
+    except Exception as e:
+        logger.exception(f'Erro ao processar a imagem {asset.sha256}')
+        ImageAsset.objects.filter(pk=asset_id).update(status='failed', error=str(e)[:1000])
+        asset.refresh_from_db()
+        propagate(asset)
+        return None
+
+    ImageAsset.objects.filter(pk=asset_id).update(
+        status='ready', variants=variants, blurhash=hash_value, processed_at=timezone.now()
+    )
+    asset.refresh_from_db()
+    propagate(asset)
+    return asset
+
+
+def build_variants(sha256, image):
+    """Versões WebP e JPEG para cada largura de IMAGE_VARIANT_WIDTHS menor que a original"""
+    variants = []
+    widths = sorted({min(width, image.width) for width in settings.IMAGE_VARIANT_WIDTHS})
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        variant = {'width': width, 'height': height}
+        for extension, save_options in (
+            ('webp', {'format': 'WEBP', 'quality': settings.IMAGE_WEBP_QUALITY, 'method': 4}),
+            ('jpg', {'format': 'JPEG', 'quality': settings.IMAGE_JPEG_QUALITY, 'optimize': True, 'progressive': True}),
+        ):
+            name = variant_name(sha256, width, extension)
+            if not default_storage.exists(name):
+                buffer = io.BytesIO()
+                resized.save(buffer, **save_options)
+                default_storage.save(name, ContentFile(buffer.getvalue()))
+            variant['webp' if extension == 'webp' else 'jpeg'] = default_storage.url(name)
+        variants.append(variant)
+    return variants
+
+
+def asset_payload(asset):
+    """Cópia guardada nos JSONs que referenciam a imagem"""
+    return {
+        'id': asset.sha256,
+        'status': asset.status,
+        'url': default_storage.url(asset.original.name),
+        'width': asset.width,
+        'height': asset.height,
+        'blurhash': asset.blurhash,
+        'variants': asset.variants,
+    }
+
+
+def resolve_images(items):
+    """
+    Valida a lista de imagens de uma solicitação. Cada item pode ser o id
+    (SHA-256) de uma imagem enviada, o payload de uma imagem ({'id': ...})
+    ou uma URL externa. Retorna (lista para o JSON, assets referenciados).
+    """
+    if not isinstance(items, list):
+        raise serializers.ValidationError('Envie uma lista de imagens.')
+    if len(items) > settings.IMAGE_MAX_PER_REQUEST:
+        raise serializers.ValidationError(
+            f'Envie no máximo {settings.IMAGE_MAX_PER_REQUEST} imagens.'
+        )
+
+    ids = [item.get('id') if isinstance(item, dict) else item for item in items]
+    asset_ids = {value for value in ids if isinstance(value, str) and SHA256_RE.match(value)}
+    assets = {asset.sha256: asset for asset in ImageAsset.objects.filter(sha256__in=asset_ids)}
+    missing = asset_ids - set(assets)
+    if missing:
+        raise serializers.ValidationError(f'Imagem não encontrada: {sorted(missing)[0]}.')
+
+    entries = []
+    for value in ids:
+        if isinstance(value, str) and value in assets:
+            entries.append(asset_payload(assets[value]))
+        elif isinstance(value, str) and value.startswith(('http://', 'https://', '/')):
+            entries.append(value)
+        else:
+            raise serializers.ValidationError('Cada imagem deve ser o id de um upload ou uma URL.')
+    return entries, list(assets.values())
+
+
+def link_request_images(service_request, assets):
+    """Registra as imagens da solicitação; as ainda em processamento são atualizadas depois"""
+    service_request.image_assets.set(assets)
+    pending = [asset.pk for asset in assets if asset.status != 'ready']
+    if pending:
+        transaction.on_commit(lambda: propagate_ready(pending))
+
+
+def link_new_requests_images(links):
+    """link_request_images para solicitações recém-criadas em lote: [(solicitação, assets)]"""
+    through = ImageAsset.service_requests.through
+    through.objects.bulk_create([
+        through(servicerequest_id=service_request.pk, imageasset_id=asset.pk)
+        for service_request, assets in links
+        for asset in assets
+    ])
+    pending = {asset.pk for service_request, assets in links for asset in assets if asset.status != 'ready'}
+    if pending:
+        transaction.on_commit(lambda: propagate_ready(pending))
+
+
+def propagate_ready(asset_ids):
+    # Cobre o processamento que terminou antes do commit de quem referenciou a imagem
+    for asset in ImageAsset.objects.filter(pk__in=asset_ids, status='ready'):
+        propagate(asset)
+
+
+def propagate(asset):
+    """Atualiza o payload da imagem nas solicitações e perfis que a referenciam"""
+    # services.serializers importa este módulo
+    from services.sync import next_sequence
+
+    payload = asset_payload(asset)
+    requests = asset.service_requests
+    for pk in requests.values_list('pk', flat=True):
+        with transaction.atomic():
+            service_request = requests.model.objects.select_for_update().only('images').get(pk=pk)
+            images = [
+                payload if isinstance(item, dict) and item.get('id') == asset.sha256 else item
+                for item in service_request.images
+            ]
+            # update() não passa pelo pre_save que numera as alterações (services.sync)
+            requests.model.objects.filter(pk=pk).update(
+                images=images, change_seq=next_sequence(), updated_at=timezone.now()
+            )
+    user_ids = list(asset.profile_users.values_list('pk', flat=True))
+    if user_ids:
+        asset.profile_users.update(profile_picture_variants=payload)
+        # update() não dispara os sinais que invalidam o cache (accounts.signals)
+        invalidate(*(f'user:{pk}' for pk in user_ids))
@@ -0,0 +1,183 @@
+"""
+Entrega dos arquivos de MEDIA_ROOT com controle de acesso.
+
+Regras (media_access):
+- fotos de perfil (profile_pictures/ e imagens usadas como foto de perfil):
+  públicas;
+- imagens enviadas (images/...): quem enviou, o cliente da solicitação que
+  as usa, o prestador atribuído a ela e, enquanto a solicitação está
+  aberta a propostas (pending), os prestadores;
+- qualquer outro arquivo: apenas a equipe (is_staff).
+
+Depois da verificação, com MEDIA_ACCEL_REDIRECT definido (ex:
+'/protected-media/') a transferência é delegada ao nginx pelo cabeçalho
+X-Accel-Redirect (o nginx cuida de sendfile, Range e requisições
+condicionais). Sem o nginx, o próprio Django responde com FileResponse,
+com suporte a Range (um intervalo) e ETag/Last-Modified; o arquivo é
+posicionado no início do intervalo, então o sendfile do gunicorn continua
+funcionando.
+"""
+import io
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .models import ImageAsset
+
+IMAGE_PATH_RE = re.compile(r'^images/(?:originals|variants)/[0-9a-f]{2}/(?P<sha256>[0-9a-f]{64})[./]')
+RANGE_RE = re.compile(r'^bytes=(?P<start>\d*)-(?P<end>\d*)$')
+
+# Acesso
+PUBLIC = 'public'
+PRIVATE = 'private'
+DENIED = 'denied'
+NOT_FOUND = 'not_found'
+
+
+def media_access(user, path):
+    """PUBLIC, PRIVATE (permitido só a este usuário), DENIED ou NOT_FOUND"""
+    if path.startswith('profile_pictures/'):
+        return PUBLIC
+
+    match = IMAGE_PATH_RE.match(path)
+    if match is None:
+        return PRIVATE if user.is_authenticated and user.is_staff else DENIED
+
+    asset = ImageAsset.objects.filter(sha256=match['sha256']).first()
+    if asset is None:
+        return NOT_FOUND
+    if asset.profile_users.exists():
+        return PUBLIC
+    if not user.is_authenticated:
+        return DENIED
+    if user.is_staff or asset.uploaded_by_id == user.pk:
+        return PRIVATE
+
+    requests = asset.service_requests.all()
+    if requests.filter(Q(client=user) | Q(assignment__provider=user)).exists():
+        return PRIVATE
+    if user.user_type == 'provider' and requests.filter(status='pending').exists():
+        return PRIVATE
+    return DENIED
+
+
+def cache_headers(response, path, access):
+    # Caminhos endereçados pelo conteúdo nunca mudam
+    if IMAGE_PATH_RE.match(path):
+        patch_cache_control(response, max_age=settings.MEDIA_CACHE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, max_age=settings.MEDIA_LEGACY_CACHE_MAX_AGE)
+    if access == PUBLIC:
+        patch_cache_control(response, public=True)
+    else:
+        patch_cache_control(response, private=True)
+
+
+def accel_response(path, content_type):
+    response = HttpResponse(content_type=content_type)
+    response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT.rstrip('/') + '/' + quote(path)
+    return response
+
+
+class FileRange(io.RawIOBase):
+    """Arquivo restrito a um intervalo de bytes (as posições continuam absolutas)"""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.end = start + length
+        self.file.seek(start)
+
+    @property
+    def name(self):
+        return self.file.name
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.file.tell()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_END:
+            return self.file.seek(self.end + offset)
+        return self.file.seek(offset, whence)
+
+    def read(self, size=-1):
+        remaining = max(0, self.end - self.file.tell())
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        return self.file.read(size) if size else b''
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+
+def parse_range(header, size):
+    """(início, tamanho) do intervalo pedido; None para ignorar o Range; ValueError se insatisfazível"""
+    match = RANGE_RE.match(header.strip())
+    if match is None or (not match['start'] and not match['end']):
+        # Vários intervalos ou formato desconhecido: responde o arquivo inteiro
+        return None
+    if not match['start']:
+        length = min(int(match['end']), size)
+        if length == 0:
+            raise ValueError(header)
+        return size - length, length
+    start = int(match['start'])
+    end = min(int(match['end']), size - 1) if match['end'] else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end - start + 1
+
+
+def file_response(request, full_path, content_type):
+    """Resposta servida pelo Django: condicional (ETag/Last-Modified) e com Range"""
+    stat = os.stat(full_path)
+    etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+    conditional = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if conditional is not None:
+        return conditional
+
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if range_header and (if_range is None or if_range == etag):
+        try:
+            byte_range = parse_range(range_header, stat.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+        response['Content-Length'] = stat.st_size
+    elif byte_range is None:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    else:
+        start, length = byte_range
+        response = FileResponse(FileRange(open(full_path, 'rb'), start, length), content_type=content_type, status=206)
+        response['Content-Range'] = f'bytes {start}-{start + length - 1}/{stat.st_size}'
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    return response
+
+
+def guess_content_type(path):
+    content_type, encoding = mimetypes.guess_type(path)
+    return content_type or 'application/octet-stream'
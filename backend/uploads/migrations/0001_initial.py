@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:07
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageAsset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('original', models.FileField(max_length=255, upload_to='', verbose_name='Arquivo Original')),
+                ('content_type', models.CharField(max_length=50, verbose_name='Tipo de Conteúdo')),
+                ('size', models.PositiveIntegerField(verbose_name='Tamanho (bytes)')),
+                ('width', models.PositiveIntegerField(verbose_name='Largura')),
+                ('height', models.PositiveIntegerField(verbose_name='Altura')),
+                ('status', models.CharField(choices=[('pending', 'Aguardando processamento'), ('processing', 'Processando'), ('ready', 'Pronta'), ('failed', 'Falhou')], default='pending', max_length=15, verbose_name='Status')),
+                ('variants', models.JSONField(blank=True, default=list, help_text='Versões redimensionadas (WebP e JPEG) por largura', verbose_name='Variantes')),
+                ('blurhash', models.CharField(blank=True, max_length=64, verbose_name='BlurHash')),
+                ('error', models.TextField(blank=True, verbose_name='Erro de Processamento')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('uploaded_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Enviada por')),
+            ],
+            options={
+                'verbose_name': 'Imagem',
+                'verbose_name_plural': 'Imagens',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
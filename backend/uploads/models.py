@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.db import models
+
+
+class ImageAsset(models.Model):
+    """Imagem enviada, identificada pelo SHA-256 do conteúdo (cada conteúdo é guardado uma vez)"""
+
+    STATUS_CHOICES = [
+        ('pending', 'Aguardando processamento'),
+        ('processing', 'Processando'),
+        ('ready', 'Pronta'),
+        ('failed', 'Falhou'),
+    ]
+
+    sha256 = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name='SHA-256'
+    )
+
+    original = models.FileField(
+        max_length=255,
+        verbose_name='Arquivo Original'
+    )
+
+    content_type = models.CharField(
+        max_length=50,
+        verbose_name='Tipo de Conteúdo'
+    )
+
+    size = models.PositiveIntegerField(verbose_name='Tamanho (bytes)')
+    width = models.PositiveIntegerField(verbose_name='Largura')
+    height = models.PositiveIntegerField(verbose_name='Altura')
+
+    status = models.CharField(
+        max_length=15,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name='Status'
+    )
+
+    variants = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name='Variantes',
+        help_text='Versões redimensionadas (WebP e JPEG) por largura'
+    )
+
+    blurhash = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name='BlurHash'
+    )
+
+    error = models.TextField(
+        blank=True,
+        verbose_name='Erro de Processamento'
+    )
+
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Enviada por'
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Imagem'
+        verbose_name_plural = 'Imagens'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.get_status_display()})"
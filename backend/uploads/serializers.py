@@ -0,0 +1,18 @@
+from rest_framework import serializers
+
+from .models import ImageAsset
+
+
+class ImageAssetSerializer(serializers.ModelSerializer):
+    """Serializer para imagens enviadas (o id público é o SHA-256)"""
+    id = serializers.CharField(source='sha256', read_only=True)
+    url = serializers.CharField(source='original.url', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+
+    class Meta:
+        model = ImageAsset
+        fields = [
+            'id', 'url', 'content_type', 'size', 'width', 'height', 'status', 'status_display',
+            'blurhash', 'variants', 'created_at', 'processed_at'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,15 @@
+import logging
+
+from celery import shared_task
+
+from . import images
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='uploads.tasks.process_image', ignore_result=True)
+def process_image(asset_id):
+    """Gera as variantes redimensionadas e o BlurHash de uma imagem enviada"""
+    asset = images.process(asset_id)
+    if asset is not None:
+        logger.info(f'Imagem {asset.sha256} processada: {len(asset.variants)} variantes')
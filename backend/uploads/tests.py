@@ -0,0 +1,200 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from PIL import Image
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import ServiceCategory, User
+from services.models import ServiceRequest
+
+from . import images
+from .media import parse_range
+from .models import ImageAsset
+
+
+class ParseRangeTest(SimpleTestCase):
+    """Cabeçalho Range: um intervalo de bytes"""
+
+    def test_explicit_and_open_ranges(self):
+        self.assertEqual(parse_range('bytes=0-99', 1000), (0, 100))
+        self.assertEqual(parse_range('bytes=500-', 1000), (500, 500))
+        # Fim além do arquivo: limitado ao último byte
+        self.assertEqual(parse_range('bytes=900-5000', 1000), (900, 100))
+
+    def test_suffix_range(self):
+        self.assertEqual(parse_range('bytes=-100', 1000), (900, 100))
+        self.assertEqual(parse_range('bytes=-5000', 1000), (0, 1000))
+
+    def test_ignored_ranges(self):
+        # Vários intervalos ou formato desconhecido: arquivo inteiro
+        self.assertIsNone(parse_range('bytes=0-1,5-6', 1000))
+        self.assertIsNone(parse_range('bytes=-', 1000))
+        self.assertIsNone(parse_range('items=0-1', 1000))
+
+    def test_unsatisfiable_ranges(self):
+        for header in ('bytes=1000-', 'bytes=10-5', 'bytes=-0'):
+            with self.subTest(header=header), self.assertRaises(ValueError):
+                parse_range(header, 1000)
+
+
+@override_settings(MEDIA_ACCEL_REDIRECT='')
+class ServeMediaTest(TestCase):
+    """Entrega pelo Django (sem nginx): Range, ETag e controle de acesso"""
+
+    content = bytes(range(256)) * 4
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.media_root, 'profile_pictures'))
+        with open(os.path.join(self.media_root, 'profile_pictures', 'foto.jpg'), 'wb') as file:
+            file.write(self.content)
+        with open(os.path.join(self.media_root, 'interno.txt'), 'wb') as file:
+            file.write(b'interno')
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = Client(HTTP_HOST='localhost')
+
+    def tearDown(self):
+        shutil.rmtree(self.media_root)
+
+    def get(self, path='/media/profile_pictures/foto.jpg', **headers):
+        return self.client.get(path, **headers)
+
+    def test_full_file(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_range(self):
+        response = self.get(HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.content)}')
+        self.assertEqual(b''.join(response.streaming_content), self.content[10:20])
+
+    def test_unsatisfiable_range(self):
+        with self.assertLogs('django.request', 'WARNING'):
+            response = self.get(HTTP_RANGE=f'bytes={len(self.content)}-')
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_conditional_requests(self):
+        etag = self.get()['ETag']
+
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # If-Range com outra versão: arquivo inteiro em vez do intervalo
+        response = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"outra-versao"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+    def test_private_files_require_staff(self):
+        with self.assertLogs('django.request', 'WARNING'):
+            self.assertEqual(self.get('/media/interno.txt').status_code, 401)
+            self.assertEqual(self.get('/media/../settings.py').status_code, 404)
+
+    def test_query_token_must_be_a_media_token(self):
+        staff = User.objects.create_user(username='equipe', password='123456', is_staff=True)
+        access = RefreshToken.for_user(staff).access_token
+        media_token = Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Bearer {access}').post(
+            '/api/uploads/media-token/'
+        ).json()['token']
+
+        self.assertEqual(self.get(f'/media/interno.txt?token={media_token}').status_code, 200)
+        # O JWT de acesso não vale na URL, e o token de mídia não vale como Bearer
+        with self.assertLogs('django.request', 'WARNING'):
+            self.assertEqual(self.get(f'/media/interno.txt?token={access}').status_code, 401)
+            self.assertEqual(
+                self.get('/api/uploads/images/abc/', HTTP_AUTHORIZATION=f'Bearer {media_token}').status_code, 401
+            )
+
+
+@override_settings(IMAGE_PROCESSING='sync', IMAGE_VARIANT_WIDTHS=[8, 32])
+class ImagePipelineTest(TestCase):
+    """uploads.images: upload, variantes, falha e propagação para as solicitações"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.user = User.objects.create_user(username='cliente', password='123456', user_type='client')
+        token = RefreshToken.for_user(self.user).access_token
+        self.client = Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Bearer {token}')
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 48), (200, 30, 30)).save(buffer, format='PNG')
+        self.content = buffer.getvalue()
+
+    def upload(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                '/api/uploads/images/', {'file': SimpleUploadedFile('foto.png', self.content, 'image/png')}
+            )
+
+    def test_upload_is_processed_once(self):
+        response = self.upload()
+
+        self.assertEqual(response.status_code, 201)
+        asset = ImageAsset.objects.get(sha256=response.json()['id'])
+        self.assertEqual(asset.status, 'ready')
+        self.assertEqual([variant['width'] for variant in asset.variants], [8, 32])
+        self.assertTrue(asset.blurhash)
+        self.assertTrue(default_storage.exists(images.variant_name(asset.sha256, 32, 'webp')))
+
+        with mock.patch('uploads.images.enqueue') as enqueue:
+            response = self.upload()
+        self.assertEqual(response.status_code, 200)
+        enqueue.assert_not_called()
+
+    def test_failed_processing_is_retried_on_upload(self):
+        with mock.patch('uploads.images.build_variants', side_effect=OSError('disco cheio')), \
+                self.assertLogs('uploads.images', 'ERROR'):
+            response = self.upload()
+        asset = ImageAsset.objects.get(sha256=response.json()['id'])
+        self.assertEqual(asset.status, 'failed')
+        self.assertEqual(asset.error, 'disco cheio')
+
+        # O original também pode ter faltado ao worker: é gravado de novo
+        default_storage.delete(asset.original.name)
+        response = self.upload()
+
+        self.assertEqual(response.status_code, 200)
+        asset.refresh_from_db()
+        self.assertEqual(asset.status, 'ready')
+        self.assertEqual(asset.error, '')
+
+    def test_propagate_updates_requests_and_sync_sequence(self):
+        with mock.patch('uploads.images.enqueue'):
+            asset = ImageAsset.objects.get(sha256=self.upload().json()['id'])
+        service_request = ServiceRequest.objects.create(
+            client=self.user,
+            category=ServiceCategory.objects.create(name='Elétrica'),
+            title='Trocar tomadas',
+            description='Trocar 3 tomadas da sala',
+            address='Rua A, 123',
+            city='Blumenau',
+            state='SC',
+            images=[images.asset_payload(asset), 'https://exemplo.com/externa.jpg']
+        )
+        service_request.image_assets.add(asset)
+
+        images.process(asset.pk)
+
+        updated = ServiceRequest.objects.get(pk=service_request.pk)
+        self.assertEqual(updated.images[0]['status'], 'ready')
+        self.assertEqual(len(updated.images[0]['variants']), 2)
+        self.assertEqual(updated.images[1], 'https://exemplo.com/externa.jpg')
+        # update() não passa pelo pre_save: o delta sync precisa ver a alteração
+        self.assertGreater(updated.change_seq, service_request.change_seq)
+        self.assertGreater(updated.updated_at, service_request.updated_at)
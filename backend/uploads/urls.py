@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'uploads'
+
+urlpatterns = [
+    path('images/', views.ImageUploadView.as_view(), name='image_upload'),
+    path('media-token/', views.media_token, name='media_token'),
+    path('images/<str:sha256>/', views.ImageAssetDetailView.as_view(), name='image_detail'),
+]
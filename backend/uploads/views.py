@@ -0,0 +1,102 @@
+import os
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import transaction
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils._os import safe_join
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, throttle_classes
+from rest_framework.exceptions import NotAuthenticated, ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from service_platform.authentication import MediaToken, MediaTokenAuthentication
+
+from . import images, media
+from .handlers import HashingUploadHandler
+from .models import ImageAsset
+from .serializers import ImageAssetSerializer
+
+
+class ImageUploadView(APIView):
+    """View para upload de imagens (multipart, campo 'file')"""
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+    throttle_scope = 'uploads'
+
+    def post(self, request):
+        # Precisa ser definido antes de o corpo ser lido
+        handler = HashingUploadHandler(request, max_size=settings.IMAGE_UPLOAD_MAX_BYTES)
+        request.upload_handlers = [handler]
+        upload = request.FILES.get('file')
+
+        if handler.too_large:
+            return Response(
+                {'error': f'A imagem deve ter no máximo {settings.IMAGE_UPLOAD_MAX_BYTES // (1024 * 1024)} MB.'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        if upload is None:
+            return Response(
+                {'error': 'Envie a imagem no campo "file".'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            with transaction.atomic():
+                asset, created = images.store_upload(upload, request.user)
+        except ValidationError as e:
+            return Response({'error': e.detail[0]}, status=status.HTTP_400_BAD_REQUEST)
+        # Conteúdo já enviado antes: mesma imagem, sem novo processamento
+        return Response(
+            ImageAssetSerializer(asset).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+
+class ImageAssetDetailView(APIView):
+    """View para consultar uma imagem enviada (status do processamento e variantes)"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, sha256):
+        asset = get_object_or_404(ImageAsset, sha256=sha256)
+        return Response(ImageAssetSerializer(asset).data)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def media_token(request):
+    """View que emite o token de curta duração para carregar as mídias protegidas em <img>"""
+    return Response({
+        'token': str(MediaToken.for_user(request.user)),
+        'expires_in': settings.MEDIA_TOKEN_LIFETIME
+    })
+
+
+@api_view(['GET', 'HEAD'])
+@authentication_classes([MediaTokenAuthentication])
+@permission_classes([permissions.AllowAny])
+@throttle_classes([])
+def serve_media(request, path):
+    """View para os arquivos de mídia: verifica o acesso e entrega pelo nginx ou pelo Django"""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404()
+
+    access = media.media_access(request.user, path)
+    if access == media.DENIED and not request.user.is_authenticated:
+        raise NotAuthenticated()
+    # Sem permissão a resposta é a mesma de um arquivo inexistente
+    if access in (media.DENIED, media.NOT_FOUND) or not os.path.isfile(full_path):
+        raise Http404()
+
+    content_type = media.guess_content_type(path)
+    if settings.MEDIA_ACCEL_REDIRECT:
+        response = media.accel_response(path, content_type)
+    else:
+        response = media.file_response(request, full_path, content_type)
+    media.cache_headers(response, path, access)
+    return response
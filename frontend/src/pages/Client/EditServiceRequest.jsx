@@ -97,10 +97,13 @@ const EditServiceRequest = () => {
         }
       })
 
-      // Adicionar imagens se houver
-      selectedImages.forEach((image, index) => {
-        formData.append(`images`, image)
-      })
+      // Envia as imagens novas antes e referencia pelos ids retornados
+      if (selectedImages.length > 0) {
+        const uploaded = await Promise.all(
+          selectedImages.map((image) => apiService.uploads.uploadImage(image))
+        )
+        formData.append('images', JSON.stringify(uploaded.map((image) => image.id)))
+      }
 
       const response = await apiService.serviceRequests.update(id, formData)
       
@@ -102,10 +102,13 @@ const NewServiceRequest = () => {
       // Note: client is automatically set by the backend from authenticated user
       formData.append('additional_info', data.additional_info || '')
 
-      // Add images
-      selectedImages.forEach((img, index) => {
-        formData.append(`images`, img.file)
-      })
+      // Envia as imagens antes e referencia pelos ids retornados
+      if (selectedImages.length > 0) {
+        const uploaded = await Promise.all(
+          selectedImages.map((img) => apiService.uploads.uploadImage(img.file))
+        )
+        formData.append('images', JSON.stringify(uploaded.map((image) => image.id)))
+      }
 
       const response = await apiService.createServiceRequest(formData)
       
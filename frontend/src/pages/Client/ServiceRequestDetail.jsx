@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react'
 import { Link, useParams, useNavigate } from 'react-router-dom'
-import { apiService } from '../../services/api'
+import { apiService, ensureMediaToken, mediaUrl } from '../../services/api'
 import {
   ArrowLeftIcon,
   PencilIcon,
@@ -45,7 +45,10 @@ const ServiceRequestDetail = () => {
 
   const fetchRequestDetail = async () => {
     try {
-      const response = await apiService.serviceRequests.getById(id)
+      const [response] = await Promise.all([
+        apiService.serviceRequests.getById(id),
+        ensureMediaToken(),
+      ])
       setRequest(response)
     } catch (error) {
       console.error('Erro ao carregar solicitação:', error)
@@ -301,10 +304,11 @@ const ServiceRequestDetail = () => {
                         {request.images.map((image, index) => (
                           <div key={index} className="aspect-square">
                             <img
-                              src={image.image}
+                              src={mediaUrl(image.variants?.[0]?.webp || image.url || image)}
                               alt={`Imagem ${index + 1}`}
+                              loading="lazy"
                               className="w-full h-full object-cover rounded-lg cursor-pointer hover:opacity-80 transition-opacity"
-                              onClick={() => window.open(image.image, '_blank')}
+                              onClick={() => window.open(mediaUrl(image.url || image), '_blank')}
                             />
                           </div>
                         ))}
@@ -37,6 +37,15 @@ const Notifications = () => {
     fetchNotifications();
   }, [filters, pagination.page]);
 
+  useEffect(() => {
+    return apiService.notifications.subscribe((notification) => {
+      setNotifications(prev => (
+        prev.some(n => n.id === notification.id) ? prev : [notification, ...prev]
+      ));
+      toast(notification.title);
+    });
+  }, []);
+
   const fetchNotifications = async () => {
     try {
       setLoading(true);
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate, Link } from 'react-router-dom';
-import { apiService } from '../../services/api';
+import { apiService, ensureMediaToken, mediaUrl } from '../../services/api';
 import {
   ArrowLeftIcon,
   MapPinIcon,
@@ -31,7 +31,8 @@ const OpportunityDetail = () => {
       setLoading(true);
       const [opportunityRes, proposalsRes] = await Promise.all([
         apiService.getServiceRequest(id),
-        apiService.getServiceRequestProposals(id)
+        apiService.getServiceRequestProposals(id),
+        ensureMediaToken()
       ]);
       
       setOpportunity(opportunityRes.data);
@@ -185,10 +186,11 @@ const OpportunityDetail = () => {
                     <div 
                       key={index}
                       className="aspect-square bg-base-200 rounded-lg overflow-hidden cursor-pointer hover:opacity-80 transition-opacity"
-                      onClick={() => openImageModal(image.url)}
+                      onClick={() => openImageModal(mediaUrl(image.url))}
                     >
                       <img 
-                        src={image.url} 
+                        src={mediaUrl(image.variants?.[0]?.webp || image.url)} 
+                        loading="lazy" 
                         alt={`Imagem ${index + 1}`}
                         className="w-full h-full object-cover"
                       />
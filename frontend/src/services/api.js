@@ -3,6 +3,13 @@ import axios from 'axios'
 // Configuração base da API
 const API_BASE_URL = 'http://127.0.0.1:8000/api'
 
+// Notificações: espera antes de reconectar o stream e intervalo da consulta periódica (sem stream)
+const NOTIFICATION_RETRY_MS = 3000
+const NOTIFICATION_POLL_INTERVAL_MS = 30000
+
+// Token das mídias protegidas: renovado quando falta menos que isso para expirar
+const MEDIA_TOKEN_MARGIN_MS = 60000
+
 // Instância do axios com configurações padrão
 const api = axios.create({
   baseURL: API_BASE_URL,
@@ -109,6 +116,111 @@ export const notificationsAPI = {
   delete: (id) => api.delete(`/notifications/${id}/`),
   deleteAll: () => api.delete('/notifications/'),
   bulkUpdate: (data) => api.patch('/notifications/bulk/', data),
+  // Notificações em tempo real: stream SSE (servidor ASGI) ou, sem ele (501), consulta periódica.
+  // Retorna a função para encerrar
+  subscribe: (onNotification) => {
+    if (!localStorage.getItem('token')) return () => {}
+    let source = null
+    let timer = null
+    let closed = false
+    let lastId = null
+
+    const deliver = (notification) => {
+      lastId = Math.max(lastId ?? 0, notification.id)
+      onNotification(notification)
+    }
+
+    const poll = async () => {
+      try {
+        const response = await api.get('/notifications/', { params: { page: 1 } })
+        const recent = response.notifications || []
+        // A primeira consulta só marca o ponto de partida
+        if (lastId === null) {
+          lastId = Math.max(0, ...recent.map((n) => n.id))
+        } else {
+          recent.filter((n) => n.id > lastId).reverse().forEach(deliver)
+        }
+      } catch (error) {
+        console.error('Erro ao consultar notificações:', error)
+      }
+      if (!closed) timer = setTimeout(poll, NOTIFICATION_POLL_INTERVAL_MS)
+    }
+
+    const connect = async () => {
+      let token
+      try {
+        // O EventSource não envia cabeçalhos: a URL leva um token de curta duração, pedido a cada conexão
+        ({ token } = await api.post('/notifications/stream/token/'))
+      } catch (error) {
+        if (closed) return
+        if (error.response?.status === 501) poll()
+        else timer = setTimeout(connect, NOTIFICATION_POLL_INTERVAL_MS)
+        return
+      }
+      if (closed) return
+      const params = new URLSearchParams({ token })
+      if (lastId !== null) params.set('last_event_id', lastId)
+      source = new EventSource(`${API_BASE_URL}/notifications/stream/?${params}`)
+      source.addEventListener('notification', (event) => deliver(JSON.parse(event.data)))
+      source.onerror = () => {
+        // Reconexão própria (a automática reutilizaria o token já expirado)
+        source.close()
+        if (!closed) timer = setTimeout(connect, NOTIFICATION_RETRY_MS)
+      }
+    }
+
+    if (typeof EventSource === 'undefined') poll()
+    else connect()
+    return () => {
+      closed = true
+      clearTimeout(timer)
+      if (source) source.close()
+    }
+  },
+}
+
+// <img> não envia o cabeçalho Authorization: as mídias protegidas levam na URL um token de
+// curta duração, válido só para elas (o JWT de acesso nunca vai na URL)
+let mediaToken = null
+let mediaTokenExpiresAt = 0
+// JWT de acesso com que o token foi pedido: outro login (ou logout) o descarta
+let mediaTokenOwner = null
+
+const currentMediaToken = () => (
+  mediaTokenOwner === localStorage.getItem('token') ? mediaToken : null
+)
+
+// Chamar antes de renderizar imagens protegidas; o mesmo token serve a todas até perto de expirar
+export const ensureMediaToken = async () => {
+  const owner = localStorage.getItem('token')
+  if (!owner) return null
+  if (currentMediaToken() && Date.now() < mediaTokenExpiresAt - MEDIA_TOKEN_MARGIN_MS) return mediaToken
+  const { token, expires_in } = await api.post('/uploads/media-token/')
+  mediaToken = token
+  mediaTokenExpiresAt = Date.now() + expires_in * 1000
+  mediaTokenOwner = owner
+  return mediaToken
+}
+
+// URL de um arquivo de mídia protegido
+export const mediaUrl = (url) => {
+  if (!url) return url
+  const absolute = url.startsWith('/') ? `${API_BASE_URL.replace(/\/api$/, '')}${url}` : url
+  const token = currentMediaToken()
+  if (!token || !absolute.includes('/media/images/')) return absolute
+  return `${absolute}${absolute.includes('?') ? '&' : '?'}token=${encodeURIComponent(token)}`
+}
+
+// Upload de imagens (reenviar o mesmo arquivo devolve a mesma imagem, pelo SHA-256)
+export const uploadsAPI = {
+  uploadImage: (file) => {
+    const formData = new FormData()
+    formData.append('file', file)
+    return api.post('/uploads/images/', formData, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    })
+  },
+  getImage: (id) => api.get(`/uploads/images/${id}/`),
 }
 
 // Serviços de Estatísticas
@@ -128,6 +240,7 @@ export const apiService = {
   reviews: reviewsAPI,
   notifications: notificationsAPI,
   statistics: statisticsAPI,
+  uploads: uploadsAPI,
   
   // Métodos de conveniência para compatibilidade
   getCategories: () => categoriesAPI.getAll(),